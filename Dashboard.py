@@ -1,12 +1,19 @@
 # dashboard_analyse_democratie_liberale.py
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import networkx as nx
-from datetime import datetime
-import base64
-import numpy as np
+import time
+import uuid
+from dataclasses import replace
+from functools import cached_property
+
+# Seuls les modules légers sont importés ici : pandas, numpy, scipy, networkx et plotly.express
+# sont chargés par l'onglet qui en a besoin, après l'affichage de l'en-tête
+import instrumentation
+from instrumentation import etape, execution, taille_figure
+from sources_donnees import obtenir_donnees
+from textes import html_insight
+
+# Début de l'exécution du script, pour mesurer le délai jusqu'au premier affichage
+DEBUT_SCRIPT = time.perf_counter()
 
 # Configuration de la page
 st.set_page_config(
@@ -66,87 +73,78 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 class AnalyseDemocratieLiberale:
-    def __init__(self):
-        self.initialize_data()
-        self.generate_chronological_data()
-        self.generate_comparative_data()
+    def __init__(self, donnees=None):
+        # Les données sont chargées une fois par processus et partagées en lecture seule
+        with etape('constructeur'):
+            self.donnees = donnees if donnees is not None else obtenir_donnees()
+            self.initialize_data()
+            self.generate_chronological_data()
 
     def initialize_data(self):
         """Initialise les données de base sur Démocratie Libérale"""
-        self.parti_data = {
-            'FONDATION': {
-                'date_creation': '1997-06-24',
-                'fondateur_principal': 'Alain Madelin',
-                'membres_fondateurs': 15,
-                'budget_initial_millions': 2.5,
-                'origine': 'Fusion du Parti républicain et du Parti populaire pour la démocratie française'
-            },
-            'CROISSANCE': {
-                'membres_max': 30000,
-                'elus_nationaux': 42,
-                'ministres_gouvernement': 8,
-                'budget_peak_millions': 15.2,
-                'influence_mediatique': 7
-            },
-            'INFLUENCE': {
-                'doctrine': 'Libéralisme classique',
-                'positionnement': 'Droite libérale',
-                'alliances_strategiques': ['UMP', 'UDF'],
-                'think_tanks_affilies': 3,
-                'courants_internes': ['Libéraux-conservateurs', 'Centristes libéraux']
-            },
-            'HERITAGE': {
-                'dissolution': '2002-11-17',
-                'integration': 'Union pour un mouvement populaire (UMP)',
-                'heritage_ideologique': 'Renouveau de la pensée libérale en France',
-                'personnalites_issues': ['Alain Madelin', 'Jean-Pierre Raffarin', 'Hervé Novelli']
-            }
-        }
+        self.parti_data = self.donnees.parti_data
         
         # Relations politiques stratégiques
-        self.relations_politiques = [
-            {'source': 'Alain Madelin', 'target': 'Jacques Chirac', 'poids': 8, 'type': 'Alliance tactique'},
-            {'source': 'Démocratie Libérale', 'target': 'UMP', 'poids': 9, 'type': 'Fusion-absorption'},
-            {'source': 'Jean-Pierre Raffarin', 'target': 'Démocratie Libérale', 'poids': 7, 'type': 'Leadership'},
-            {'source': 'Libéraux', 'target': 'Centristes UDF', 'poids': 6, 'type': 'Convergence idéologique'},
-            {'source': 'Démocratie Libérale', 'target': 'Medias libéraux', 'poids': 5, 'type': 'Influence'},
-            {'source': 'Alain Madelin', 'target': 'Think tanks', 'poids': 7, 'type': 'Expertise'},
-            {'source': 'DL Jeunes', 'target': 'Démocratie Libérale', 'poids': 4, 'type': 'Militantisme'}
-        ]
+        self.relations_politiques = self.donnees.relations_politiques
 
     def generate_chronological_data(self):
-        """Génère des données chronologiques pour l'analyse historique"""
-        annees = list(range(1997, 2004))
-        
-        # Données simulées mais réalistes basées sur l'histoire du parti
-        self.evolution_membres = [5000, 15000, 28000, 30000, 25000, 18000, 12000]
-        self.evolution_budget = [2.5, 8.2, 12.5, 15.2, 11.8, 8.5, 4.2]
-        self.influence_politique = [3, 6, 8, 9, 8, 6, 4]
-        self.resultats_electoraux = [4.2, 5.8, 7.2, 6.8, 5.5, 4.1, 3.2]  # en %
-        
-        self.annees_chrono = annees
+        """Expose les séries chronologiques pour l'analyse historique"""
+        self.annees_chrono = self.donnees.annees_chrono
+        self.evolution_membres = self.donnees.evolution_membres
+        self.evolution_budget = self.donnees.evolution_budget
+        self.influence_politique = self.donnees.influence_politique
+        self.resultats_electoraux = self.donnees.resultats_electoraux  # en %
         
         # Événements clés
-        self.evenements_cles = [
-            {'annee': 1997, 'evenement': 'Fondation officielle', 'impact': 9},
-            {'annee': 1998, 'evenement': 'Premières élections régionales', 'impact': 6},
-            {'annee': 1999, 'evenement': 'Élections européennes - liste commune', 'impact': 7},
-            {'annee': 2000, 'evenement': 'Participation au gouvernement', 'impact': 8},
-            {'annee': 2001, 'evenement': 'Élections municipales - succès local', 'impact': 6},
-            {'annee': 2002, 'evenement': 'Présidentielle + création UMP', 'impact': 10},
-            {'annee': 2003, 'evenement': 'Dissolution officielle', 'impact': 8}
-        ]
+        self.evenements_cles = self.donnees.evenements_cles
+
+    @property
+    def comparaison_partis(self):
+        """Données comparatives avec d'autres partis de l'époque (DataFrame construit au premier accès)"""
+        return self.donnees.comparaison_partis
+
+    @cached_property
+    def moteur_comparatif(self):
+        """Moteur comparatif (colonnes typées, rangs, agrégats par doctrine) construit une seule fois"""
+        from moteur_comparatif import MoteurComparatif
+        return MoteurComparatif(self.comparaison_partis)
+
+    @cached_property
+    def index_ideologique(self):
+        """Arbre k-d de l'espace de positionnement, partagé par le processus pour un contenu donné"""
+        from index_ideologique import index_en_cache
+        return index_en_cache(self.donnees.positionnement)
+
+    @cached_property
+    def reseau_temporel(self):
+        """Graphe des relations datées (None si les relations n'ont pas d'intervalle de validité)"""
+        from reseau_temporel import GrapheTemporel
+        return GrapheTemporel.depuis_relations(self.relations_politiques)
 
-    def generate_comparative_data(self):
-        """Génère des données comparatives avec d'autres partis de l'époque"""
-        self.comparaison_partis = pd.DataFrame({
-            'Parti': ['Démocratie Libérale', 'RPR', 'UDF', 'PS', 'PCF', 'FN'],
-            'Période_activité': ['1997-2002', '1976-2002', '1978-2007', '1969-', '1920-', '1972-'],
-            'Membres_max': [30000, 170000, 60000, 120000, 200000, 50000],
-            'Doctrine': ['Libéralisme', 'Gaullisme', 'Centrisme', 'Socialisme', 'Communisme', 'Nationalisme'],
-            'Ministres_gouvernement': [8, 45, 32, 38, 15, 0],
-            'Durée_vie_annees': [5, 26, 29, '53+', '103+', '51+']
-        })
+    @cached_property
+    def graphe_influence(self):
+        """Graphe d'influence compact construit une seule fois (ou repris d'un snapshot compilé)"""
+        if self.donnees.precalculs is not None:
+            return self.donnees.precalculs.graphe()
+        from analyse_graphe import GrapheCSR
+        return GrapheCSR.depuis_relations(self.relations_politiques)
+
+    @staticmethod
+    def _memoriser(cle, construire, capacite=16):
+        """Réutilise dans la session un rendu déjà construit pour les mêmes paramètres"""
+        rendus = st.session_state.setdefault('_rendus', {})
+        if cle not in rendus:
+            if len(rendus) >= capacite:
+                rendus.pop(next(iter(rendus)))
+            rendus[cle] = construire()
+        return rendus[cle]
+
+    @staticmethod
+    def _graphique(nom, fig, conteneur=st):
+        """Affiche une figure Plotly ; sérialisation et taille mesurées si l'instrumentation est active"""
+        with etape(f'affichage_{nom}'):
+            conteneur.plotly_chart(fig, use_container_width=True)
+        taille_figure(nom, fig)
 
     def display_header(self):
         """Affiche l'en-tête avec des métriques analytiques"""
@@ -184,224 +182,376 @@ class AnalyseDemocratieLiberale:
             </div>
             """, unsafe_allow_html=True)
 
-        st.markdown("""
-        <div class="insight-box">
-            <h4>🧠 Analyse Stratégique Principale</h4>
-            <p>Démocratie Libérale a représenté une tentative unique de structurer une <strong>droite libérale pure</strong> dans le paysage politique français. Malgré sa courte existence (1997-2002), le parti a réussi à influencer durablement le débat économique et à former des cadres qui joueront un rôle important dans les gouvernements suivants. Sa fusion dans l'UMP marque à la fois un échec de pérennisation autonome et une réussite d'intégration dans le jeu politique majoritaire.</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(html_insight('synthese'), unsafe_allow_html=True)
 
+    @st.fragment
+    @instrumentation.section('reseau')
     def analyse_reseau_influence(self):
         """Analyse du réseau d'influence et des relations politiques"""
+        from analyse_graphe import centralites_en_cache
+        from figures import figure_reseau_influence
         st.markdown("### 🔗 Analyse du Réseau d'Influence Politique")
         
-        # Création du graphe
-        G = nx.DiGraph()
-        for rel in self.relations_politiques:
-            G.add_edge(rel['source'], rel['target'], weight=rel['poids'], type=rel['type'])
-        
-        # Calcul des métriques de centralité
-        centrality_degree = nx.degree_centrality(G)
-        centrality_betweenness = nx.betweenness_centrality(G, weight='weight')
-        centrality_closeness = nx.closeness_centrality(G)
-
-        # DataFrame des résultats
-        df_centralite = pd.DataFrame({
-            'Acteur': list(centrality_degree.keys()),
-            'Influence Directe': [centrality_degree[n] for n in centrality_degree.keys()],
-            'Contrôle des Réseaux': [centrality_betweenness[n] for n in centrality_betweenness.keys()],
-            'Accessibilité Stratégique': [centrality_closeness[n] for n in centrality_closeness.keys()]
-        }).sort_values(by='Contrôle des Réseaux', ascending=False)
+        # Graphe compact (CSR) et centralités, mises en cache par hash du contenu du graphe
+        with etape('graphe_csr'):
+            graphe = self.graphe_influence
+        with st.expander("⚙️ Paramètres de calcul des centralités"):
+            mode = st.selectbox("Mode de calcul", ['auto', 'exact', 'echantillonne'],
+                                format_func={'auto': 'Automatique', 'exact': 'Exact',
+                                             'echantillonne': 'Échantillonné (approché)'}.get)
+            epsilon = st.slider("Erreur maximale tolérée (mode échantillonné)", 0.01, 0.20, 0.05)
+            budget_temps = st.slider("Budget de temps (secondes)", 0.2, 10.0, 0.8)
+        with etape('centralites'):
+            resultat = centralites_en_cache(graphe, mode=mode, epsilon=epsilon, budget_temps_s=budget_temps)
+        df_centralite = resultat.table
 
         st.dataframe(df_centralite, use_container_width=True)
+        if resultat.mode == 'echantillonne':
+            st.caption(f"Centralités approchées : {resultat.sources_utilisees} sources sur {resultat.n} "
+                       f"(erreur ≤ {resultat.epsilon:.3f} avec 90 % de confiance), calculées en {resultat.duree_s:.2f} s")
 
-        # Visualisation du réseau
-        pos = nx.spring_layout(G, k=1, iterations=50)
-        edge_x = []
-        edge_y = []
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-        
-        edge_trace = go.Scatter(x=edge_x, y=edge_y, line=dict(width=1.5, color='#888'), hoverinfo='none', mode='lines')
-        
-        node_x = []
-        node_y = []
-        node_text = []
-        node_size = []
-        for node in G.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            node_text.append(f"{node}<br>Contrôle: {centrality_betweenness[node]:.2f}")
-            node_size.append(20 + centrality_betweenness[node] * 60)
-
-        node_trace = go.Scatter(
-            x=node_x, y=node_y, mode='markers+text', hoverinfo='text', text=list(G.nodes()),
-            textposition="top center", marker=dict(size=node_size, color='#1f3a60', line=dict(width=2, color='#e67e22'))
-        )
-        
-        fig = go.Figure(data=[edge_trace, node_trace], layout=go.Layout(
-            title=dict(text="Réseau d'Influence de Démocratie Libérale", font=dict(size=16)),
-            showlegend=False, hovermode='closest',
-            margin=dict(b=20,l=5,r=5,t=40), annotations=[ dict(
-                text="La taille des nœuds indique la capacité de contrôle dans le réseau d'influence.",
-                showarrow=False, xref="paper", yref="paper", x=0.005, y=-0.002, xanchor='left', yanchor='bottom', font=dict(size=12)
-            )], xaxis=dict(showgrid=False, zeroline=False, showticklabels=False), 
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False), height=500
-        ))
-        st.plotly_chart(fig, use_container_width=True)
-
-        st.markdown("""
-        <div class="insight-box">
-            <h4>🧠 Analyse du Réseau d'Influence</h4>
-            <p><strong>Alain Madelin</strong> apparaît comme le nœud central incontournable, ce qui correspond à son rôle de fondateur et figure médiatique du libéralisme français. La connexion forte avec <strong>l'UMP</strong> montre la stratégie d'intégration au sein de la droite gouvernementale. Les relations avec les <strong>think tanks</strong> et <strong>médias libéraux</strong> illustrent l'ancrage intellectuel du mouvement, caractéristique des partis doctrinaux.</p>
-        </div>
-        """, unsafe_allow_html=True)
+        # Visualisation du réseau (coordonnées vectorisées, WebGL et niveaux de détail si volumineux)
+        with st.expander("🖥️ Paramètres d'affichage du réseau"):
+            mode_rendu = st.selectbox("Rendu", ['auto', 'svg', 'webgl'],
+                                      format_func={'auto': 'Automatique', 'svg': 'SVG', 'webgl': 'WebGL'}.get)
+            poids_min = None
+            if graphe.poids.max() > graphe.poids.min():
+                poids_min = st.slider("Poids minimal des relations affichées", float(graphe.poids.min()),
+                                      float(graphe.poids.max()), float(graphe.poids.min()))
+            top_k = st.slider("Nombre d'acteurs étiquetés", 1, 50, 15)
+            taille_max = st.slider("Taille maximale de la figure (Mo)", 1, 50, 5)
+        rendu = self._memoriser(
+            ('reseau', graphe.empreinte, resultat.mode, resultat.sources_utilisees, mode_rendu, poids_min, top_k, taille_max),
+            lambda: figure_reseau_influence(graphe, resultat, mode_rendu=mode_rendu, poids_min=poids_min,
+                                            top_k=top_k, taille_max_mo=taille_max))
+        fig = rendu.figure
+        if rendu.aretes_affichees < rendu.aretes_totales or rendu.super_noeuds:
+            st.caption(f"Niveau de détail : {rendu.aretes_affichees} relations affichées sur {rendu.aretes_totales}, "
+                       f"{rendu.super_noeuds} groupes agrégés, figure de {rendu.taille_octets / 1e6:.1f} Mo")
+        self._graphique('reseau', fig)
+
+        temporel = self.reseau_temporel
+        if temporel is not None and temporel.periode is not None:
+            self.evolution_reseau(graphe, temporel)
+        self.chemins_reseau(graphe)
 
+        st.markdown(html_insight('reseau'), unsafe_allow_html=True)
+
+    def evolution_reseau(self, graphe, temporel):
+        """Centralités par fenêtre glissante et réseau animé, à partir des relations datées"""
+        from figures import figure_centralites_temporelles
+        from rendu_reseau import figure_reseau_anime, positions_en_tableau
+        from reseau_temporel import PAS, centralites_temporelles_en_cache
+        from store_layout import obtenir_layout
+        st.markdown("#### ⏱️ Évolution du Réseau dans le Temps")
+        # Calcul long sur un grand réseau : proposé sans être lancé d'office
+        if not st.toggle("Afficher l'évolution temporelle", value=temporel.m <= 5000):
+            return
+        with st.expander("⚙️ Fenêtres temporelles"):
+            col1, col2 = st.columns(2)
+            with col1:
+                pas = st.selectbox("Pas entre deux fenêtres", list(PAS), index=1, format_func=PAS.get)
+                largeur = st.slider("Largeur de la fenêtre (en pas)", 1, 24, 4)
+            with col2:
+                mesure = st.selectbox("Mesure suivie", ['Contrôle des Réseaux', 'Influence Directe',
+                                                        'Accessibilité Stratégique'])
+                top_k = st.slider("Nombre d'acteurs suivis", 1, 20, 8)
+        # Mise à jour incrémentale d'une fenêtre à la suivante, résultat partagé par le processus
+        with etape('centralites_temporelles'):
+            serie = centralites_temporelles_en_cache(temporel, pas=pas, largeur=largeur)
+        bilan = serie.fenetres
+        st.caption(f"{len(bilan)} fenêtres calculées en {serie.duree_s:.2f} s : {bilan['Sources_recalculees'].sum()} "
+                   f"parcours depuis une source, contre {bilan['Acteurs'].sum()} pour un recalcul complet")
+        fig = self._memoriser(('centralites_temporelles', temporel.empreinte, pas, largeur, mesure, top_k),
+                              lambda: figure_centralites_temporelles(serie, mesure, top_k))
+        self._graphique('centralites_temporelles', fig)
+        with etape('layout'):
+            positions = positions_en_tableau(temporel, obtenir_layout(graphe, k=1, iterations=50))
+        anime = self._memoriser(('reseau_anime', temporel.empreinte, pas, largeur, mesure),
+                                lambda: figure_reseau_anime(temporel, serie, positions, mesure=mesure))
+        self._graphique('reseau_anime', anime)
+
+    def chemins_reseau(self, graphe):
+        """Plus court chemin entre deux acteurs, voisinage et communautés, servis par l'index précalculé"""
+        from index_chemins import SAUTS_MAX, index_chemins_en_cache
+        from rendu_reseau import figure_ego, positions_en_tableau
+        from store_layout import obtenir_layout
+        st.markdown("#### 🧭 Chemins et Communautés")
+        # Index partagé par le processus, dérivé du précédent quand les relations changent
+        with etape('index_chemins'):
+            index = index_chemins_en_cache(graphe)
+        bilan = index.bilan
+        mise_a_jour = (f"index construit en {bilan['duree_s']:.2f} s" if bilan['mode'] == 'complet' else
+                       f"index mis à jour en {bilan['duree_s']:.2f} s pour {bilan['relations_modifiees']} relations "
+                       f"modifiées ({bilan['reperes_recalcules']} tables de repères et {bilan['acteurs_regroupes']} "
+                       f"acteurs recalculés)")
+        st.caption(f"{index.communautes.max() + 1} communautés (modularité {index.modularite:.2f}), "
+                   f"{len(index.reperes)} acteurs repères ; {mise_a_jour}")
+        acteurs = index.acteurs_proposes()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            source = st.selectbox("Acteur de départ", acteurs,
+                                  index=acteurs.index('DL Jeunes') if 'DL Jeunes' in acteurs else 0)
+        with col2:
+            cible = st.selectbox("Acteur d'arrivée", acteurs, index=acteurs.index('UMP') if 'UMP' in acteurs else 0)
+        with col3:
+            oriente = st.toggle("Respecter le sens des relations", value=False)
+            sauts = st.slider("Voisinage (nombre de relations)", 1, SAUTS_MAX, 1)
+        with etape('chemin'):
+            chemin = index.chemin(source, cible, oriente=oriente)
+        if chemin is None:
+            st.info(f"Aucun chemin de {source} à {cible}" + (" dans le sens des relations." if oriente else "."))
+        else:
+            st.markdown(" → ".join(f"**{acteur}** ({index.communautes[index.positions[acteur]]})"
+                                   for acteur in chemin.noeuds))
+            st.caption(f"{chemin.sauts} relation(s), longueur {chemin.longueur:g} ; {chemin.explores} acteurs "
+                       f"explorés en {1000 * chemin.duree_s:.1f} ms (communauté entre parenthèses)")
+        with etape('voisinage'):
+            voisins = index.voisinage(source, sauts)
+        trajet = [index.positions[acteur] for acteur in chemin.noeuds] if chemin is not None else []
+        noeuds = sorted({*(index.positions[acteur] for acteur in voisins['Acteur']), *trajet})
+        with etape('layout'):
+            positions = positions_en_tableau(graphe, obtenir_layout(graphe, k=1, iterations=50))
+        fig = self._memoriser(('ego', graphe.empreinte, source, cible, oriente, sauts),
+                              lambda: figure_ego(graphe, positions, noeuds, index.communautes, trajet,
+                                                 titre=f"Voisinage de {source} et chemin vers {cible}"))
+        self._graphique('ego', fig)
+        with st.expander("📋 Voisinage et communautés"):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"**{len(voisins)} acteurs à {sauts} relation(s) au plus de {source}**")
+                st.dataframe(voisins, hide_index=True, use_container_width=True)
+            with col2:
+                st.markdown(f"**{len(index.table_communautes)} communautés**")
+                st.dataframe(index.table_communautes, hide_index=True, use_container_width=True)
+
+    @st.fragment
+    @instrumentation.section('performance')
     def analyse_performance_politique(self):
         """Analyse de la performance politique et électorale"""
+        from figures import figures_performance
+        from metriques_partis import FENETRE_DEFAUT, metriques_en_cache
+        from sources_donnees import PARTI_REFERENCE
         st.markdown("### 📈 Analyse de la Performance Politique")
-        
-        # Création d'indicateurs de performance
-        df_performance = pd.DataFrame([
-            {
-                'Indicateur': 'Croissance membres',
-                'Valeur': self.parti_data['CROISSANCE']['membres_max'],
-                'Unité': 'membres',
-                'Performance': 'Élevée'
-            },
-            {
-                'Indicateur': 'Influence gouvernementale', 
-                'Valeur': self.parti_data['CROISSANCE']['ministres_gouvernement'],
-                'Unité': 'ministres',
-                'Performance': 'Moyenne'
-            },
-            {
-                'Indicateur': 'Budget maximum',
-                'Valeur': self.parti_data['CROISSANCE']['budget_peak_millions'],
-                'Unité': 'millions €',
-                'Performance': 'Correcte'
-            },
-            {
-                'Indicateur': 'Durée de vie',
-                'Valeur': 5,
-                'Unité': 'années',
-                'Performance': 'Faible'
-            }
-        ])
+
+        with etape('metriques'):
+            metriques = metriques_en_cache(self.donnees.series_partis, self.comparaison_partis)
+            synthese, annuelles = metriques.parti(PARTI_REFERENCE)
+        with etape('figures'):
+            figures = figures_performance(synthese, annuelles)
 
         col1, col2 = st.columns(2)
         with col1:
-            fig_croissance = px.bar(df_performance, x='Indicateur', y='Valeur', 
-                                   color='Performance',
-                                   title="Indicateurs de Performance Clé",
-                                   color_discrete_map={'Élevée': '#2ecc71', 'Moyenne': '#f39c12', 'Correcte': '#3498db', 'Faible': '#e74c3c'})
-            st.plotly_chart(fig_croissance, use_container_width=True)
+            self._graphique('croissance', figures['croissance'])
         
         with col2:
             # Analyse du rapport coût/efficacité
-            cout_par_membre = (self.parti_data['CROISSANCE']['budget_peak_millions'] * 1000000) / self.parti_data['CROISSANCE']['membres_max']
-            influence_par_membre = self.parti_data['CROISSANCE']['ministres_gouvernement'] / self.parti_data['CROISSANCE']['membres_max'] * 1000
-            
-            fig_efficacite = go.Figure()
-            fig_efficacite.add_trace(go.Bar(name='Coût par membre', x=['Efficacité'], y=[cout_par_membre]))
-            fig_efficacite.add_trace(go.Bar(name='Influence par 1000 membres', x=['Efficacité'], y=[influence_par_membre]))
-            fig_efficacite.update_layout(title="Analyse d'Efficacité Organisationnelle")
-            st.plotly_chart(fig_efficacite, use_container_width=True)
-
-        st.markdown("""
-        <div class="insight-box">
-            <h4>🧠 Analyse de Performance</h4>
-            <p>Démocratie Libérale démontre une <strong>croissance rapide</strong> mais une <strong>pérennité limitée</strong>. La performance en termes d'influence gouvernementale est remarquable pour un parti jeune, avec 8 ministres issus de ses rangs. Cependant, la courte durée de vie révèle les limites d'une structure trop dépendante de son leader et de son positionnement doctrinal strict dans le paysage politique français peu favorable aux partis monothématiques.</p>
-        </div>
-        """, unsafe_allow_html=True)
+            self._graphique('efficacite', figures['efficacite'])
+
+        with st.expander("📋 Indicateurs annuels"):
+            st.caption(f"Notes par rang percentile parmi les {len(metriques.synthese)} partis (indicateurs clés) "
+                       "et parmi les partis de la même année (indicateurs annuels) ; moyennes glissantes sur "
+                       f"{FENETRE_DEFAUT} ans")
+            st.dataframe(annuelles.drop(columns='Parti'), hide_index=True, use_container_width=True)
+
+        st.markdown(html_insight('performance'), unsafe_allow_html=True)
 
+    @st.fragment
+    @instrumentation.section('chronologie')
     def analyse_chronologie_strategique(self):
         """Analyse chronologique détaillée avec événements clés"""
+        from figures import figures_chronologie
+        from flux_evenements import flux_en_cache
         st.markdown("### ⏳ Chronologie Stratégique (1997-2002)")
-        
-        # Graphique d'évolution
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=self.annees_chrono, y=self.evolution_membres, 
-                               mode='lines+markers', name='Membres', yaxis='y1'))
-        fig.add_trace(go.Scatter(x=self.annees_chrono, y=self.evolution_budget, 
-                               mode='lines+markers', name='Budget (M€)', yaxis='y2'))
-        fig.add_trace(go.Scatter(x=self.annees_chrono, y=self.influence_politique, 
-                               mode='lines+markers', name='Influence politique', yaxis='y3'))
-        
-        fig.update_layout(
-            title='Évolution Conjointe: Membres, Budget et Influence',
-            xaxis=dict(title='Année'),
-            yaxis=dict(title='Membres', side='left'),
-            yaxis2=dict(title='Budget (M€)', side='right', overlaying='y'),
-            yaxis3=dict(title='Influence (0-10)', side='right', overlaying='y', position=0.85),
-            height=500
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
 
-        # Tableau des événements clés
+        flux = flux_en_cache()
+        reduction = self.reduction_chronologie()
+        if flux is not None:
+            # Flux d'événements en direct : seul le fragment d'actualisation est ré-exécuté périodiquement
+            intervalle = st.select_slider("Rafraîchissement du flux (s)", [0.5, 1, 2, 5, 10], value=1,
+                                          key='flux_rafraichissement')
+            st.fragment(self.chronologie_en_direct, run_every=intervalle)(flux, reduction)
+        else:
+            series = self.series_par_periode(reduction)
+            with etape('figures'):
+                figures = figures_chronologie(series, self.evenements_cles)
+
+            # Graphique d'évolution
+            self._graphique('evolution', figures['evolution'])
+
+            # Tableau des événements clés
+            st.markdown("#### 📅 Événements Politiques Majeurs")
+            self._graphique('evenements', figures['evenements'])
+
+        st.markdown(html_insight('chronologie'), unsafe_allow_html=True)
+
+    def reduction_chronologie(self):
+        """Période, méthode et nombre de points par série choisis (arguments de StoreSeries.requete) ;
+        une borne laissée à l'extrémité de la période reste ouverte pour suivre les ajouts du flux"""
+        from series_temporelles import METHODES, POINTS_DEFAUT
+        debut, fin = self.donnees.series_chronologiques.periode()
+        colonnes = st.columns([3, 1, 1])
+        choix = (None, None)
+        if debut != fin:
+            # Les dates numpy sont proposées au jour près, les années telles quelles
+            en_valeur = (lambda t: t.astype('datetime64[D]').item()) if debut.dtype.kind == 'M' else int
+            bornes = (en_valeur(debut), en_valeur(fin))
+            periode = colonnes[0].slider("Période affichée", min_value=bornes[0], max_value=bornes[1],
+                                         value=bornes, key='chronologie_periode')
+            choix = tuple(None if valeur == borne else valeur for valeur, borne in zip(periode, bornes))
+        methode = colonnes[1].selectbox("Réduction", list(METHODES), format_func=METHODES.get,
+                                        key='chronologie_reduction')
+        points = colonnes[2].select_slider("Points par série", [250, 500, 1000, 2000, 4000], value=POINTS_DEFAUT,
+                                           key='chronologie_points')
+        return {'debut': choix[0], 'fin': choix[1], 'points': points, 'methode': methode}
+
+    def series_par_periode(self, reduction):
+        """Séries de la période choisie, réduites au nombre de points du graphique : restreindre la
+        période relance la requête et affiche plus de détail pour le même volume de points"""
+        store = self.donnees.series_chronologiques
+        with etape('requete_series'):
+            series = store.requete(**reduction)
+        st.caption(f"{len(series):,} points affichés sur "
+                   f"{store.effectif(reduction['debut'], reduction['fin']):,} dans la période")
+        return series
+
+    @instrumentation.section('flux_chronologie')
+    def chronologie_en_direct(self, flux, reduction):
+        """Figures de la chronologie complétées par le flux : seules les traces touchées sont mises à
+        jour, réduites comme la chronologie sans flux (période, méthode, points par série)"""
+        from figures import figures_chronologie
+        from flux_evenements import VueChronologie
+        vue = st.session_state.get('_vue_chronologie')
+        if vue is None or vue.flux is not flux or vue.reduction != reduction:
+            with etape('figures'):
+                figures = figures_chronologie(self.donnees.series_chronologiques.requete(**reduction),
+                                              self.evenements_cles)
+            vue = st.session_state['_vue_chronologie'] = VueChronologie(
+                flux, figures, self.annees_chrono, self.evolution_membres, self.evolution_budget,
+                self.influence_politique, len(self.evenements_cles), reduction)
+        with etape('actualisation'):
+            modifiees, horodatages = vue.actualiser()
+
+        metriques = {**flux.metriques(), **vue.metriques()}
+        colonnes = st.columns(4)
+        colonnes[0].metric("Lignes reçues", f"{metriques['recus']:,}", f"{metriques['rejets']} rejets",
+                           delta_color="off")
+        colonnes[1].metric("Débit", f"{metriques['debit_s']:,.0f} lignes/s")
+        for colonne, libelle, cle in ((colonnes[2], "Latence ingestion (p50)", 'latence_ingestion_p50_s'),
+                                      (colonnes[3], "Latence affichage (p95)", 'latence_affichage_p95_s')):
+            # NaN tant qu'aucune ligne horodatée n'a été reçue (ou affichée)
+            latence = metriques[cle]
+            colonne.metric(libelle, f"{1000 * latence:.0f} ms" if latence == latence else "—")
+        st.caption(f"Source : {flux.source.description} - {metriques['en_memoire']:,} lignes en mémoire - "
+                   f"traces mises à jour : {', '.join(modifiees) or 'aucune'}")
+
+        self._graphique('evolution', vue.figures['evolution'])
         st.markdown("#### 📅 Événements Politiques Majeurs")
-        df_evenements = pd.DataFrame(self.evenements_cles)
-        fig_events = px.timeline(df_evenements, x_start="annee", x_end="annee", y="evenement", 
-                               color="impact", color_continuous_scale="Viridis",
-                               title="Chronologie des Événements Clés")
-        fig_events.update_yaxes(autorange="reversed")
-        st.plotly_chart(fig_events, use_container_width=True)
-
-        st.markdown("""
-        <div class="insight-box">
-            <h4>🧠 Analyse Chronologique</h4>
-            <p>La courbe de croissance montre un <strong>pic en 2000</strong> correspondant à la participation au gouvernement Jospin, suivie d'un déclin rapide après l'échec de la stratégie autonome lors de la présidentielle 2002. L'année 2002 représente un point d'inflexion stratégique : l'échec de Madelin à la présidentielle (3,91%) pousse à la fusion dans l'UMP, validant la thèse de l'impossibilité d'une voie purement libérale autonome dans le système politique français.</p>
-        </div>
-        """, unsafe_allow_html=True)
+        self._graphique('evenements', vue.figures['evenements'])
+        vue.enregistrer_affichage(horodatages)
+        instrumentation.marquer('lignes_affichees', len(horodatages))
 
+    @st.fragment
+    @instrumentation.section('comparatif')
     def analyse_comparative_partis(self):
         """Analyse comparative avec les autres partis politiques"""
+        from figures import figures_comparatif
+        from moteur_comparatif import CRITERES
         st.markdown("### 🌍 Analyse Comparative dans le Paysage Politique")
-        
+
+        # Table typée, rangs et agrégats précalculés une fois ; seuls les N premiers partis filtrés sont tracés
+        with etape('moteur'):
+            moteur = self.moteur_comparatif
+        with st.expander("🔎 Filtres et classement", expanded=len(moteur.table) > 20):
+            col1, col2 = st.columns(2)
+            with col1:
+                doctrines = st.multiselect("Doctrines", moteur.doctrines, default=moteur.doctrines)
+                statut = st.radio("Statut", ['tous', 'actif', 'dissous'], horizontal=True,
+                                  format_func={'tous': 'Tous', 'actif': 'Actifs', 'dissous': 'Dissous'}.get)
+                periode = moteur.annees
+                if moteur.annees[0] < moteur.annees[1]:
+                    periode = st.slider("Actifs pendant la période", moteur.annees[0], moteur.annees[1], moteur.annees)
+            with col2:
+                critere = st.selectbox("Classer par", list(CRITERES), format_func=CRITERES.get)
+                top_n = st.slider("Nombre de partis affichés", 3, 50, 10)
+        filtres = {
+            'doctrines': None if len(doctrines) == len(moteur.doctrines) else doctrines,
+            'statut': None if statut == 'tous' else statut,
+            'periode': None if tuple(periode) == moteur.annees else periode,
+        }
+        with etape('filtrage'):
+            vue = moteur.top(critere, top_n, **filtres)
+            retenus = moteur.effectif(**filtres)
+        st.caption(f"{len(vue)} partis affichés sur {retenus} correspondant aux filtres ({len(moteur.table)} au total)")
+
+        with etape('index_ideologique'):
+            index = self.index_ideologique
+        with etape('figures'):
+            figures = figures_comparatif(vue, index.lignes(vue['Parti']))
+
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_membres = px.bar(self.comparaison_partis, x='Parti', y='Membres_max',
-                               title="Comparaison des Effectifs Maximum",
-                               color='Parti')
-            st.plotly_chart(fig_membres, use_container_width=True)
+            self._graphique('membres', figures['membres'])
             
         with col2:
-            fig_ministres = px.bar(self.comparaison_partis, x='Parti', y='Ministres_gouvernement',
-                                 title="Influence Gouvernementale (Nombre de Ministres)",
-                                 color='Parti')
-            st.plotly_chart(fig_ministres, use_container_width=True)
+            self._graphique('ministres', figures['ministres'])
+
+        st.markdown("#### Agrégats par doctrine")
+        st.dataframe(moteur.agregats_doctrines, hide_index=True, use_container_width=True)
 
         st.markdown("#### Positionnement Idéologique")
         # Carte politique simplifiée
-        positionnement = pd.DataFrame({
-            'Parti': ['Démocratie Libérale', 'RPR', 'UDF', 'PS', 'PCF', 'FN'],
-            'Economic': [9, 6, 5, 2, 1, 4],  # 10=libéral, 1=étatiste
-            'Societal': [6, 7, 5, 8, 9, 2],   # 10=progressiste, 1=conservateur
-            'Europe': [8, 6, 8, 7, 3, 1]      # 10=fédéraliste, 1=souverainiste
-        })
-        
-        fig_ideologie = px.scatter(positionnement, x='Economic', y='Societal', 
-                                 size=[20, 25, 20, 25, 20, 25], text='Parti',
-                                 title="Positionnement Idéologique des Partis",
-                                 labels={'Economic': 'Libéralisme Économique', 'Societal': 'Progressisme Sociétal'})
-        fig_ideologie.update_traces(textposition='top center')
-        st.plotly_chart(fig_ideologie, use_container_width=True)
-
-        st.markdown("""
-        <div class="insight-box">
-            <h4>🧠 Analyse Comparative</h4>
-            <p>Démocratie Libérale occupe une position <strong>unique dans l'espace politique français</strong> : ultra-libérale en économie mais modérément progressiste sur les questions sociétales. Ce positionnement le distingue nettement du RPR (gaulliste, plus étatiste) et de l'UDF (centriste, libéral modéré). Sa taille modeste mais son influence disproportionnée s'expliquent par la rareté de l'offre libérale pure et la qualité de ses cadres. La comparaison avec les partis de gouvernement établis montre les limites structurelles des micro-partis doctrinaux dans le système politique français.</p>
-        </div>
-        """, unsafe_allow_html=True)
+        self._graphique('ideologie', figures['ideologie'])
+        self.voisinage_ideologique(index, vue)
+
+        st.markdown(html_insight('comparatif'), unsafe_allow_html=True)
 
+    def voisinage_ideologique(self, index, vue):
+        """Partis les plus proches d'une référence, partis dans un rayon et groupes idéologiques"""
+        from figures import figure_voisinage
+        st.markdown("#### Voisinage Idéologique")
+        # Choix de la référence : tous les partis si la liste reste courte, sinon les partis affichés
+        proposes = index.noms if len(index) <= 1000 else index.lignes(vue['Parti'])['Parti']
+        candidats = list(dict.fromkeys((['Démocratie Libérale'] if 'Démocratie Libérale' in index else [])
+                                       + list(proposes)))
+        if not candidats:
+            st.info("Aucun parti positionné sur les axes idéologiques.")
+            return
+        with st.expander("🧭 Paramètres du voisinage", expanded=len(index) > 20):
+            col1, col2 = st.columns(2)
+            with col1:
+                reference = st.selectbox("Parti de référence", candidats)
+                k = st.slider("Nombre de plus proches voisins", 1, max(2, min(50, len(index) - 1)),
+                              max(1, min(5, len(index) - 1)))
+                rayon = st.slider("Rayon (distance idéologique)", 0.1, 10.0, 4.0, 0.1)
+            with col2:
+                n_groupes = st.slider("Nombre de groupes idéologiques", 2, max(3, min(12, len(index))),
+                                      max(2, min(4, len(index))))
+                axe_x = st.selectbox("Axe horizontal", index.axes, format_func=index.libelle)
+                axe_y = st.selectbox("Axe vertical", index.axes, index=min(1, len(index.axes) - 1),
+                                     format_func=index.libelle)
+        with etape('voisinage'):
+            voisins = index.plus_proches(reference, k)
+            dans_rayon = index.dans_rayon(reference, rayon, n_max=100)
+            n_rayon = index.effectif_rayon(reference, rayon)
+            groupes = index.groupes(n_groupes)
+        fig = self._memoriser(('voisinage', index.empreinte, reference, k, n_groupes, axe_x, axe_y),
+                              lambda: figure_voisinage(index, reference, voisins, groupes, axe_x, axe_y))
+        self._graphique('voisinage', fig)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**{len(voisins)} plus proches de {reference}**")
+            st.dataframe(voisins, hide_index=True, use_container_width=True)
+        with col2:
+            st.markdown(f"**{n_rayon} partis à moins de {rayon:g} de {reference}**")
+            st.dataframe(dans_rayon, hide_index=True, use_container_width=True)
+
+    @st.fragment
+    @instrumentation.section('scenarios')
     def simulation_scenarios_historiques(self):
         """Simulation de scénarios historiques alternatifs"""
+        from monte_carlo import EFFETS_LEADER, SCENARIOS
         st.markdown("### 🎲 Simulation de Scénarios Historiques Alternatifs")
         st.warning("⚠️ Analyse contrefactuelle à but pédagogique - Ces scénarios sont des hypothèses stratégiques")
         
@@ -425,9 +575,8 @@ class AnalyseDemocratieLiberale:
             ❌ Marginalisation électorale accrue
             ❌ Difficultés financières chroniques
             ❌ Départ des cadres vers l'UMP
-            
-            **Probabilité de succès :** 20%
             """)
+            hypotheses = SCENARIOS[scenario]
             
         elif scenario == "Alliance précoce avec l'UDF":
             st.markdown("#### Scénario : Fusion avec l'UDF plutôt qu'avec le RPR")
@@ -443,9 +592,8 @@ class AnalyseDemocratieLiberale:
             ✅ Positionnement plus lisible
             ❌ Conflits doctrinaux avec la gauche UDF
             ❌ Risque de dilution identitaire
-            
-            **Probabilité de succès :** 40%
             """)
+            hypotheses = SCENARIOS[scenario]
             
         elif scenario == "Leadership différent":
             st.markdown("#### Scénario : Leadership autre qu'Alain Madelin")
@@ -460,6 +608,7 @@ class AnalyseDemocratieLiberale:
                 - Relations avec le RPR : {"Améliorées" if nouveau_leader == "Raffarin" else "Stables"}
                 - Stratégie médiatique : {"Moins polarisante" if nouveau_leader == "Raffarin" else "Similaire"}
                 """)
+            hypotheses = EFFETS_LEADER[nouveau_leader]
                 
         elif scenario == "Contexte politique alternatif":
             st.markdown("#### Scénario : Contexte électoral différent en 2002")
@@ -481,36 +630,114 @@ class AnalyseDemocratieLiberale:
                 - Affaiblissement du leadership Madelin
                 - Renforcement des partisans de l'intégration
                 """)
+            hypotheses = replace(SCENARIOS[scenario], score_initial=score_madelin)
+
+        self._afficher_simulation(hypotheses)
+
+    @cached_property
+    def modele_simulation(self):
+        """Modèle dynamique estimé une fois sur les séries annuelles (ou repris d'un snapshot compilé)"""
+        if self.donnees.precalculs is not None:
+            return self.donnees.precalculs.modele()
+        from monte_carlo import estimer_modele
+        return estimer_modele(self.annees_chrono, self.evolution_membres, self.evolution_budget,
+                              self.influence_politique, self.resultats_electoraux)
+
+    def _afficher_simulation(self, hypotheses):
+        """Simulation Monte Carlo du scénario, affichée progressivement au fil des lots"""
+        from figures import figure_distribution_score
+        from monte_carlo import simuler
+        st.markdown("#### 📊 Simulation Monte Carlo")
+        with st.expander("⚙️ Paramètres de simulation"):
+            n_trajectoires = st.select_slider("Nombre de trajectoires", [10_000, 100_000, 1_000_000, 4_000_000],
+                                              value=1_000_000)
+            graine = st.number_input("Graine aléatoire", 0, 2**31 - 1, 42)
+            horizon = st.slider("Horizon (années après 2002)", 1, 15, 5)
+            seuil_membres = st.number_input("Membres minimum d'un parti viable", 1000, 100000, 10000, step=1000)
+        hypotheses = replace(hypotheses, horizon=horizon, seuil_membres=seuil_membres)
+
+        col1, col2, col3 = st.columns(3)
+        probabilite, score_median, membres_median = col1.empty(), col2.empty(), col3.empty()
+        graphique, progression = st.empty(), st.empty()
+        with etape('modele'):
+            modele = self.modele_simulation
+        for agregat in simuler(modele, hypotheses, n_trajectoires, graine=graine):
+            bas, haut = agregat.intervalle()
+            probabilite.metric("Probabilité de succès", f"{agregat.probabilite:.1%}",
+                               help=f"Intervalle de confiance à 95 % : {bas:.1%} - {haut:.1%}")
+            score_median.metric(f"Score médian en {2002 + horizon}", f"{agregat.quantile_score(0.5):.1f} %")
+            membres_median.metric(f"Membres médians en {2002 + horizon}", f"{agregat.quantile_membres(0.5):,.0f}")
+
+            self._graphique('distribution_score',
+                            figure_distribution_score(agregat, hypotheses.seuil_electoral, 2002 + horizon),
+                            conteneur=graphique)
+            progression.caption(f"{agregat.n:,} / {agregat.n_total:,} trajectoires simulées "
+                                f"- IC 95 % : [{bas:.1%} ; {haut:.1%}]")
 
     def run(self):
         """Fonction principale pour exécuter le dashboard"""
-        self.display_header()
+        with etape('entete'):
+            self.display_header()
+        instrumentation.marquer('premier_affichage_s', time.perf_counter() - DEBUT_SCRIPT)
         
-        # Onglets pour l'analyse
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        # Onglets pour l'analyse : seul l'onglet sélectionné est calculé, et chaque section
+        # est un fragment qui se ré-exécute seule lorsque l'un de ses widgets change
+        onglets = st.tabs([
             "🔗 Réseau d'Influence", 
             "📈 Performance", 
             "⏳ Chronologie Stratégique",
             "🌍 Analyse Comparative", 
             "🎲 Scénarios Alternatifs"
-        ])
-        
-        with tab1:
-            self.analyse_reseau_influence()
-        
-        with tab2:
-            self.analyse_performance_politique()
-        
-        with tab3:
-            self.analyse_chronologie_strategique()
-        
-        with tab4:
-            self.analyse_comparative_partis()
+        ], key="onglet_actif", on_change="rerun")
+        sections = [
+            self.analyse_reseau_influence,
+            self.analyse_performance_politique,
+            self.analyse_chronologie_strategique,
+            self.analyse_comparative_partis,
+            self.simulation_scenarios_historiques
+        ]
         
-        with tab5:
-            self.simulation_scenarios_historiques()
+        for onglet, section in zip(onglets, sections):
+            if onglet.open:
+                with onglet:
+                    section()
+
+@st.cache_resource(max_entries=4)
+def obtenir_analyseur(empreinte, _donnees):
+    """Analyseur partagé par toutes les sessions, reconstruit seulement si les données changent"""
+    return AnalyseDemocratieLiberale(_donnees)
+
+def afficher_instrumentation(n_max=20):
+    """Panneau latéral de débogage : temps et tailles des dernières exécutions de la session"""
+    from datetime import datetime
+
+    import pandas as pd
+
+    from cache_figures import statistiques_cache
+    with st.sidebar.expander("⏱️ Instrumentation", expanded=False):
+        cache = statistiques_cache()
+        st.caption(f"Cache de figures : {cache['succes_memoire']} succès mémoire, {cache['succes_disque']} disque, "
+                   f"{cache['echecs']} échecs ({cache['taux_succes']:.0%}), {cache['entrees']} entrées, "
+                   f"{cache['octets'] / 1e6:.1f} Mo, {cache['evictions']} évictions")
+        n = st.slider("Exécutions affichées", 1, n_max, 5, key="_instrumentation_n")
+        for e in instrumentation.dernieres_executions(n, session=st.session_state['_id_session']):
+            st.markdown(f"**{e['nom']}** - {datetime.fromtimestamp(e['horodatage']):%H:%M:%S} - "
+                        f"{1000 * e['duree_s']:.0f} ms ({1000 * e['cpu_s']:.0f} ms CPU)")
+            if 'premier_affichage_s' in e['marques']:
+                st.caption(f"Premier affichage après {1000 * e['marques']['premier_affichage_s']:.0f} ms")
+            st.dataframe(pd.DataFrame(e['etapes']).sort_values('temps_s', ascending=False),
+                         hide_index=True, use_container_width=True)
+            if e['figures']:
+                st.dataframe(pd.DataFrame(e['figures']), hide_index=True, use_container_width=True)
 
 # Point d'entrée principal
 if __name__ == "__main__":
-    analyseur = AnalyseDemocratieLiberale()
-    analyseur.run()
\ No newline at end of file
+    if instrumentation.ACTIF:
+        st.session_state.setdefault('_id_session', uuid.uuid4().hex)
+        instrumentation.definir_session(lambda: st.session_state.get('_id_session'))
+    with execution('script'):
+        donnees = obtenir_donnees()
+        analyseur = obtenir_analyseur(donnees.empreinte, donnees)
+        analyseur.run()
+    if instrumentation.ACTIF:
+        afficher_instrumentation()
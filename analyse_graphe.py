@@ -0,0 +1,215 @@
+# analyse_graphe.py
+"""Moteur d'analyse du réseau d'influence : graphe compact (CSR) et centralités exactes ou échantillonnées."""
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra, shortest_path
+
+from cache_calculs import CacheLRU
+
+# Au-delà de ce volume de travail (noeuds x arcs), le mode 'auto' passe à l'échantillonnage
+SEUIL_EXACT = 2e7
+TAILLE_LOT = 32
+
+
+class GrapheCSR:
+    """Graphe orienté pondéré stocké en lignes compressées (indptr / indices / poids)"""
+
+    def __init__(self, noeuds, sources, cibles, poids, types=None):
+        self.noeuds = np.asarray(noeuds, dtype=object)
+        self.n = len(self.noeuds)
+        ordre = np.lexsort((cibles, sources))
+        self.sources = np.asarray(sources, dtype=np.int64)[ordre]
+        self.indices = np.asarray(cibles, dtype=np.int64)[ordre]
+        self.poids = np.asarray(poids, dtype=np.float64)[ordre]
+        self.types = None if types is None else np.asarray(types, dtype=object)[ordre]
+        self.m = len(self.indices)
+        self.indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=self.n), out=self.indptr[1:])
+        self._empreinte = None
+
+    @classmethod
+    def depuis_relations(cls, relations):
+        """Construit le graphe depuis des relations {source, target, poids, type} (liste ou DataFrame)"""
+        df = relations if isinstance(relations, pd.DataFrame) else pd.DataFrame(list(relations))
+        # Comme nx.DiGraph.add_edge : un arc répété remplace le précédent
+        df = df.drop_duplicates(subset=['source', 'target'], keep='last')
+        # Ordre des noeuds = ordre de première apparition, comme networkx
+        codes, noeuds = pd.factorize(np.column_stack([df['source'].to_numpy(), df['target'].to_numpy()]).ravel())
+        codes = codes.reshape(-1, 2)
+        types = df['type'].to_numpy() if 'type' in df else None
+        return cls(noeuds, codes[:, 0], codes[:, 1], df['poids'].to_numpy(dtype=np.float64), types)
+
+    @property
+    def empreinte(self):
+        """Hash du contenu du graphe, utilisé comme clé de cache"""
+        if self._empreinte is None:
+            h = hashlib.sha256()
+            h.update('\x1f'.join(map(str, self.noeuds)).encode())
+            for tableau in (self.indptr, self.indices, self.poids):
+                h.update(np.ascontiguousarray(tableau).tobytes())
+            self._empreinte = h.hexdigest()
+        return self._empreinte
+
+    def matrice(self):
+        """Matrice d'adjacence creuse scipy (poids en valeurs)"""
+        return csr_matrix((self.poids, self.indices, self.indptr), shape=(self.n, self.n))
+
+    def degres(self):
+        """Degrés sortants et entrants"""
+        return np.diff(self.indptr), np.bincount(self.indices, minlength=self.n)
+
+    def vers_networkx(self):
+        """Conversion vers nx.DiGraph pour les algorithmes non vectorisés (layout)"""
+        import networkx as nx
+        G = nx.DiGraph()
+        G.add_nodes_from(self.noeuds)
+        types = self.types if self.types is not None else [None] * self.m
+        G.add_edges_from((u, v, {'weight': w, 'type': t}) for u, v, w, t
+                         in zip(self.noeuds[self.sources], self.noeuds[self.indices], self.poids, types))
+        return G
+
+
+@dataclass
+class ResultatCentralite:
+    """Table de centralité et métadonnées du calcul"""
+    table: pd.DataFrame
+    mode: str
+    sources_utilisees: int
+    n: int
+    m: int
+    epsilon: float
+    duree_s: float
+
+
+def dependances_source(graphe, d, s, tol=1e-9):
+    """Dépendances de Brandes d'une source (contribution à l'intermédiarité), niveau de distance par niveau"""
+    src, dst, w = graphe.sources, graphe.indices, graphe.poids
+    delta = np.zeros(graphe.n)
+    du, dv = d[src], d[dst]
+    with np.errstate(invalid='ignore'):
+        sur_dag = np.isfinite(du) & (np.abs(du + w - dv) <= tol)
+    eu, ev = src[sur_dag], dst[sur_dag]
+    if len(eu) == 0:
+        return delta
+    ordre = np.argsort(d[ev], kind='stable')
+    eu, ev = eu[ordre], ev[ordre]
+    _, debuts = np.unique(d[ev], return_index=True)
+    bornes = np.append(debuts, len(ev))
+
+    # Nombre de plus courts chemins, niveau par niveau (les prédécesseurs sont déjà finaux)
+    sigma = np.zeros(graphe.n)
+    sigma[s] = 1.0
+    for a, b in zip(bornes[:-1], bornes[1:]):
+        np.add.at(sigma, ev[a:b], sigma[eu[a:b]])
+
+    # Dépendances, des niveaux les plus lointains vers la source
+    for a, b in zip(bornes[-2::-1], bornes[:0:-1]):
+        u, v = eu[a:b], ev[a:b]
+        np.add.at(delta, u, sigma[u] / sigma[v] * (1.0 + delta[v]))
+    delta[s] = 0.0
+    return delta
+
+
+def _accumuler_brandes(graphe, distances, sources, intermediarite):
+    """Accumulation de Brandes vectorisée par niveaux de distance, pour un lot de sources"""
+    for i, s in enumerate(sources):
+        intermediarite += dependances_source(graphe, distances[i], s)
+
+
+def accumuler_lot(graphe, A, sources, intermediarite, atteints, somme_dist):
+    """Contributions brutes (non normalisées) d'un lot de sources aux centralités, ajoutées sur place"""
+    _accumuler_brandes(graphe, dijkstra(A, directed=True, indices=sources), sources, intermediarite)
+    # Proximité entrante (non pondérée) : d(s, v) pour chaque v atteint depuis s
+    sauts = shortest_path(A, method='D', directed=True, unweighted=True, indices=sources)
+    accessibles = np.isfinite(sauts) & (sauts > 0)
+    atteints += accessibles.sum(axis=0)
+    somme_dist += np.where(accessibles, sauts, 0).sum(axis=0)
+
+
+def epsilon_hoeffding(n, k, delta=0.1):
+    """Erreur absolue maximale (avec probabilité 1 - delta) pour k sources échantillonnées"""
+    if k <= 0:
+        return 1.0
+    return math.sqrt(math.log(2 * max(n, 1) / delta) / (2 * k))
+
+
+def sources_pour_epsilon(n, epsilon, delta=0.1):
+    """Nombre de sources à échantillonner pour garantir l'erreur epsilon"""
+    return int(math.ceil(math.log(2 * max(n, 1) / delta) / (2 * epsilon ** 2)))
+
+
+def calculer_centralites(graphe, mode='auto', epsilon=0.05, delta=0.1, budget_temps_s=None, graine=42):
+    """Centralités de degré, d'intermédiarité (pondérée) et de proximité, comme networkx.
+
+    mode : 'exact', 'echantillonne' ou 'auto'. En mode échantillonné, les sources sont tirées
+    jusqu'à atteindre l'erreur epsilon ou épuiser budget_temps_s (secondes).
+    """
+    debut = time.perf_counter()
+    n, m = graphe.n, graphe.m
+    if mode == 'auto':
+        mode = 'exact' if n * m <= SEUIL_EXACT else 'echantillonne'
+    if mode == 'exact':
+        toutes = np.arange(n)
+    else:
+        k = min(n, sources_pour_epsilon(n, epsilon, delta))
+        toutes = np.random.default_rng(graine).permutation(n)[:k]
+
+    sortant, entrant = graphe.degres()
+    degre = (sortant + entrant) / max(n - 1, 1)
+
+    A = graphe.matrice()
+    intermediarite = np.zeros(n)
+    atteints = np.zeros(n)
+    somme_dist = np.zeros(n)
+    traitees = 0
+    for lot in range(0, len(toutes), TAILLE_LOT):
+        sources = toutes[lot:lot + TAILLE_LOT]
+        accumuler_lot(graphe, A, sources, intermediarite, atteints, somme_dist)
+        traitees += len(sources)
+        # Arrêt anticipé si le lot suivant dépasserait le budget de temps
+        ecoule = time.perf_counter() - debut
+        if budget_temps_s is not None and ecoule * (traitees + len(sources)) / traitees > budget_temps_s:
+            break
+
+    # Mise à l'échelle : normalisation networkx puis extrapolation n / k si échantillonné
+    echelle = n / traitees if traitees else 0.0
+    if n > 2:
+        intermediarite *= echelle / ((n - 1) * (n - 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proximite = np.where(somme_dist > 0,
+                             atteints ** 2 * echelle / (max(n - 1, 1) * somme_dist), 0.0)
+
+    table = pd.DataFrame({
+        'Acteur': graphe.noeuds,
+        'Influence Directe': degre,
+        'Contrôle des Réseaux': intermediarite,
+        'Accessibilité Stratégique': proximite
+    }).sort_values(by='Contrôle des Réseaux', ascending=False, kind='stable')
+    return ResultatCentralite(
+        table=table, mode=mode, sources_utilisees=traitees, n=n, m=m,
+        epsilon=0.0 if traitees == n else epsilon_hoeffding(n, traitees, delta),
+        duree_s=time.perf_counter() - debut
+    )
+
+
+_CACHE = CacheLRU(capacite=16)
+
+
+def _cle(graphe, parametres):
+    return graphe.empreinte, tuple(sorted(parametres.items()))
+
+
+def centralites_en_cache(graphe, **parametres):
+    """Centralités du graphe, calculées une seule fois par processus pour un contenu donné"""
+    return _CACHE.obtenir(_cle(graphe, parametres), lambda: calculer_centralites(graphe, **parametres))
+
+
+def amorcer_centralites(graphe, resultat, **parametres):
+    """Place un résultat précalculé dans le cache du processus"""
+    _CACHE.amorcer(_cle(graphe, parametres), resultat)
@@ -0,0 +1,323 @@
+# api_analytique.py
+"""Service HTTP/JSON local exposant les analyses du dashboard, avec les mêmes fonctions de calcul.
+
+Points d'accès (GET, paramètres dans la chaîne de requête) :
+    /sante                    source et empreinte des données
+    /centralites              mode (auto, exact, echantillonne), epsilon, budget_temps_s
+    /efficacite               coût par membre et influence pour 1000 membres
+    /comparatif               critere, n, doctrines (séparées par des virgules), statut, debut, fin
+    /comparatif/doctrines     agrégats par doctrine
+    /scenarios                scenario ou leader, trajectoires, graine, horizon, seuil_membres, score_initial
+    /chemins                  source, cible, oriente, sauts : plus court chemin et voisinage dans le réseau
+    /statistiques             compteurs du cache de résultats
+POST /lot avec {"requetes": [{"chemin": "/centralites", "parametres": {...}}, ...]} : réponses dans
+l'ordre des requêtes, calculées en parallèle et servies par le même cache.
+
+Les réponses sont gardées sérialisées, indexées par point d'accès, empreinte des données et
+paramètres normalisés (valeurs par défaut comprises). Des requêtes identiques simultanées
+attendent le calcul en cours au lieu de le relancer.
+
+    python api_analytique.py --port 8766
+"""
+import argparse
+import json
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cache_calculs import CacheLRU
+from sources_donnees import obtenir_donnees
+
+PORT_DEFAUT = 8766
+TRAJECTOIRES_MAX = 4_000_000
+HORIZON_MAX = 50
+REQUETES_LOT_MAX = 256
+
+
+class ErreurRequete(ValueError):
+    """Paramètre absent, inconnu ou hors bornes (réponse 400)"""
+
+
+class Analyses:
+    """Objets de calcul d'un jeu de données : graphe, moteur comparatif et modèle de simulation"""
+
+    def __init__(self, donnees):
+        from analyse_graphe import GrapheCSR
+        from monte_carlo import estimer_modele
+        from moteur_comparatif import MoteurComparatif
+        self.donnees = donnees
+        if donnees.precalculs is not None:
+            self.graphe, self.modele = donnees.precalculs.graphe(), donnees.precalculs.modele()
+        else:
+            self.graphe = GrapheCSR.depuis_relations(donnees.relations_politiques)
+            self.modele = estimer_modele(donnees.annees_chrono, donnees.evolution_membres, donnees.evolution_budget,
+                                         donnees.influence_politique, donnees.resultats_electoraux)
+        self.moteur = MoteurComparatif(donnees.comparaison_partis)
+
+
+_VERROU = threading.Lock()
+_ANALYSES = {}
+_CACHE = CacheLRU(capacite=256)
+
+
+def analyses_courantes():
+    """Analyses des données courantes du processus, reconstruites seulement si les données changent"""
+    donnees = obtenir_donnees()
+    with _VERROU:
+        if donnees.empreinte not in _ANALYSES:
+            _ANALYSES.clear()
+            _ANALYSES[donnees.empreinte] = Analyses(donnees)
+        return _ANALYSES[donnees.empreinte]
+
+
+def _table(table):
+    """DataFrame en liste d'objets JSON (dates ISO, valeurs manquantes à null)"""
+    return json.loads(table.to_json(orient='records', date_format='iso', force_ascii=False))
+
+
+def _centralites(analyses, mode, epsilon, budget_temps_s):
+    from analyse_graphe import centralites_en_cache
+    if mode not in ('auto', 'exact', 'echantillonne'):
+        raise ErreurRequete(f"mode inconnu : {mode}")
+    resultat = centralites_en_cache(analyses.graphe, mode=mode, epsilon=epsilon, budget_temps_s=budget_temps_s)
+    return {'mode': resultat.mode, 'sources_utilisees': resultat.sources_utilisees, 'n': resultat.n,
+            'm': resultat.m, 'epsilon': resultat.epsilon, 'duree_s': resultat.duree_s,
+            'table': _table(resultat.table)}
+
+
+def _efficacite(analyses, parti):
+    from metriques_partis import metriques_en_cache
+    from sources_donnees import PARTI_REFERENCE
+    donnees = analyses.donnees
+    synthese, annuelles = metriques_en_cache(donnees.series_partis, donnees.comparaison_partis).parti(
+        parti or PARTI_REFERENCE)
+    if synthese.empty:
+        raise ErreurRequete(f"parti inconnu : {parti}")
+    return {'synthese': _table(synthese)[0], 'annuelles': _table(annuelles)}
+
+
+def _comparatif(analyses, critere, n, doctrines, statut, debut, fin):
+    from moteur_comparatif import CRITERES
+    if critere not in CRITERES:
+        raise ErreurRequete(f"critère inconnu : {critere} (attendu : {', '.join(CRITERES)})")
+    if statut not in (None, 'actif', 'dissous'):
+        raise ErreurRequete(f"statut inconnu : {statut}")
+    if n < 1:
+        raise ErreurRequete("n doit être au moins 1")
+    filtres = {'doctrines': doctrines or None, 'statut': statut,
+               'periode': None if debut is None and fin is None else (debut or -10_000, fin or 10_000)}
+    return {'effectif': analyses.moteur.effectif(**filtres),
+            'partis': _table(analyses.moteur.top(critere, n, **filtres))}
+
+
+def _doctrines(analyses):
+    return {'doctrines': _table(analyses.moteur.agregats_doctrines)}
+
+
+def _scenarios(analyses, scenario, leader, trajectoires, graine, horizon, seuil_membres, score_initial):
+    from dataclasses import replace
+
+    from monte_carlo import EFFETS_LEADER, SCENARIOS, simuler
+    if leader is not None:
+        if leader not in EFFETS_LEADER:
+            raise ErreurRequete(f"leader inconnu : {leader}")
+        hypotheses = EFFETS_LEADER[leader]
+    elif scenario in SCENARIOS:
+        hypotheses = SCENARIOS[scenario]
+    else:
+        raise ErreurRequete(f"scénario inconnu : {scenario}")
+    if not 0 < trajectoires <= TRAJECTOIRES_MAX:
+        raise ErreurRequete(f"trajectoires doit être compris entre 1 et {TRAJECTOIRES_MAX}")
+    if not 1 <= horizon <= HORIZON_MAX:
+        raise ErreurRequete(f"horizon doit être compris entre 1 et {HORIZON_MAX}")
+    hypotheses = replace(hypotheses, horizon=horizon, seuil_membres=seuil_membres,
+                         **({'score_initial': score_initial} if score_initial is not None else {}))
+    for agregat in simuler(analyses.modele, hypotheses, trajectoires, graine=graine):
+        pass
+    bas, haut = agregat.intervalle()
+    return {'trajectoires': agregat.n, 'probabilite': agregat.probabilite, 'intervalle_95': [bas, haut],
+            'score_median': agregat.quantile_score(0.5), 'membres_median': agregat.quantile_membres(0.5),
+            'influence_moyenne': agregat.influence_moyenne}
+
+
+def _chemins(analyses, source, cible, oriente, sauts):
+    from index_chemins import SAUTS_MAX, index_chemins_en_cache
+    index = index_chemins_en_cache(analyses.graphe)
+    for acteur in (source, cible):
+        if acteur is None or acteur not in index.positions:
+            raise ErreurRequete(f"acteur inconnu : {acteur}")
+    if not 1 <= sauts <= SAUTS_MAX:
+        raise ErreurRequete(f"sauts doit être compris entre 1 et {SAUTS_MAX}")
+    chemin = index.chemin(source, cible, oriente=oriente)
+    if chemin is not None:
+        chemin = {'acteurs': [{'acteur': acteur, 'communaute': int(index.communautes[index.positions[acteur]])}
+                              for acteur in chemin.noeuds],
+                  'longueur': chemin.longueur, 'relations': chemin.sauts}
+    return {'chemin': chemin,
+            # Borne infinie (aucun chemin possible) rendue par null
+            'bornes': [None if borne == float('inf') else borne for borne in index.bornes(source, cible, oriente)],
+            'communautes': {acteur: int(index.communautes[index.positions[acteur]]) for acteur in (source, cible)},
+            'voisinage': _table(index.voisinage(source, sauts))}
+
+
+def _booleen(valeur):
+    if isinstance(valeur, bool):
+        return valeur
+    if str(valeur).lower() not in ('1', '0', 'true', 'false', 'oui', 'non'):
+        raise ValueError(valeur)
+    return str(valeur).lower() in ('1', 'true', 'oui')
+
+
+def _reel(valeur):
+    """Nombre fini : inf et nan sont refusés comme les valeurs non numériques"""
+    reel = float(valeur)
+    if not math.isfinite(reel):
+        raise ValueError(valeur)
+    return reel
+
+
+def _liste(valeur):
+    valeurs = valeur if isinstance(valeur, (list, tuple)) else [v for v in str(valeur).split(',') if v]
+    return tuple(sorted(map(str, valeurs)))
+
+
+# Chemin -> (fonction, {paramètre: (conversion, valeur par défaut)})
+POINTS_ACCES = {
+    '/centralites': (_centralites, {'mode': (str, 'auto'), 'epsilon': (_reel, 0.05), 'budget_temps_s': (_reel, 0.8)}),
+    '/efficacite': (_efficacite, {'parti': (str, None)}),
+    '/comparatif': (_comparatif, {'critere': (str, 'Membres_max'), 'n': (int, 10), 'doctrines': (_liste, ()),
+                                  'statut': (str, None), 'debut': (int, None), 'fin': (int, None)}),
+    '/comparatif/doctrines': (_doctrines, {}),
+    '/scenarios': (_scenarios, {'scenario': (str, "Stratégie d'autonomie prolongée"), 'leader': (str, None),
+                                'trajectoires': (int, 100_000), 'graine': (int, 42), 'horizon': (int, 5),
+                                'seuil_membres': (_reel, 10_000), 'score_initial': (_reel, None)}),
+    '/chemins': (_chemins, {'source': (str, None), 'cible': (str, None), 'oriente': (_booleen, False),
+                            'sauts': (int, 1)}),
+}
+
+
+def normaliser(chemin, parametres):
+    """Paramètres typés et complétés par les valeurs par défaut (ErreurRequete si invalides)"""
+    _, attendus = POINTS_ACCES[chemin]
+    inconnus = set(parametres) - set(attendus)
+    if inconnus:
+        raise ErreurRequete(f"paramètres inconnus : {', '.join(sorted(inconnus))}")
+    normalises = {}
+    for nom, (conversion, defaut) in attendus.items():
+        valeur = parametres.get(nom)
+        try:
+            normalises[nom] = defaut if valeur is None or valeur == '' else conversion(valeur)
+        except (TypeError, ValueError):
+            raise ErreurRequete(f"valeur invalide pour {nom} : {valeur!r}") from None
+    return normalises
+
+
+def _json(objet):
+    return json.dumps(objet, ensure_ascii=False, allow_nan=False, default=float).encode()
+
+
+def repondre(chemin, parametres):
+    """Code HTTP et corps JSON de la réponse à une requête (servie par le cache si possible)"""
+    if chemin == '/sante':
+        donnees = obtenir_donnees()
+        return 200, _json({'statut': 'ok', 'empreinte': donnees.empreinte, 'points_acces': list(POINTS_ACCES)})
+    if chemin == '/statistiques':
+        return 200, _json(_CACHE.statistiques())
+    if chemin not in POINTS_ACCES:
+        return 404, _json({'erreur': f"point d'accès inconnu : {chemin}"})
+    try:
+        normalises = normaliser(chemin, parametres)
+        analyses = analyses_courantes()
+        cle = (chemin, analyses.donnees.empreinte, tuple(sorted(normalises.items())))
+        fonction = POINTS_ACCES[chemin][0]
+        return 200, _CACHE.obtenir(cle, lambda: _json(fonction(analyses, **normalises)))
+    except ErreurRequete as exc:
+        return 400, _json({'erreur': str(exc)})
+    except Exception as exc:
+        return 500, _json({'erreur': f"{type(exc).__name__} : {exc}"})
+
+
+_EXECUTEUR_LOT = ThreadPoolExecutor(max_workers=8, thread_name_prefix='api-lot')
+
+
+def repondre_lot(requetes):
+    """Réponses d'un lot de requêtes, calculées en parallèle : [{"statut", "resultat"}, ...]"""
+    if not isinstance(requetes, list) or len(requetes) > REQUETES_LOT_MAX:
+        return 400, _json({'erreur': f"'requetes' doit être une liste d'au plus {REQUETES_LOT_MAX} éléments"})
+    # Validées avant soumission : une requête mal formée ferait échouer son fil et couperait la connexion
+    if not all(isinstance(r, dict) and isinstance(r.get('chemin'), str)
+               and isinstance(r.get('parametres') or {}, dict) for r in requetes):
+        return 400, _json({'erreur': "chaque requête doit être un objet avec un 'chemin' texte "
+                                     "et des 'parametres' objet"})
+    travaux = [_EXECUTEUR_LOT.submit(repondre, r['chemin'], r.get('parametres') or {}) for r in requetes]
+    # Les corps déjà sérialisés (cache) sont assemblés sans être décodés
+    corps = b','.join(b'{"statut":%d,"resultat":%s}' % travail.result() for travail in travaux)
+    return 200, b'[' + corps + b']'
+
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    # HTTP/1.1 : connexions persistantes, indispensables pour la mesure en charge
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AnalyseDL/1.0'
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK retardé du client
+    # ajoute ~40 ms à chaque réponse d'une connexion persistante
+    disable_nagle_algorithm = True
+
+    def _envoyer(self, statut, corps):
+        self.send_response(statut)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        # La ligne de requête est lue en latin-1 : un client qui n'encode pas l'UTF-8 en %XX reste lisible
+        url = urlsplit(self.path.encode('latin-1').decode('utf-8', 'replace'))
+        parametres = {nom: valeurs[-1] for nom, valeurs in parse_qs(url.query).items()}
+        self._envoyer(*repondre(url.path.rstrip('/') or '/', parametres))
+
+    def do_POST(self):
+        corps = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlsplit(self.path).path.rstrip('/') != '/lot':
+            self._envoyer(404, _json({'erreur': f"point d'accès inconnu : {self.path}"}))
+            return
+        try:
+            requetes = json.loads(corps)['requetes']
+        except (ValueError, KeyError, TypeError):
+            self._envoyer(400, _json({'erreur': "corps attendu : {\"requetes\": [...]}"}))
+            return
+        self._envoyer(*repondre_lot(requetes))
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête : il coûterait plus cher que les réponses servies depuis le cache
+        pass
+
+
+class ServeurAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def creer_serveur(hote='127.0.0.1', port=PORT_DEFAUT):
+    return ServeurAPI((hote, port), GestionnaireAPI)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP/JSON local des analyses du dashboard")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT_DEFAUT)
+    args = parser.parse_args()
+    serveur = creer_serveur(args.hote, args.port)
+    analyses_courantes()
+    print(f"Service prêt sur http://{args.hote}:{serveur.server_address[1]}", flush=True)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+
+
+if __name__ == '__main__':
+    main()
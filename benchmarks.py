@@ -0,0 +1,399 @@
+# benchmarks.py
+"""Banc d'essai des étapes de calcul et de rendu du dashboard sur données synthétiques.
+
+Exemples :
+    python benchmarks.py --tailles 10 1000 100000 --enregistrer-reference
+    python benchmarks.py --tailles 10 1000 100000          # compare à la référence enregistrée
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from analyse_graphe import SEUIL_EXACT, GrapheCSR, calculer_centralites
+from donnees_synthetiques import donnees_synthetiques, generer_flux
+from figures import figure_centralites_temporelles, figures_chronologie, figures_comparatif, figures_performance
+from flux_evenements import FluxEvenements, SourceJSONL, VueChronologie
+from index_chemins import IndexChemins
+from index_ideologique import IndexIdeologique, regrouper
+from metriques_partis import MetriquesPartis
+from moteur_comparatif import MoteurComparatif
+from rendu_reseau import figure_ego, figure_reseau, figure_reseau_anime, positions_en_tableau
+from reseau_temporel import GrapheTemporel, centralites_temporelles, ecart_fenetre
+from series_temporelles import StoreSeries
+from sources_donnees import PARTI_REFERENCE, obtenir_donnees
+from statistiques_mesures import TOLERANCE_DEFAUT, regressions
+from store_layout import StoreLayout
+
+REFERENCE_DEFAUT = 'benchmarks_reference.json'
+# Fenêtres trimestrielles glissantes sur un an
+PARAMETRES_TEMPOREL = {'pas': 'QS', 'largeur': 4}
+# Requêtes « comment X est-il relié à Y ? » mesurées, et relations modifiées pour la mise à jour de l'index
+PAIRES_CHEMINS = 100
+RELATIONS_MODIFIEES = 10
+TAILLES_DEFAUT = (10, 1000, 100_000)
+# En dessous de ces écarts absolus, une variation est considérée comme du bruit de mesure
+BRUIT_TEMPS_S = 0.005
+BRUIT_MEMOIRE_MO = 1.0
+MODULES_LOURDS = ('pandas', 'numpy', 'scipy', 'networkx', 'plotly.express')
+
+# Exécuté dans un interpréteur neuf : script Dashboard en mode « bare » (seul l'en-tête est rendu)
+_SCRIPT_DEMARRAGE = """
+import json, runpy, sys, time
+debut = time.perf_counter()
+import streamlit  # déjà chargé par le serveur en production
+import_streamlit_s = time.perf_counter() - debut
+import instrumentation
+marquer, modules = instrumentation.marquer, []
+def marquer_modules(nom, valeur):
+    # Modules lourds déjà chargés au moment du premier affichage
+    modules.extend(m for m in %r if m in sys.modules)
+    marquer(nom, valeur)
+instrumentation.marquer = marquer_modules
+runpy.run_path('Dashboard.py', run_name='__main__')
+marques = instrumentation.dernieres_executions(1)[0]['marques']
+print(json.dumps({'import_streamlit_s': import_streamlit_s, 'script_s': time.perf_counter() - debut - import_streamlit_s,
+                  'premier_affichage_s': marques['premier_affichage_s'], 'modules_charges': modules}))
+""" % (MODULES_LOURDS,)
+
+
+def _analyseur(ctx):
+    # Import différé : Dashboard importe Streamlit (exécuté ici en mode « bare »)
+    from Dashboard import AnalyseDemocratieLiberale
+    return AnalyseDemocratieLiberale(ctx['donnees'])
+
+
+def _layout(ctx):
+    with tempfile.TemporaryDirectory() as repertoire:
+        return StoreLayout(repertoire).obtenir(ctx['graphe'])
+
+
+def _figure_reseau(ctx):
+    graphe, resultat = ctx['graphe'], ctx['centralites']
+    intermediarite = resultat.table.set_index('Acteur')['Contrôle des Réseaux'].reindex(graphe.noeuds).to_numpy()
+    return figure_reseau(graphe, positions_en_tableau(graphe, ctx['layout']), intermediarite).figure
+
+
+def _verifier_temporel(ctx):
+    # Fenêtre la plus chargée parmi celles calculées exactement : mêmes centralités que le graphe
+    # statique de ses relations actives
+    bilans = ctx['serie'].fenetres
+    exactes = bilans.index[(bilans['Relations'] > 0) & (bilans['Acteurs'] * bilans['Relations'] <= SEUIL_EXACT)]
+    if len(exactes) == 0:
+        return None
+    fenetre = bilans.loc[exactes, 'Relations'].idxmax()
+    ecart = ecart_fenetre(ctx['temporel'], ctx['serie'], fenetre)
+    if ecart > 1e-9:
+        raise ValueError(f"Fenêtre {fenetre} : écart de {ecart:.3g} avec calculer_centralites")
+    return ecart
+
+
+def _positions_temporel(ctx):
+    return np.random.default_rng(0).random((ctx['temporel'].n, 2))
+
+
+def _lignes_flux(ctx):
+    return [json.dumps(ligne, ensure_ascii=False).encode() for ligne in generer_flux(ctx['taille'])]
+
+
+def _ingerer(ctx):
+    flux = FluxEvenements(SourceJSONL(os.devnull))
+    flux.ingerer(ctx['lignes_flux'])
+    return flux
+
+
+def _actualiser_chronologie(ctx):
+    # Vue neuve (copie des figures de base) mise à jour avec tout le contenu du tampon
+    donnees = obtenir_donnees()
+    vue = VueChronologie(ctx['flux'], {nom: go.Figure(fig) for nom, fig in ctx['figures_chronologie'].items()},
+                         donnees.annees_chrono, donnees.evolution_membres, donnees.evolution_budget,
+                         donnees.influence_politique, len(donnees.evenements_cles))
+    return vue.actualiser()
+
+
+def _reconstruire_chronologie(ctx, flux=True):
+    # Référence : reconstruction complète des figures à partir des données de base (et du tampon)
+    donnees = obtenir_donnees()
+    evenements = list(donnees.evenements_cles)
+    if flux:
+        tampon = pd.DataFrame(ctx['flux'].evenements.colonnes())
+        evenements += tampon[['annee', 'evenement', 'impact']].to_dict('records')
+    return figures_chronologie.__wrapped__(donnees.series_chronologiques.requete(), evenements)
+
+
+def _store_series(ctx):
+    donnees = ctx['donnees']
+    return StoreSeries.depuis_colonnes(donnees.annees_chrono, {'membres': donnees.evolution_membres,
+                                                               'budget_millions': donnees.evolution_budget,
+                                                               'influence': donnees.influence_politique})
+
+
+def _requete_zoom(ctx):
+    # Dixième central de la période : nouvelle requête à pleine résolution locale
+    debut, fin = (int(t) for t in ctx['store_series'].periode())
+    return ctx['store_series'].requete(debut + 9 * (fin - debut) // 20, debut + 11 * (fin - debut) // 20)
+
+
+def _graphe_modifie(ctx):
+    # Poids de quelques relations changés : l'index est dérivé du précédent plutôt que reconstruit
+    relations = pd.DataFrame(ctx['donnees'].relations_politiques)
+    modifiees = np.random.default_rng(0).choice(len(relations), min(RELATIONS_MODIFIEES, len(relations)), replace=False)
+    relations.loc[modifiees, 'poids'] = relations.loc[modifiees, 'poids'] + 1
+    return GrapheCSR.depuis_relations(relations)
+
+
+def _paires(ctx):
+    return ctx['graphe'].noeuds[np.random.default_rng(0).integers(0, ctx['graphe'].n, (PAIRES_CHEMINS, 2))]
+
+
+def _requetes_chemin(ctx):
+    return [ctx['index_chemins'].chemin(source, cible) for source, cible in _paires(ctx)]
+
+
+def _requetes_dijkstra(ctx):
+    # Référence : un parcours de Dijkstra complet (scipy) depuis la source de chaque paire
+    from scipy.sparse.csgraph import dijkstra
+    matrice, positions = ctx['graphe'].matrice(), ctx['index_chemins'].positions
+    return [dijkstra(matrice, directed=False, indices=positions[source])[positions[cible]]
+            for source, cible in _paires(ctx)]
+
+
+def _figure_ego(ctx):
+    index = ctx['index_chemins']
+    source, cible = _paires(ctx)[0]
+    chemin = index.chemin(source, cible)
+    trajet = [index.positions[acteur] for acteur in chemin.noeuds] if chemin is not None else []
+    noeuds = sorted({*(index.positions[acteur] for acteur in index.voisinage(source, 2)['Acteur']), *trajet})
+    positions = np.random.default_rng(0).random((index.n, 2))
+    return {'ego': figure_ego(ctx['graphe'], positions, noeuds, index.communautes, trajet)}
+
+
+def _serialiser(cle):
+    return lambda ctx: [pio.to_json(fig, validate=False) for fig in ctx[cle].values()]
+
+
+# (section, étape, nature, fonction, clé de contexte où ranger le résultat) ; les figures sont
+# construites par la fonction d'origine (__wrapped__) pour ne pas mesurer le cache de figures
+ETAPES = [
+    ('constructeur', 'donnees_synthetiques', 'calcul', lambda ctx: donnees_synthetiques(ctx['taille']), 'donnees'),
+    ('constructeur', 'AnalyseDemocratieLiberale', 'calcul', _analyseur, None),
+    ('reseau', 'graphe_csr', 'calcul', lambda ctx: GrapheCSR.depuis_relations(ctx['donnees'].relations_politiques), 'graphe'),
+    ('reseau', 'centralites', 'calcul',
+     lambda ctx: calculer_centralites(ctx['graphe'], budget_temps_s=ctx['budget_centralites']), 'centralites'),
+    ('reseau', 'layout', 'calcul', _layout, 'layout'),
+    ('reseau', 'figure', 'rendu', lambda ctx: {'reseau': _figure_reseau(ctx)}, 'figures_reseau'),
+    ('reseau', 'serialisation', 'rendu', _serialiser('figures_reseau'), None),
+    ('performance', 'metriques', 'calcul',
+     lambda ctx: MetriquesPartis(ctx['donnees'].series_partis, ctx['donnees'].comparaison_partis), 'metriques'),
+    ('performance', 'figures', 'rendu',
+     lambda ctx: figures_performance.__wrapped__(*ctx['metriques'].parti(PARTI_REFERENCE)), 'figures_performance'),
+    ('performance', 'serialisation', 'rendu', _serialiser('figures_performance'), None),
+    ('chronologie', 'dataframe_evenements', 'calcul', lambda ctx: pd.DataFrame(list(ctx['donnees'].evenements_cles)), None),
+    ('chronologie', 'store_series', 'calcul', _store_series, 'store_series'),
+    ('chronologie', 'requete_lttb', 'calcul', lambda ctx: ctx['store_series'].requete(methode='lttb'), 'series'),
+    ('chronologie', 'requete_minmax', 'calcul', lambda ctx: ctx['store_series'].requete(methode='minmax'), None),
+    ('chronologie', 'requete_zoom', 'calcul', _requete_zoom, None),
+    ('chronologie', 'figures', 'rendu',
+     lambda ctx: figures_chronologie.__wrapped__(ctx['series'], ctx['donnees'].evenements_cles), 'figures_chronologie'),
+    ('chronologie', 'serialisation', 'rendu', _serialiser('figures_chronologie'), None),
+    ('comparatif', 'moteur', 'calcul', lambda ctx: MoteurComparatif(ctx['donnees'].comparaison_partis), 'moteur'),
+    ('comparatif', 'top_n', 'calcul', lambda ctx: ctx['moteur'].top('Membres_max', 10, statut='dissous'), 'vue'),
+    ('comparatif', 'index_ideologique', 'calcul', lambda ctx: IndexIdeologique(ctx['donnees'].positionnement), 'index'),
+    ('comparatif', 'plus_proches', 'calcul', lambda ctx: ctx['index'].plus_proches(ctx['index'].noms[0], 10), None),
+    ('comparatif', 'rayon', 'calcul', lambda ctx: ctx['index'].dans_rayon(ctx['index'].noms[0], 1.0, n_max=100), None),
+    ('comparatif', 'groupes', 'calcul', lambda ctx: regrouper(ctx['index'].points, 8), None),
+    ('comparatif', 'figures', 'rendu',
+     lambda ctx: figures_comparatif.__wrapped__(ctx['vue'], ctx['index'].lignes(ctx['vue']['Parti'])),
+     'figures_comparatif'),
+    ('comparatif', 'serialisation', 'rendu', _serialiser('figures_comparatif'), None),
+    ('flux', 'lignes_json', 'calcul', _lignes_flux, 'lignes_flux'),
+    ('flux', 'ingestion', 'calcul', _ingerer, 'flux'),
+    ('flux', 'figures_base', 'rendu', lambda ctx: _reconstruire_chronologie(ctx, flux=False), 'figures_chronologie'),
+    ('flux', 'actualisation_incrementale', 'rendu', _actualiser_chronologie, None),
+    ('flux', 'reconstruction_complete', 'rendu', _reconstruire_chronologie, None),
+    ('temporel', 'graphe_temporel', 'calcul',
+     lambda ctx: GrapheTemporel.depuis_relations(ctx['donnees'].relations_politiques), 'temporel'),
+    ('temporel', 'centralites_incrementales', 'calcul',
+     lambda ctx: centralites_temporelles(ctx['temporel'], **PARAMETRES_TEMPOREL), 'serie'),
+    ('temporel', 'centralites_completes', 'calcul',
+     lambda ctx: centralites_temporelles(ctx['temporel'], incremental=False, **PARAMETRES_TEMPOREL), None),
+    ('temporel', 'verification', 'calcul', _verifier_temporel, None),
+    ('temporel', 'figures', 'rendu', lambda ctx: {'centralites': figure_centralites_temporelles(ctx['serie']),
+                                                  'anime': figure_reseau_anime(ctx['temporel'], ctx['serie'],
+                                                                               _positions_temporel(ctx))},
+     'figures_temporel'),
+    ('temporel', 'serialisation', 'rendu', _serialiser('figures_temporel'), None),
+    ('chemins', 'graphe_csr', 'calcul', lambda ctx: GrapheCSR.depuis_relations(ctx['donnees'].relations_politiques), 'graphe'),
+    ('chemins', 'index_complet', 'calcul', lambda ctx: IndexChemins.construire(ctx['graphe']), 'index_chemins'),
+    ('chemins', 'graphe_modifie', 'calcul', _graphe_modifie, 'graphe_modifie'),
+    ('chemins', 'index_incremental', 'calcul', lambda ctx: ctx['index_chemins'].mettre_a_jour(ctx['graphe_modifie']),
+     None),
+    ('chemins', 'requetes_chemin', 'calcul', _requetes_chemin, None),
+    ('chemins', 'requetes_dijkstra', 'calcul', _requetes_dijkstra, None),
+    ('chemins', 'voisinage', 'calcul', lambda ctx: ctx['index_chemins'].voisinage(ctx['graphe'].noeuds[0], 2), None),
+    ('chemins', 'figure', 'rendu', _figure_ego, 'figures_chemins'),
+    ('chemins', 'serialisation', 'rendu', _serialiser('figures_chemins'), None),
+]
+
+
+def mesurer(fonction, ctx, repetitions, memoire=True):
+    """Temps médian (mur et CPU) sur plusieurs exécutions, puis pic d'allocation sous tracemalloc"""
+    murs, cpus = [], []
+    for _ in range(repetitions):
+        debut_mur, debut_cpu = time.perf_counter(), time.process_time()
+        resultat = fonction(ctx)
+        murs.append(time.perf_counter() - debut_mur)
+        cpus.append(time.process_time() - debut_cpu)
+    pic_mo = None
+    if memoire:
+        tracemalloc.start()
+        try:
+            fonction(ctx)
+            pic_mo = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return resultat, statistics.median(murs), statistics.median(cpus), pic_mo
+
+
+def executer(tailles, sections=None, repetitions=3, memoire=True, max_layout=None, budget_centralites=5.0,
+             max_temporel=None, journal=print):
+    """Exécute toutes les étapes pour chaque taille et retourne la liste des mesures.
+
+    max_layout et max_temporel (optionnels) ignorent le layout et les centralités par fenêtre au-delà
+    d'une taille ; les étapes ignorées figurent dans les mesures avec leur raison et sans valeurs.
+    """
+    mesures = []
+    # Import préalable de Dashboard pour ne pas compter le chargement de Streamlit dans le constructeur
+    _analyseur({'donnees': donnees_synthetiques(2)})
+    for taille in tailles:
+        ctx = {'taille': taille, 'budget_centralites': budget_centralites}
+        for section, etape, nature, fonction, cle in ETAPES:
+            if sections and section not in sections and section != 'constructeur':
+                continue
+            limite = None
+            if etape == 'layout':
+                limite = max_layout
+            elif section == 'temporel' and etape != 'graphe_temporel':
+                limite = max_temporel
+            if limite is not None and taille > limite:
+                if etape == 'layout':
+                    # Positions circulaires pour mesurer quand même le rendu
+                    import networkx as nx
+                    ctx['layout'] = nx.circular_layout(ctx['graphe'].noeuds)
+                mesures.append({'section': section, 'etape': etape, 'nature': nature, 'taille': taille,
+                                'temps_s': None, 'cpu_s': None, 'memoire_pic_mo': None,
+                                'ignoree': f'taille > {limite}'})
+                journal(f"{taille:>9} {section:<12} {etape:<26} ignoré (taille > {limite})")
+                continue
+            resultat, mur, cpu, pic = mesurer(fonction, ctx, repetitions, memoire)
+            if cle:
+                ctx[cle] = resultat
+            mesure = {'section': section, 'etape': etape, 'nature': nature, 'taille': taille,
+                      'temps_s': mur, 'cpu_s': cpu, 'memoire_pic_mo': pic}
+            mesures.append(mesure)
+            journal(f"{taille:>9} {section:<12} {etape:<26} {nature:<7} {1000 * mur:10.1f} ms "
+                    f"{1000 * cpu:10.1f} ms CPU" + (f" {pic:9.1f} Mo" if pic is not None else ''))
+    return mesures
+
+
+def mesurer_demarrage(source=None, repetitions=3):
+    """Délai jusqu'au premier affichage d'un démarrage à froid (processus neuf), en médiane"""
+    env = {**os.environ, 'DL_INSTRUMENTATION': '1'}
+    env.pop('DL_JOURNAL_INSTRUMENTATION', None)
+    if source and source != 'integree':
+        env['DL_SOURCE_DONNEES'] = source
+    resultats = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, '-c', _SCRIPT_DEMARRAGE], env=env, capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        resultats.append(json.loads(sortie.stdout.strip().splitlines()[-1]))
+    return {
+        'source': source or 'integree',
+        **{cle: statistics.median(r[cle] for r in resultats)
+           for cle in ('import_streamlit_s', 'premier_affichage_s', 'script_s')},
+        'modules_charges': resultats[-1]['modules_charges'],
+    }
+
+
+def comparer(mesures, reference, tolerance=TOLERANCE_DEFAUT):
+    """Régressions de temps ou de mémoire par rapport à la référence"""
+    return regressions(mesures, reference, lambda m: (m['section'], m['etape'], m['taille']),
+                       {'temps_s': BRUIT_TEMPS_S, 'memoire_pic_mo': BRUIT_MEMOIRE_MO}, tolerance)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du dashboard Démocratie Libérale")
+    parser.add_argument('--tailles', nargs='+', type=int, default=list(TAILLES_DEFAUT),
+                        help="Nombre de lignes / arêtes des données synthétiques (ex. 10 1000 100000 1000000)")
+    parser.add_argument('--sections', nargs='+', choices=['reseau', 'performance', 'chronologie', 'comparatif',
+                                                               'temporel', 'flux', 'chemins'])
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--sans-memoire', action='store_true', help="Ne pas mesurer le pic d'allocation")
+    parser.add_argument('--max-layout', type=int,
+                        help="Ignore le layout au-delà de cette taille (mesuré à toutes les tailles par défaut)")
+    parser.add_argument('--budget-centralites', type=float, default=5.0)
+    parser.add_argument('--max-temporel', type=int,
+                        help="Ignore les centralités par fenêtre (incrémentales et complètes) au-delà de cette taille "
+                             "(mesurées à toutes les tailles par défaut)")
+    parser.add_argument('--reference', default=REFERENCE_DEFAUT)
+    parser.add_argument('--enregistrer-reference', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE_DEFAUT)
+    parser.add_argument('--sortie', help="Fichier JSON où écrire les mesures")
+    parser.add_argument('--demarrage', nargs='*', metavar='SOURCE',
+                        help="Mesure seulement le premier affichage à froid pour chaque source ('integree' par "
+                             "défaut, ou un snapshot .dlsnap)")
+    args = parser.parse_args(argv)
+
+    if args.demarrage is not None:
+        for source in args.demarrage or [None]:
+            m = mesurer_demarrage(source, args.repetitions)
+            print(f"{m['source']:<30} premier affichage {1000 * m['premier_affichage_s']:8.1f} ms, "
+                  f"script {1000 * m['script_s']:8.1f} ms (+ import streamlit {1000 * m['import_streamlit_s']:.0f} ms), "
+                  f"modules lourds chargés avant l'en-tête : {', '.join(m['modules_charges']) or 'aucun'}")
+        return 0
+
+    mesures = executer(args.tailles, args.sections, args.repetitions, not args.sans_memoire,
+                       args.max_layout, args.budget_centralites, args.max_temporel)
+    rapport = {'machine': {'python': platform.python_version(), 'plateforme': platform.platform(),
+                           'processeurs': os.cpu_count()},
+               'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'mesures': mesures}
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    if args.enregistrer_reference:
+        with open(args.reference, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+        print(f"Référence enregistrée dans {args.reference}")
+        return 0
+    if not os.path.exists(args.reference):
+        print(f"Aucune référence ({args.reference}) : relancer avec --enregistrer-reference")
+        return 0
+    with open(args.reference, encoding='utf-8') as f:
+        reference = json.load(f)
+    regressions = comparer(mesures, reference, args.tolerance)
+    mesurees = {(m['section'], m['etape'], m['taille']) for m in reference['mesures'] if m['temps_s'] is not None}
+    for m in mesures:
+        if m['temps_s'] is None and (m['section'], m['etape'], m['taille']) in mesurees:
+            print(f"NON COMPARÉE {m['section']}/{m['etape']} (taille {m['taille']}) : {m['ignoree']}")
+    for m, critere, valeur_ref in regressions:
+        print(f"RÉGRESSION {m['section']}/{m['etape']} (taille {m['taille']}) : {critere} "
+              f"{m[critere]:.4g} contre {valeur_ref:.4g} en référence")
+    if not regressions:
+        print("Aucune régression par rapport à la référence")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# cache_calculs.py
+"""Cache LRU des calculs partagés par les sessions du processus (index, séries, indicateurs, réponses).
+
+Une valeur absente est calculée par un seul fil : les demandes simultanées de la même clé attendent
+ce calcul au lieu de le relancer. Une erreur est transmise aux fils en attente et n'est pas conservée.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class CacheLRU:
+    """Valeurs calculées (LRU borné en nombre d'entrées), avec regroupement des calculs identiques simultanés"""
+
+    def __init__(self, capacite):
+        self.capacite = capacite
+        self._verrou = threading.Lock()
+        self._valeurs = OrderedDict()
+        self._en_cours = {}
+        self.compteurs = {'succes': 0, 'regroupees': 0, 'calculs': 0, 'erreurs': 0}
+
+    def _ajouter(self, cle, valeur):
+        self._valeurs[cle] = valeur
+        self._valeurs.move_to_end(cle)
+        while len(self._valeurs) > self.capacite:
+            self._valeurs.popitem(last=False)
+
+    def obtenir(self, cle, calculer):
+        """Valeur de la clé, calculée par `calculer()` si elle est absente"""
+        with self._verrou:
+            if cle in self._valeurs:
+                self._valeurs.move_to_end(cle)
+                self.compteurs['succes'] += 1
+                return self._valeurs[cle]
+            calcul = self._en_cours.get(cle)
+            proprietaire = calcul is None
+            if proprietaire:
+                calcul = self._en_cours[cle] = Future()
+            else:
+                self.compteurs['regroupees'] += 1
+        if not proprietaire:
+            # Même clé déjà en cours de calcul dans un autre fil : on attend son résultat
+            return calcul.result()
+        try:
+            valeur = calculer()
+        except BaseException as exc:
+            with self._verrou:
+                del self._en_cours[cle]
+                self.compteurs['erreurs'] += 1
+            calcul.set_exception(exc)
+            raise
+        with self._verrou:
+            self._ajouter(cle, valeur)
+            del self._en_cours[cle]
+            self.compteurs['calculs'] += 1
+        calcul.set_result(valeur)
+        return valeur
+
+    def lire(self, cle, defaut=None):
+        """Valeur déjà calculée pour la clé, sans calcul"""
+        with self._verrou:
+            if cle not in self._valeurs:
+                return defaut
+            self._valeurs.move_to_end(cle)
+            self.compteurs['succes'] += 1
+            return self._valeurs[cle]
+
+    def amorcer(self, cle, valeur):
+        """Enregistre une valeur calculée ailleurs (snapshot compilé, calcul progressif terminé)"""
+        with self._verrou:
+            self._ajouter(cle, valeur)
+
+    def dernier(self):
+        """Valeur la plus récemment calculée ou lue, None si le cache est vide"""
+        with self._verrou:
+            return next(reversed(self._valeurs.values()), None)
+
+    def statistiques(self):
+        with self._verrou:
+            return {**self.compteurs, 'entrees': len(self._valeurs), 'en_cours': len(self._en_cours)}
+
+    def vider(self):
+        with self._verrou:
+            self._valeurs.clear()
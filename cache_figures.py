@@ -0,0 +1,146 @@
+# cache_figures.py
+"""Cache des figures Plotly sérialisées, indexé par le hash des données d'entrée et des paramètres.
+
+Niveau mémoire : LRU borné en octets, partagé par toutes les sessions du processus.
+Niveau disque optionnel (DL_REPERTOIRE_FIGURES) : partagé entre processus de travail.
+Une figure retrouvée est reconstruite sans validation Plotly (go.Figure(..., _validate=False)).
+"""
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+VARIABLE_REPERTOIRE = "DL_REPERTOIRE_FIGURES"
+OCTETS_MAX_DEFAUT = 64_000_000
+
+
+def _ajouter_empreinte(h, valeur):
+    """Alimente le hash avec le contenu d'une valeur (DataFrame, tableau numpy ou structure JSON)"""
+    if hasattr(valeur, 'columns') and hasattr(valeur, 'dtypes'):
+        import pandas as pd
+        h.update(json.dumps([list(map(str, valeur.columns)), list(map(str, valeur.dtypes))]).encode())
+        h.update(pd.util.hash_pandas_object(valeur, index=True).to_numpy().tobytes())
+    elif hasattr(valeur, 'dtype') and hasattr(valeur, 'tobytes'):
+        h.update(f'{valeur.dtype}{valeur.shape}'.encode())
+        h.update(valeur.tobytes() if valeur.dtype != object else repr(valeur.tolist()).encode())
+    else:
+        h.update(json.dumps(valeur, sort_keys=True, ensure_ascii=False, default=str).encode())
+
+
+def empreinte_entrees(fonction, args, kwargs):
+    """Hash du code de la fonction, de ses valeurs par défaut, de ses arguments et paramètres nommés"""
+    h = hashlib.sha256()
+    code = fonction.__code__
+    h.update(f'{fonction.__module__}.{fonction.__qualname__}'.encode())
+    # Le bytecode et les constantes invalident le niveau disque quand la fonction change
+    h.update(code.co_code)
+    h.update(repr(code.co_consts).encode())
+    for valeur in (fonction.__defaults__ or ()) + tuple(args):
+        _ajouter_empreinte(h, valeur)
+    for nom in sorted(kwargs):
+        h.update(nom.encode())
+        _ajouter_empreinte(h, kwargs[nom])
+    return h.hexdigest()
+
+
+class CacheFigures:
+    """LRU des figures sérialisées (JSON), borné en octets, avec un niveau disque facultatif"""
+
+    def __init__(self, octets_max=OCTETS_MAX_DEFAUT, repertoire=None):
+        self.octets_max = octets_max
+        self.repertoire = repertoire
+        self._verrou = threading.Lock()
+        self._entrees = OrderedDict()
+        self.octets = 0
+        self.compteurs = {'succes_memoire': 0, 'succes_disque': 0, 'echecs': 0, 'evictions': 0}
+
+    def _chemin(self, cle):
+        return os.path.join(self.repertoire, f'{cle}.json')
+
+    def _lire_disque(self, cle):
+        if not self.repertoire or not os.path.exists(self._chemin(cle)):
+            return None
+        with open(self._chemin(cle), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _ecrire_disque(self, cle, serialisees):
+        os.makedirs(self.repertoire, exist_ok=True)
+        # Écriture atomique : plusieurs processus peuvent partager le même répertoire
+        with tempfile.NamedTemporaryFile('w', dir=self.repertoire, suffix='.json', delete=False,
+                                         encoding='utf-8') as tmp:
+            json.dump(serialisees, tmp, ensure_ascii=False)
+        os.replace(tmp.name, self._chemin(cle))
+
+    def _memoriser(self, cle, serialisees):
+        taille = sum(len(s) for s in serialisees.values())
+        if taille > self.octets_max:
+            return
+        with self._verrou:
+            if cle in self._entrees:
+                return
+            self._entrees[cle] = (serialisees, taille)
+            self.octets += taille
+            while self.octets > self.octets_max:
+                _, (_, taille_evincee) = self._entrees.popitem(last=False)
+                self.octets -= taille_evincee
+                self.compteurs['evictions'] += 1
+
+    def obtenir(self, cle, construire):
+        """Figures {nom: go.Figure} pour la clé, construites par `construire` si absentes des deux niveaux"""
+        import plotly.graph_objects as go
+        import plotly.io as pio
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                self._entrees.move_to_end(cle)
+                self.compteurs['succes_memoire'] += 1
+        serialisees = entree[0] if entree is not None else self._lire_disque(cle)
+        if entree is None and serialisees is not None:
+            with self._verrou:
+                self.compteurs['succes_disque'] += 1
+            self._memoriser(cle, serialisees)
+        if serialisees is None:
+            figures = construire()
+            serialisees = {nom: pio.to_json(fig, validate=False) for nom, fig in figures.items()}
+            with self._verrou:
+                self.compteurs['echecs'] += 1
+            self._memoriser(cle, serialisees)
+            if self.repertoire:
+                self._ecrire_disque(cle, serialisees)
+            return figures
+        # Chaque appelant reçoit ses propres objets : une figure modifiée n'altère pas le cache
+        return {nom: go.Figure(json.loads(s), _validate=False) for nom, s in serialisees.items()}
+
+    def statistiques(self):
+        with self._verrou:
+            appels = sum(self.compteurs[c] for c in ('succes_memoire', 'succes_disque', 'echecs'))
+            succes = self.compteurs['succes_memoire'] + self.compteurs['succes_disque']
+            return {**self.compteurs, 'entrees': len(self._entrees), 'octets': self.octets,
+                    'taux_succes': succes / appels if appels else 0.0}
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self.octets = 0
+
+
+_CACHE = CacheFigures(repertoire=os.environ.get(VARIABLE_REPERTOIRE))
+
+
+def figures_memorisees(fonction):
+    """Décorateur des fonctions retournant {nom: figure} : figures servies depuis le cache partagé.
+
+    La fonction d'origine reste accessible par `fonction.__wrapped__` (mesure de la construction).
+    """
+    @functools.wraps(fonction)
+    def memorisee(*args, **kwargs):
+        return _CACHE.obtenir(empreinte_entrees(fonction, args, kwargs), lambda: fonction(*args, **kwargs))
+    return memorisee
+
+
+def statistiques_cache():
+    """Compteurs de succès/échecs, nombre d'entrées et octets occupés du cache de figures"""
+    return _CACHE.statistiques()
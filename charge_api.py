@@ -0,0 +1,200 @@
+# charge_api.py
+"""Test de charge du service d'analyses local : débit (requêtes/s) et latences p50/p95/p99.
+
+Chaque client garde une connexion HTTP/1.1 persistante et enchaîne les requêtes du mélange
+pendant la durée demandée. Une rafale préalable de requêtes identiques non encore calculées
+vérifie le regroupement : le service ne doit les calculer qu'une fois.
+
+    python charge_api.py --demarrer --clients 16 --duree 10
+    python charge_api.py --url http://127.0.0.1:8766 --clients 64 --duree 30 --sortie charge.json
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+
+from statistiques_mesures import centiles, format_ms
+
+# Mélange par défaut : (méthode, chemin, corps) ; les paramètres varient peu pour refléter un
+# usage réel où les mêmes vues sont demandées par plusieurs outils
+MELANGE_DEFAUT = [
+    ('GET', '/efficacite', None),
+    ('GET', '/centralites', None),
+    ('GET', '/centralites?mode=exact', None),
+    ('GET', '/comparatif?n=5', None),
+    ('GET', '/comparatif?critere=Ministres_gouvernement&statut=dissous', None),
+    ('GET', '/comparatif/doctrines', None),
+    ('GET', '/scenarios?trajectoires=100000', None),
+    ('GET', f"/scenarios?leader={quote('Hervé Novelli')}&trajectoires=100000", None),
+    ('POST', '/lot', json.dumps({'requetes': [{'chemin': '/efficacite'}, {'chemin': '/comparatif/doctrines'},
+                                              {'chemin': '/comparatif', 'parametres': {'n': 3}}]})),
+]
+
+
+class Client:
+    """Connexion persistante vers le service, rouverte après une erreur réseau"""
+
+    def __init__(self, hote, port, delai=60):
+        self.hote, self.port, self.delai = hote, port, delai
+        self.connexion = None
+
+    def requete(self, methode, chemin, corps=None):
+        if self.connexion is None:
+            self.connexion = http.client.HTTPConnection(self.hote, self.port, timeout=self.delai)
+        try:
+            entetes = {'Content-Type': 'application/json'} if corps is not None else {}
+            self.connexion.request(methode, chemin, body=corps, headers=entetes)
+            reponse = self.connexion.getresponse()
+            return reponse.status, reponse.read()
+        except (OSError, http.client.HTTPException):
+            self.connexion.close()
+            self.connexion = None
+            raise
+
+
+def rafale(hote, port, n_clients):
+    """Requêtes identiques simultanées jamais vues : nombre de calculs effectués par le service"""
+    chemin = f'/scenarios?trajectoires=200000&graine={time.time_ns() % 2**31}'
+    avant = json.loads(Client(hote, port).requete('GET', '/statistiques')[1])
+    depart = threading.Barrier(n_clients)
+
+    def executer():
+        depart.wait()
+        Client(hote, port).requete('GET', chemin)
+
+    fils = [threading.Thread(target=executer) for _ in range(n_clients)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    apres = json.loads(Client(hote, port).requete('GET', '/statistiques')[1])
+    return {'requetes': n_clients, 'calculs': apres['calculs'] - avant['calculs'],
+            'regroupees': apres['regroupees'] - avant['regroupees']}
+
+
+def charger(hote, port, melange=MELANGE_DEFAUT, n_clients=16, duree=10.0, echauffement=True):
+    """Enchaîne le mélange depuis n clients pendant `duree` secondes ; retourne les mesures agrégées"""
+    if echauffement:
+        # Un passage préalable remplit le cache : la mesure porte sur le régime établi
+        client = Client(hote, port)
+        for methode, chemin, corps in melange:
+            client.requete(methode, chemin, corps)
+    durees = defaultdict(list)
+    erreurs = defaultdict(int)
+    verrou = threading.Lock()
+    fin = time.perf_counter() + duree
+
+    def executer(rang):
+        client = Client(hote, port)
+        locales, locales_erreurs = defaultdict(list), defaultdict(int)
+        i = rang
+        while time.perf_counter() < fin:
+            methode, chemin, corps = melange[i % len(melange)]
+            i += 1
+            debut = time.perf_counter()
+            try:
+                statut, _ = client.requete(methode, chemin, corps)
+            except (OSError, http.client.HTTPException):
+                statut = None
+            cle = urlsplit(chemin).path
+            if statut == 200:
+                locales[cle].append(time.perf_counter() - debut)
+            else:
+                locales_erreurs[cle] += 1
+        with verrou:
+            for cle, valeurs in locales.items():
+                durees[cle].extend(valeurs)
+            for cle, n in locales_erreurs.items():
+                erreurs[cle] += n
+
+    debut = time.perf_counter()
+    fils = [threading.Thread(target=executer, args=(rang,)) for rang in range(n_clients)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    ecoule = time.perf_counter() - debut
+    toutes = [d for valeurs in durees.values() for d in valeurs]
+    return {
+        'clients': n_clients, 'duree_s': ecoule, 'requetes': len(toutes), 'erreurs': sum(erreurs.values()),
+        'requetes_s': len(toutes) / ecoule, **centiles(toutes),
+        'par_chemin': {cle: {'requetes': len(valeurs), 'erreurs': erreurs.get(cle, 0), **centiles(valeurs)}
+                       for cle, valeurs in sorted(durees.items())},
+    }
+
+
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def demarrer_service(port, delai=60):
+    """Lance le service dans un processus séparé (les clients ne partagent pas son GIL)"""
+    processus = subprocess.Popen([sys.executable, 'api_analytique.py', '--port', str(port)],
+                                 cwd=os.path.dirname(os.path.abspath(__file__)),
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.time() + delai
+    while time.time() < limite:
+        try:
+            if Client('127.0.0.1', port, delai=5).requete('GET', '/sante')[0] == 200:
+                return processus
+        except OSError:
+            time.sleep(0.1)
+    processus.kill()
+    raise RuntimeError("Le service n'a pas démarré")
+
+
+def afficher(resultats, journal=print):
+    journal(f"{resultats['requetes']} requêtes en {resultats['duree_s']:.1f} s avec {resultats['clients']} clients : "
+            f"{resultats['requetes_s']:.0f} requêtes/s, {resultats['erreurs']} erreurs")
+    journal(f"{'chemin':<24} {'requêtes':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for cle, m in [('(toutes)', resultats), *resultats['par_chemin'].items()]:
+        # Centiles absents quand toutes les requêtes du chemin ont échoué
+        journal(f"{cle:<24} {m['requetes']:>9} {format_ms(m['p50'])} {format_ms(m['p95'])} {format_ms(m['p99'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du service d'analyses local")
+    parser.add_argument('--url', default='http://127.0.0.1:8766')
+    parser.add_argument('--demarrer', action='store_true', help="Lance le service sur un port libre pour la mesure")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duree', type=float, default=10.0)
+    parser.add_argument('--sans-echauffement', action='store_true', help="Mesure aussi les premiers calculs")
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    processus = None
+    if args.demarrer:
+        hote, port = '127.0.0.1', _port_libre()
+        processus = demarrer_service(port)
+    else:
+        url = urlsplit(args.url)
+        hote, port = url.hostname, url.port or 80
+    try:
+        regroupement = rafale(hote, port, args.clients)
+        print(f"Rafale de {regroupement['requetes']} requêtes identiques : {regroupement['calculs']} calcul(s), "
+              f"{regroupement['regroupees']} regroupée(s)")
+        resultats = charger(hote, port, n_clients=args.clients, duree=args.duree,
+                            echauffement=not args.sans_echauffement)
+        resultats['regroupement'] = regroupement
+        resultats['cache'] = json.loads(Client(hote, port).requete('GET', '/statistiques')[1])
+    finally:
+        if processus is not None:
+            processus.terminate()
+            processus.wait()
+    afficher(resultats)
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
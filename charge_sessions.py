@@ -0,0 +1,246 @@
+# charge_sessions.py
+"""Test de charge du dashboard : N sessions simulées en parallèle, sans navigateur.
+
+Chaque session est un AppTest sur Dashboard.py qui suit le même parcours (changement d'onglet,
+sliders, listes déroulantes). Toutes les sessions tournent dans un seul processus, comme derrière
+un serveur Streamlit : elles partagent st.cache_resource / st.cache_data et se disputent le GIL.
+Pour chaque nombre de sessions, on mesure les latences de ré-exécution (p50/p95/p99), le CPU du
+processus et la mémoire résidente ajoutée par session.
+
+    python charge_sessions.py --sessions 1 2 4 8 16 --enregistrer-reference
+    python charge_sessions.py --sessions 1 2 4 8 16          # compare à la référence enregistrée
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from streamlit import runtime
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+from streamlit.testing.v1.util import patch_config_options
+
+from statistiques_mesures import TOLERANCE_DEFAUT, centiles, format_ms, regressions
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+REFERENCE_DEFAUT = 'charge_sessions_reference.json'
+SESSIONS_DEFAUT = (1, 2, 4, 8)
+# En dessous de ces écarts absolus, une variation est considérée comme du bruit de mesure
+BRUIT_TEMPS_S = 0.05
+BRUIT_MEMOIRE_MO = 5.0
+
+RESEAU, PERFORMANCE, CHRONOLOGIE, COMPARATIF, SCENARIOS = (
+    "🔗 Réseau d'Influence", "📈 Performance", "⏳ Chronologie Stratégique", "🌍 Analyse Comparative",
+    "🎲 Scénarios Alternatifs")
+
+# Parcours d'un utilisateur : (onglet ouvert, action sur un widget de cet onglet ou None).
+# Une action vise un widget affiché par l'étape précédente : (type de widget, libellé, valeur)
+PARCOURS_DEFAUT = [
+    (RESEAU, None),
+    (RESEAU, ('selectbox', "Mode de calcul", 'echantillonne')),
+    (RESEAU, ('slider', "Nombre d'acteurs étiquetés", 25)),
+    (PERFORMANCE, None),
+    (CHRONOLOGIE, None),
+    (CHRONOLOGIE, ('select_slider', "Points par série", 500)),
+    (COMPARATIF, None),
+    (COMPARATIF, ('slider', "Nombre de partis affichés", 5)),
+    (SCENARIOS, None),
+    (SCENARIOS, ('select_slider', "Nombre de trajectoires", 100_000)),
+    (SCENARIOS, ('selectbox', "Choisissez un scénario contrefactuel à explorer :", "Contexte politique alternatif")),
+    (SCENARIOS, ('slider', "Score d'Alain Madelin à la présidentielle 2002 (%)", 6.5)),
+    (SCENARIOS, ('slider', "Score d'Alain Madelin à la présidentielle 2002 (%)", 2.5)),
+    (SCENARIOS, ('selectbox', "Choisissez un scénario contrefactuel à explorer :", "Leadership différent")),
+    (SCENARIOS, ('selectbox', "Leader alternatif :", "Hervé Novelli")),
+    (RESEAU, None),
+]
+
+
+def memoire_residente():
+    """Mémoire résidente du processus (octets) ; à défaut de /proc, le pic (ru_maxrss)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        facteur = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * facteur
+
+
+@contextmanager
+def serveur_partage():
+    """Ressources qu'un serveur Streamlit partage entre ses sessions, installées une fois pour toutes.
+
+    AppTest crée à chaque exécution son propre runtime (remis à None à la fin) et recompile le
+    script : des sessions simultanées dans un même processus se retireraient mutuellement le
+    runtime et compileraient en parallèle. On leur donne un runtime et un cache de bytecode
+    communs, comme derrière `streamlit run`.
+    """
+    commun = app_test.MagicMock(spec=app_test.Runtime)
+    commun.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage('/mock/media'))
+    commun.dataframe_source_mgr = app_test.DataframeSourceManager()
+    commun.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    commun.bidi_component_registry = app_test.BidiComponentManager()
+    cache_script = app_test.ScriptCache()
+    with patch.object(runtime, 'exists', lambda: True), patch.object(runtime, 'get_instance', lambda: commun), \
+            patch.object(app_test, 'ScriptCache', lambda: cache_script), \
+            patch.object(local_script_runner, 'ScriptCache', lambda: cache_script), \
+            patch_config_options({'global.appTest': True}):
+        yield
+
+
+def _widget(at, nature, libelle):
+    widgets = [w for w in getattr(at, nature) if w.label == libelle]
+    if not widgets:
+        raise LookupError(f"{nature} « {libelle} » absent de la page")
+    return widgets[0]
+
+
+class Session:
+    """Session simulée : un AppTest qui rejoue le parcours et chronomètre chaque ré-exécution"""
+
+    def __init__(self, parcours=PARCOURS_DEFAUT, delai=300):
+        self.parcours = parcours
+        self.at = AppTest.from_file(SCRIPT, default_timeout=delai)
+        self.durees = defaultdict(list)
+        self.erreurs = []
+
+    def etape(self, onglet, action):
+        self.at.session_state['onglet_actif'] = onglet
+        if action is not None:
+            nature, libelle, valeur = action
+            _widget(self.at, nature, libelle).set_value(valeur)
+        debut = time.perf_counter()
+        self.at.run()
+        duree = time.perf_counter() - debut
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+        return duree
+
+    def jouer(self, repetitions=1):
+        for _ in range(repetitions):
+            for onglet, action in self.parcours:
+                nom = onglet if action is None else f'{onglet} / {action[1]}'
+                try:
+                    self.durees[nom].append(self.etape(onglet, action))
+                except Exception as e:
+                    self.erreurs.append(f'{nom} : {e}')
+
+
+def mesurer(n_sessions, parcours=PARCOURS_DEFAUT, repetitions=1):
+    """Fait jouer le parcours à n sessions simultanées ; latences, CPU et mémoire par session"""
+    gc.collect()
+    memoire_debut = memoire_residente()
+    sessions = [Session(parcours) for _ in range(n_sessions)]
+    depart = threading.Barrier(n_sessions)
+
+    def executer(session):
+        depart.wait()
+        session.jouer(repetitions)
+
+    fils = [threading.Thread(target=executer, args=(s,)) for s in sessions]
+    debut_mur, debut_cpu = time.perf_counter(), time.process_time()
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    mur, cpu = time.perf_counter() - debut_mur, time.process_time() - debut_cpu
+    # Sessions encore vivantes (état, arbre d'éléments) : la croissance de la mémoire résidente
+    # depuis le début leur est attribuée
+    gc.collect()
+    memoire = memoire_residente() - memoire_debut
+
+    par_etape = defaultdict(list)
+    for s in sessions:
+        for nom, durees in s.durees.items():
+            par_etape[nom].extend(durees)
+    toutes = [d for durees in par_etape.values() for d in durees]
+    erreurs = [e for s in sessions for e in s.erreurs]
+    return {
+        'sessions': n_sessions, 'reexecutions': len(toutes), 'erreurs': len(erreurs), 'messages': erreurs[:5],
+        'duree_s': mur, 'reexecutions_s': len(toutes) / mur, **centiles(toutes),
+        'cpu_s': cpu, 'coeurs': cpu / mur, 'cpu_par_reexecution_s': cpu / max(1, len(toutes)),
+        'memoire_par_session_mo': memoire / n_sessions / 1e6,
+        'par_etape': {nom: centiles(durees) for nom, durees in par_etape.items()},
+    }
+
+
+def executer(niveaux=SESSIONS_DEFAUT, parcours=PARCOURS_DEFAUT, repetitions=1, journal=print):
+    """Une mesure par nombre de sessions, après une session d'échauffement qui remplit les caches partagés"""
+    with serveur_partage():
+        return _executer(niveaux, parcours, repetitions, journal)
+
+
+def _executer(niveaux, parcours, repetitions, journal):
+    debut = time.perf_counter()
+    echauffement = Session(parcours)
+    echauffement.jouer()
+    journal(f"Échauffement (caches partagés remplis) : {time.perf_counter() - debut:.1f} s")
+    for message in echauffement.erreurs[:5]:
+        journal(f"    {message}")
+    journal(f"{'sessions':>8} {'réexéc.':>8} {'réexéc/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'cœurs':>6} {'CPU ms/réexéc':>14} {'Mo/session':>11} {'erreurs':>8}")
+    mesures = []
+    for n in niveaux:
+        m = mesurer(n, parcours, repetitions)
+        mesures.append(m)
+        journal(f"{n:>8} {m['reexecutions']:>8} {m['reexecutions_s']:>9.1f} {format_ms(m['p50'], 8, 0)} "
+                f"{format_ms(m['p95'], 8, 0)} {format_ms(m['p99'], 8, 0)} {m['coeurs']:>6.2f} "
+                f"{1000 * m['cpu_par_reexecution_s']:>14.0f} {m['memoire_par_session_mo']:>11.1f} {m['erreurs']:>8}")
+        for message in m['messages']:
+            journal(f"    {message}")
+    return mesures
+
+
+def comparer(mesures, reference, tolerance=TOLERANCE_DEFAUT):
+    """Régressions de latence (p95) ou de mémoire par session, à nombre de sessions égal"""
+    return regressions(mesures, reference, lambda m: m['sessions'],
+                       {'p95': BRUIT_TEMPS_S, 'memoire_par_session_mo': BRUIT_MEMOIRE_MO}, tolerance)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du dashboard avec N sessions simultanées")
+    parser.add_argument('--sessions', nargs='+', type=int, default=list(SESSIONS_DEFAUT),
+                        help="Nombres de sessions simultanées à mesurer (ex. 1 2 4 8 16)")
+    parser.add_argument('--repetitions', type=int, default=1, help="Parcours joués par chaque session")
+    parser.add_argument('--reference', default=REFERENCE_DEFAUT)
+    parser.add_argument('--enregistrer-reference', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE_DEFAUT)
+    parser.add_argument('--sortie', help="Fichier JSON où écrire les mesures")
+    args = parser.parse_args(argv)
+
+    # Avertissements de Streamlit hors `streamlit run` (contexte absent, paramètres dépréciés) : un
+    # par ré-exécution, ils noieraient le tableau
+    with patch_config_options({'logger.level': 'error'}):
+        mesures = executer(args.sessions, repetitions=args.repetitions)
+    rapport = {'machine': {'python': platform.python_version(), 'plateforme': platform.platform(),
+                           'processeurs': os.cpu_count()},
+               'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'mesures': mesures}
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    if args.enregistrer_reference:
+        with open(args.reference, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+        print(f"Référence enregistrée dans {args.reference}")
+        return 0
+    if not os.path.exists(args.reference):
+        print(f"Aucune référence ({args.reference}) : relancer avec --enregistrer-reference")
+        return 0
+    with open(args.reference, encoding='utf-8') as f:
+        regressions = comparer(mesures, json.load(f), args.tolerance)
+    for m, critere, valeur_ref in regressions:
+        print(f"RÉGRESSION {m['sessions']} sessions : {critere} {m[critere]:.4g} contre {valeur_ref:.4g} en référence")
+    if not regressions:
+        print("Aucune régression par rapport à la référence")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
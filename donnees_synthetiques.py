@@ -0,0 +1,135 @@
+# donnees_synthetiques.py
+"""Générateur de jeux de données synthétiques de taille arbitraire, au format des sources réelles."""
+import numpy as np
+import pandas as pd
+
+from sources_donnees import construire_donnees, donnees_integrees
+
+TYPES_RELATIONS = np.array(['Alliance tactique', 'Fusion-absorption', 'Leadership', 'Convergence idéologique',
+                            'Influence', 'Expertise', 'Militantisme'], dtype=object)
+DOCTRINES = np.array(['Libéralisme', 'Gaullisme', 'Centrisme', 'Socialisme', 'Communisme', 'Nationalisme',
+                      'Écologie', 'Régionalisme'], dtype=object)
+
+
+def generer_intervalles(n, rng, annee_debut=1958, annee_fin=2025, proportion_ouverte=0.2):
+    """Intervalles de validité au jour près (durées de quelques mois à quelques années), parfois sans fin"""
+    origine = np.datetime64(f'{annee_debut}-01-01')
+    etendue = (np.datetime64(f'{annee_fin}-12-31') - origine).astype(np.int64)
+    debut = origine + rng.integers(0, etendue, n)
+    fin = np.datetime_as_string(debut + rng.exponential(3 * 365, n).astype(np.int64), unit='D').astype(object)
+    fin[rng.random(n) < proportion_ouverte] = None
+    return {'debut': np.datetime_as_string(debut, unit='D').astype(object), 'fin': fin}
+
+
+def generer_relations(n_aretes, graine=0, aretes_par_noeud=5):
+    """Graphe orienté à degrés hétérogènes (tirage de Zipf), poids entiers de 1 à 10, relations datées"""
+    rng = np.random.default_rng(graine)
+    n_noeuds = max(2, n_aretes // aretes_par_noeud)
+    # Quelques acteurs très connectés, beaucoup d'acteurs périphériques
+    sources = (rng.zipf(1.6, n_aretes) - 1) % n_noeuds
+    cibles = rng.integers(0, n_noeuds, n_aretes)
+    cibles = np.where(cibles == sources, (cibles + 1) % n_noeuds, cibles)
+    return pd.DataFrame({
+        'source': np.char.add('Acteur ', sources.astype(str)),
+        'target': np.char.add('Acteur ', cibles.astype(str)),
+        'poids': rng.integers(1, 11, n_aretes),
+        'type': TYPES_RELATIONS[rng.integers(0, len(TYPES_RELATIONS), n_aretes)],
+        **generer_intervalles(n_aretes, rng),
+    })
+
+
+def generer_series(n_annees, graine=0):
+    """Séries annuelles (membres, budget, influence, résultats) en marche aléatoire"""
+    rng = np.random.default_rng(graine)
+    membres = (15000 * np.exp(np.clip(np.cumsum(rng.normal(0, 0.1, n_annees)), -4, 3))).round()
+    return pd.DataFrame({
+        'annee': 1958 + np.arange(n_annees),
+        'membres': membres.astype(np.int64),
+        'budget_millions': (membres * rng.uniform(3e-4, 6e-4, n_annees)).round(2),
+        'influence': np.clip(np.round(5 + np.cumsum(rng.normal(0, 0.3, n_annees))), 0, 10),
+        'resultats_pct': np.clip(5 + np.cumsum(rng.normal(0, 0.3, n_annees)), 0, 40).round(2),
+    })
+
+
+def generer_series_partis(n_lignes, graine=0, n_annees=30):
+    """Séries annuelles de partis nommés comme dans generer_partis, n_annees consécutives par parti"""
+    rng = np.random.default_rng(graine)
+    n_partis = max(1, -(-n_lignes // n_annees))
+    debut = rng.integers(1958, 2025 - n_annees + 2, n_partis)
+    # Marche aléatoire des effectifs par parti, en une opération sur la matrice partis x années
+    membres = (rng.lognormal(9, 1, (n_partis, 1))
+               * np.exp(np.clip(np.cumsum(rng.normal(0, 0.15, (n_partis, n_annees)), axis=1), -4, 3))).round()
+    budget = membres * rng.uniform(3e-4, 6e-4, (n_partis, n_annees))
+    return pd.DataFrame({
+        'Parti': np.char.add('Parti ', np.repeat(np.arange(n_partis), n_annees).astype(str)),
+        'annee': (debut[:, None] + np.arange(n_annees)).ravel(),
+        'membres': membres.ravel().astype(np.int64),
+        'budget_millions': budget.ravel().round(2),
+        'influence': np.clip(np.round(5 + np.cumsum(rng.normal(0, 0.3, (n_partis, n_annees)), axis=1)), 0, 10).ravel(),
+    }).iloc[:n_lignes]
+
+
+def generer_evenements(n_evenements, graine=0, annee_debut=1958, annee_fin=2025):
+    """Événements datés avec un impact de 1 à 10"""
+    rng = np.random.default_rng(graine)
+    return pd.DataFrame({
+        'annee': np.sort(rng.integers(annee_debut, annee_fin + 1, n_evenements)),
+        'evenement': np.char.add('Événement ', np.arange(n_evenements).astype(str)),
+        'impact': rng.integers(1, 11, n_evenements),
+    })
+
+
+def generer_flux(n_lignes, graine=0, proportion_series=0.2, annee_debut=2003):
+    """Lignes d'un flux d'événements (dictionnaires JSON) : événements clés et points des séries annuelles"""
+    rng = np.random.default_rng(graine)
+    annees = (annee_debut + np.arange(n_lignes) * 50 // max(n_lignes, 1)).tolist()
+    series = (rng.random(n_lignes) < proportion_series).tolist()
+    impacts = rng.integers(1, 11, n_lignes).tolist()
+    membres = rng.lognormal(9.5, 0.3, n_lignes).round().tolist()
+    influence = rng.integers(0, 11, n_lignes).tolist()
+    return [{'type': 'serie', 'annee': annee, 'membres': m, 'budget_millions': round(m * 4e-4, 2), 'influence': i}
+            if serie else {'annee': annee, 'evenement': f'Dépêche {k}', 'impact': impact}
+            for k, (annee, serie, impact, m, i) in enumerate(zip(annees, series, impacts, membres, influence))]
+
+
+def generer_partis(n_partis, graine=0):
+    """Table comparative au format de comparaison_partis (période en texte, durée parfois '53+')"""
+    rng = np.random.default_rng(graine)
+    debut = rng.integers(1900, 2020, n_partis)
+    actif = rng.random(n_partis) < 0.3
+    fin = np.minimum(debut + rng.integers(1, 60, n_partis), 2025)
+    duree = np.where(actif, 2025 - debut, fin - debut)
+    return pd.DataFrame({
+        'Parti': np.char.add('Parti ', np.arange(n_partis).astype(str)),
+        'Période_activité': np.where(actif, np.char.add(debut.astype(str), '-'),
+                                     np.char.add(np.char.add(debut.astype(str), '-'), fin.astype(str))),
+        'Membres_max': rng.lognormal(10, 1.2, n_partis).astype(np.int64),
+        'Doctrine': DOCTRINES[rng.integers(0, len(DOCTRINES), n_partis)],
+        'Ministres_gouvernement': rng.poisson(5, n_partis),
+        'Durée_vie_annees': np.where(actif, np.char.add(duree.astype(str), '+'), duree.astype(str)).astype(object),
+    })
+
+
+def generer_positionnement(n_partis, graine=0, axes=('Economic', 'Societal', 'Europe'), n_familles=8):
+    """Positions sur les axes idéologiques (1 à 10), regroupées autour de quelques familles politiques"""
+    rng = np.random.default_rng(graine)
+    centres = rng.uniform(2, 9, (n_familles, len(axes)))
+    positions = np.clip(centres[rng.integers(0, n_familles, n_partis)] + rng.normal(0, 0.8, (n_partis, len(axes))),
+                        1, 10).round(2)
+    return pd.DataFrame({'Parti': np.char.add('Parti ', np.arange(n_partis).astype(str)),
+                         **{axe: positions[:, i] for i, axe in enumerate(axes)}})
+
+
+def donnees_synthetiques(taille, graine=0):
+    """DonneesParti dont chaque table (relations, séries, événements, partis, positions, séries par parti)
+    compte `taille` lignes"""
+    tables = {
+        'parti_data': donnees_integrees()['parti_data'],
+        'relations_politiques': generer_relations(taille, graine),
+        'series_annuelles': generer_series(max(taille, 2), graine),
+        'evenements_cles': generer_evenements(taille, graine),
+        'comparaison_partis': generer_partis(taille, graine),
+        'positionnement_ideologique': generer_positionnement(taille, graine),
+        'series_partis': generer_series_partis(taille, graine),
+    }
+    return construire_donnees(tables, f'synthetique-{taille}-{graine}')
@@ -0,0 +1,218 @@
+# figures.py
+"""Construction des figures, indépendante de Streamlit (dashboard et rapports)."""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from cache_figures import figures_memorisees
+from index_ideologique import AXES
+from instrumentation import etape
+from monte_carlo import BORNES_SCORE
+from metriques_partis import INDICATEURS_PARTIS, NON_CLASSE
+
+# Au-delà, les partis non mis en évidence de la carte idéologique sont échantillonnés
+POINTS_MAX_CARTE = 5000
+
+
+def figure_reseau_influence(graphe, resultat, mode_rendu='auto', poids_min=None, top_k=15, taille_max_mo=5):
+    """Figure du réseau à partir des centralités calculées (layout issu du store partagé)"""
+    # Imports différés : scipy et networkx ne sont chargés que par l'onglet réseau
+    from rendu_reseau import figure_reseau, positions_en_tableau
+    from store_layout import obtenir_layout
+    intermediarite = resultat.table.set_index('Acteur')['Contrôle des Réseaux'].reindex(graphe.noeuds).to_numpy()
+    with etape('layout'):
+        pos = obtenir_layout(graphe, k=1, iterations=50)
+    with etape('figure'):
+        return figure_reseau(graphe, positions_en_tableau(graphe, pos), intermediarite, mode=mode_rendu,
+                             poids_min=poids_min, top_k_labels=top_k, taille_max_octets=taille_max_mo * 1_000_000)
+
+
+def figures_reseau(graphe, mode='auto', epsilon=0.05, budget_temps_s=None):
+    """Table de centralité et figure du réseau avec les paramètres par défaut"""
+    from analyse_graphe import centralites_en_cache
+    resultat = centralites_en_cache(graphe, mode=mode, epsilon=epsilon, budget_temps_s=budget_temps_s)
+    return resultat.table, {'reseau': figure_reseau_influence(graphe, resultat).figure}
+
+
+# Couleur de chaque note de performance (rang percentile parmi les partis)
+COULEURS_NOTES = {'Élevée': '#2ecc71', 'Correcte': '#3498db', 'Moyenne': '#f39c12', 'Faible': '#e74c3c',
+                  NON_CLASSE: '#95a5a6'}
+# Indicateurs clés de la synthèse par parti, dans l'ordre du graphique
+INDICATEURS_CLES = ('membres_max', 'ministres', 'budget_max', 'duree_vie')
+
+
+@figures_memorisees
+def figures_performance(synthese, annuelles):
+    """Indicateurs clés notés par rang percentile parmi les partis, et efficacité année par année"""
+    ligne = synthese.iloc[0]
+    df_performance = pd.DataFrame({
+        'Indicateur': [INDICATEURS_PARTIS[c][0] for c in INDICATEURS_CLES],
+        'Valeur': [ligne[c] for c in INDICATEURS_CLES],
+        'Unité': [INDICATEURS_PARTIS[c][1] for c in INDICATEURS_CLES],
+        'Percentile': [ligne[f'rang_{c}'] for c in INDICATEURS_CLES],
+        'Performance': [NON_CLASSE if pd.isna(ligne[f'note_{c}']) else ligne[f'note_{c}'] for c in INDICATEURS_CLES],
+    })
+    fig_croissance = px.bar(df_performance, x='Indicateur', y='Valeur',
+                            color='Performance',
+                            title="Indicateurs de Performance Clé",
+                            hover_data={'Unité': True, 'Percentile': ':.0%'},
+                            category_orders={'Performance': list(COULEURS_NOTES)},
+                            color_discrete_map=COULEURS_NOTES)
+
+    # Analyse du rapport coût/efficacité, pour chaque année des séries
+    fig_efficacite = go.Figure()
+    fig_efficacite.add_trace(go.Bar(name='Coût par membre (€)', x=annuelles['annee'],
+                                    y=annuelles['budget_par_membre']))
+    fig_efficacite.add_trace(go.Scatter(name='Ministres pour 1000 membres', x=annuelles['annee'],
+                                        y=annuelles['ministres_pour_1000'], mode='lines+markers', yaxis='y2'))
+    fig_efficacite.update_layout(title="Analyse d'Efficacité Organisationnelle",
+                                 xaxis=dict(title='Année'),
+                                 yaxis=dict(title='Coût par membre (€)'),
+                                 yaxis2=dict(title='Ministres pour 1000 membres', side='right', overlaying='y'))
+    return {'croissance': fig_croissance, 'efficacite': fig_efficacite}
+
+
+# Séries de la figure d'évolution, dans l'ordre des traces : libellé et axe vertical
+SERIES_EVOLUTION = {'membres': ('Membres', 'y1'), 'budget_millions': ('Budget (M€)', 'y2'),
+                    'influence': ('Influence politique', 'y3')}
+TRACES_EVOLUTION = {colonne: i for i, colonne in enumerate(SERIES_EVOLUTION)}
+# Au-delà, les séries sont tracées sans marqueurs
+POINTS_MAX_MARQUEURS = 200
+
+
+@figures_memorisees
+def figures_chronologie(series, evenements):
+    """Évolution conjointe des séries (table longue Serie/Temps/Valeur) et chronologie des événements clés"""
+    fig = go.Figure()
+    for colonne, (nom, axe) in SERIES_EVOLUTION.items():
+        points = series[series['Serie'] == colonne]
+        fig.add_trace(go.Scatter(x=points['Temps'].to_numpy(), y=points['Valeur'].to_numpy(),
+                                 mode='lines+markers' if len(points) <= POINTS_MAX_MARQUEURS else 'lines',
+                                 name=nom, yaxis=axe))
+    fig.update_layout(
+        title='Évolution Conjointe: Membres, Budget et Influence',
+        xaxis=dict(title='Année'),
+        yaxis=dict(title='Membres', side='left'),
+        yaxis2=dict(title='Budget (M€)', side='right', overlaying='y'),
+        yaxis3=dict(title='Influence (0-10)', side='right', overlaying='y', position=0.85),
+        height=500
+    )
+
+    with etape('dataframe_evenements'):
+        df_evenements = pd.DataFrame(list(evenements))
+        df_evenements['debut'], df_evenements['duree'] = _barres_annees(df_evenements['annee'])
+        df_evenements['fin'] = df_evenements['debut'] + pd.to_timedelta(df_evenements['duree'], unit='ms')
+    with etape('timeline'):
+        # Une barre par année civile (px.timeline attend des dates, pas des années entières)
+        fig_events = px.timeline(df_evenements, x_start="debut", x_end="fin", y="evenement",
+                                 color="impact", color_continuous_scale="Viridis",
+                                 hover_data={'annee': True, 'debut': False, 'fin': False},
+                                 title="Chronologie des Événements Clés")
+    fig_events.update_yaxes(autorange="reversed")
+    return {'evolution': fig, 'evenements': fig_events}
+
+
+def _barres_annees(annees):
+    """Début (1er janvier) et durée en millisecondes de la barre de chaque année"""
+    annees = np.asarray(annees, dtype=np.int64)
+    debut = (annees - 1970).astype('datetime64[Y]').astype('datetime64[us]')
+    fin = (annees - 1969).astype('datetime64[Y]').astype('datetime64[us]')
+    return debut, (fin - debut).astype('timedelta64[ms]').astype(np.int64)
+
+
+def mettre_a_jour_evolution(fig, series, colonnes):
+    """Remplace en place les points des seules traces dont la série a changé (table longue Serie/Temps/Valeur)"""
+    for colonne in colonnes:
+        points = series[series['Serie'] == colonne]
+        trace = fig.data[TRACES_EVOLUTION[colonne]]
+        trace.x, trace.y = points['Temps'].to_numpy(), points['Valeur'].to_numpy()
+
+
+def etendre_timeline(fig, evenements, n_fixes, retires=0):
+    """Ajoute des événements {colonne: tableau} à la chronologie, après en avoir retiré les `retires`
+    plus anciens au-delà des `n_fixes` premiers"""
+    trace = fig.data[0]
+    debut, duree = _barres_annees(evenements['annee'])
+    garder = np.r_[0:n_fixes, n_fixes + retires:len(trace.y)]
+
+    def etendre(existant, nouveaux):
+        return np.concatenate([np.asarray(existant)[garder], nouveaux])
+
+    with fig.batch_update():
+        trace.base = etendre(trace.base, debut)
+        trace.x = etendre(trace.x, duree)
+        trace.y = etendre(trace.y, evenements['evenement'])
+        trace.customdata = etendre(trace.customdata, evenements['annee'][:, None])
+        trace.marker.color = etendre(trace.marker.color, evenements['impact'])
+
+
+@figures_memorisees
+def figures_comparatif(comparaison_partis, positionnement):
+    """Effectifs, ministres et positionnement idéologique des partis comparés"""
+    fig_membres = px.bar(comparaison_partis, x='Parti', y='Membres_max',
+                         title="Comparaison des Effectifs Maximum",
+                         color='Parti')
+    fig_ministres = px.bar(comparaison_partis, x='Parti', y='Ministres_gouvernement',
+                           title="Influence Gouvernementale (Nombre de Ministres)",
+                           color='Parti')
+    tailles = [20, 25] * (len(positionnement) // 2) + [20] * (len(positionnement) % 2)
+    # Deux premiers axes de la table de positionnement, comme ceux de l'index idéologique
+    axes = [c for c in positionnement.columns if c != 'Parti' and pd.api.types.is_numeric_dtype(positionnement[c])]
+    fig_ideologie = px.scatter(positionnement, x=axes[0], y=axes[1] if len(axes) > 1 else None,
+                               size=tailles or None, text='Parti',
+                               title="Positionnement Idéologique des Partis",
+                               labels={axe: AXES.get(axe, axe) for axe in axes[:2]})
+    fig_ideologie.update_traces(textposition='top center')
+    return {'membres': fig_membres, 'ministres': fig_ministres, 'ideologie': fig_ideologie}
+
+
+def figure_centralites_temporelles(serie, mesure='Contrôle des Réseaux', top_k=8):
+    """Évolution d'une centralité pour les acteurs qui y atteignent les plus hautes valeurs"""
+    table = serie.table
+    acteurs = table.groupby('Acteur')[mesure].max().nlargest(top_k).index
+    valeurs = (table[table['Acteur'].isin(acteurs)].pivot_table(index='Periode', columns='Acteur', values=mesure)
+               .reindex(index=serie.fenetres['Debut'], columns=acteurs).fillna(0.0))
+    fig = go.Figure([go.Scatter(x=valeurs.index, y=valeurs[acteur], mode='lines', name=str(acteur), line_shape='hv')
+                     for acteur in acteurs])
+    fig.update_layout(title=f"{mesure} par fenêtre glissante", xaxis_title="Début de la fenêtre",
+                      yaxis_title=mesure, hovermode='x unified', height=400)
+    return fig
+
+
+def figure_voisinage(index, reference, voisins, groupes, axe_x, axe_y, points_max=POINTS_MAX_CARTE):
+    """Carte idéologique colorée par groupe, avec le parti de référence et ses plus proches voisins"""
+    mis_en_avant = index.indices([reference, *voisins['Parti']])
+    fond = np.arange(len(index))
+    if len(fond) > points_max:
+        fond = np.random.default_rng(0).choice(fond, points_max, replace=False)
+    fond = np.setdiff1d(fond, mis_en_avant)
+    x, y = index.axes.index(axe_x), index.axes.index(axe_y)
+    # WebGL au-delà de quelques milliers de points
+    Trace = go.Scattergl if len(fond) > 1000 else go.Scatter
+    fig = go.Figure()
+    for groupe in range(len(groupes.centres)):
+        points = fond[groupes.etiquettes[fond] == groupe]
+        fig.add_trace(Trace(x=index.points[points, x], y=index.points[points, y], mode='markers',
+                            name=f"Groupe {groupe + 1} ({groupes.effectifs[groupe]})", text=index.noms[points],
+                            marker={'size': 5, 'opacity': 0.5}, hoverinfo='text'))
+    fig.add_trace(go.Scatter(x=index.points[mis_en_avant[1:], x], y=index.points[mis_en_avant[1:], y],
+                             mode='markers+text', name='Plus proches', text=index.noms[mis_en_avant[1:]],
+                             textposition='top center', marker={'size': 11, 'color': '#e67e22'}))
+    fig.add_trace(go.Scatter(x=index.points[mis_en_avant[:1], x], y=index.points[mis_en_avant[:1], y],
+                             mode='markers+text', name=reference, text=[reference], textposition='top center',
+                             marker={'size': 16, 'color': '#1f3a60', 'symbol': 'star'}))
+    fig.update_layout(title=f"Voisinage idéologique de {reference}", height=500,
+                      xaxis_title=index.libelle(axe_x), yaxis_title=index.libelle(axe_y))
+    return fig
+
+
+def figure_distribution_score(agregat, seuil_electoral, annee):
+    """Histogramme (éventuellement partiel) du score électoral simulé à l'horizon"""
+    centres = (BORNES_SCORE[:-1] + BORNES_SCORE[1:]) / 2
+    fig_score = go.Figure(go.Bar(x=centres, y=agregat.histogramme_score / max(agregat.n, 1), marker_color='#1f3a60'))
+    fig_score.add_vline(x=seuil_electoral, line_dash='dash', line_color='#e67e22')
+    fig_score.update_layout(title=f"Distribution du score électoral en {annee}",
+                            xaxis_title='Score (%)', yaxis_title='Proportion des trajectoires', height=350)
+    return fig_score
+
@@ -0,0 +1,413 @@
+# flux_evenements.py
+"""Ingestion en continu d'événements (fichier JSONL suivi en ajout seul ou socket locale) vers des tampons bornés.
+
+Chaque ligne est un objet JSON : un événement clé {"annee", "evenement", "impact"} ou un point des
+séries annuelles {"type": "serie", "annee", "membres", "budget_millions", "influence"}, avec
+facultativement "horodatage" (secondes epoch à l'émission) pour mesurer la latence.
+
+Un fil de fond lit la source et écrit dans deux tampons circulaires en colonnes numpy, partagés par
+toutes les sessions du processus. Chaque session ne relit que les lignes reçues depuis sa dernière
+lecture (numéro de séquence) et ne met à jour que les traces concernées de ses figures.
+
+Émission d'un flux de test et mesure du débit et de la latence de bout en bout :
+    python flux_evenements.py evenements.jsonl --debit 500 --duree 60
+    python flux_evenements.py tcp://127.0.0.1:8765 --mesurer --debit 2000 --duree 10
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from statistiques_mesures import centiles
+
+# Source du flux : chemin d'un fichier JSONL ou tcp://hote:port (socket locale en écoute)
+VARIABLE_FLUX = "DL_FLUX_EVENEMENTS"
+CAPACITE_DEFAUT = 10_000
+SCHEMA_EVENEMENTS = {'annee': np.int64, 'evenement': object, 'impact': np.float64,
+                     'horodatage': np.float64, 'recu': np.float64}
+SCHEMA_SERIES = {'annee': np.int64, 'membres': np.float64, 'budget_millions': np.float64,
+                 'influence': np.float64, 'horodatage': np.float64, 'recu': np.float64}
+COLONNES_SERIES = ('membres', 'budget_millions', 'influence')
+
+
+class TamponCirculaire:
+    """Tampon borné en colonnes numpy : une fois plein, les lignes les plus anciennes sont écrasées"""
+
+    def __init__(self, capacite, schema):
+        self.capacite = capacite
+        self.schema = dict(schema)
+        self._colonnes = {nom: np.full(capacite, None if dtype is object else 0, dtype=dtype)
+                          for nom, dtype in self.schema.items()}
+        self._verrou = threading.Lock()
+        # Lignes reçues depuis la création : sert de numéro de séquence aux lecteurs
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacite)
+
+    def ajouter(self, colonnes):
+        """Ajoute un lot de lignes {colonne: tableau} ; seules les `capacite` dernières sont conservées"""
+        n = len(next(iter(colonnes.values())))
+        garder = min(n, self.capacite)
+        with self._verrou:
+            positions = (self.total + np.arange(n - garder, n)) % self.capacite
+            for nom, tableau in self._colonnes.items():
+                tableau[positions] = np.asarray(colonnes[nom])[n - garder:]
+            self.total += n
+
+    def depuis(self, sequence):
+        """Lignes reçues après le numéro de séquence et encore présentes, avec le nouveau numéro"""
+        with self._verrou:
+            debut = max(sequence, self.total - self.capacite)
+            positions = np.arange(debut, self.total) % self.capacite
+            return {nom: tableau[positions] for nom, tableau in self._colonnes.items()}, self.total
+
+    def colonnes(self):
+        """Contenu du tampon, de la ligne la plus ancienne à la plus récente"""
+        return self.depuis(0)[0]
+
+
+class SourceJSONL:
+    """Fichier JSONL en ajout seul, suivi à la manière de `tail -f` (relu depuis le début s'il est remplacé)"""
+
+    def __init__(self, chemin, octets_max=1 << 22):
+        self.chemin = chemin
+        self.description = f'fichier {chemin}'
+        self.octets_max = octets_max
+        self.position = 0
+        self._inode = None
+        self._reste = b''
+
+    def lire(self):
+        try:
+            stat = os.stat(self.chemin)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self._inode or stat.st_size < self.position:
+            self._inode, self.position, self._reste = stat.st_ino, 0, b''
+        if stat.st_size == self.position:
+            return []
+        with open(self.chemin, 'rb') as f:
+            f.seek(self.position)
+            bloc = f.read(self.octets_max)
+        self.position += len(bloc)
+        # La dernière ligne peut être en cours d'écriture : elle est gardée jusqu'à son saut de ligne
+        lignes = (self._reste + bloc).split(b'\n')
+        self._reste = lignes.pop()
+        return lignes
+
+    def fermer(self):
+        pass
+
+
+class _ServeurLocal(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SourceSocket:
+    """Socket TCP locale en écoute : chaque connexion envoie des événements JSON, un par ligne"""
+
+    def __init__(self, hote='127.0.0.1', port=0, lignes_max=100_000):
+        self.lignes_max = lignes_max
+        self._file = file = queue.SimpleQueue()
+
+        class Lecteur(socketserver.StreamRequestHandler):
+            def handle(self):
+                for ligne in self.rfile:
+                    file.put(ligne)
+
+        self._serveur = _ServeurLocal((hote, port), Lecteur)
+        self.adresse = self._serveur.server_address
+        self.description = f'socket tcp://{self.adresse[0]}:{self.adresse[1]}'
+        threading.Thread(target=self._serveur.serve_forever, name='flux-socket', daemon=True).start()
+
+    def lire(self):
+        lignes = []
+        try:
+            while len(lignes) < self.lignes_max:
+                lignes.append(self._file.get_nowait())
+        except queue.Empty:
+            pass
+        return lignes
+
+    def fermer(self):
+        self._serveur.shutdown()
+        self._serveur.server_close()
+
+
+def ouvrir_source_flux(uri):
+    """Source du flux : tcp://hote:port (socket en écoute) ou chemin d'un fichier JSONL"""
+    if uri.startswith('tcp://'):
+        hote, _, port = uri[len('tcp://'):].rpartition(':')
+        return SourceSocket(hote or '127.0.0.1', int(port))
+    return SourceJSONL(uri)
+
+
+def decoder(lignes):
+    """Lignes JSON valides converties en tuples (événements clés, points de séries) ; nombre de rejets"""
+    evenements, series, rejets = [], [], 0
+    for ligne in lignes:
+        if not ligne.strip():
+            continue
+        try:
+            e = json.loads(ligne)
+            horodatage = float(e.get('horodatage', np.nan))
+            if e.get('type', 'evenement' if 'evenement' in e else 'serie') == 'evenement':
+                evenements.append((int(e['annee']), str(e['evenement']), float(e.get('impact', np.nan)),
+                                   horodatage))
+            else:
+                series.append((int(e['annee']), *(float(e.get(c, np.nan)) for c in COLONNES_SERIES),
+                               horodatage))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            rejets += 1
+    return evenements, series, rejets
+
+
+def _en_colonnes(lignes, schema, recu):
+    colonnes = dict(zip(schema, map(list, zip(*lignes))))
+    colonnes['recu'] = np.full(len(lignes), recu)
+    return {nom: np.asarray(colonnes[nom], dtype=dtype) for nom, dtype in schema.items()}
+
+
+class FluxEvenements:
+    """Fil de fond lisant une source vers deux tampons circulaires (événements clés et points de séries)"""
+
+    def __init__(self, source, capacite=CAPACITE_DEFAUT, intervalle=0.05):
+        self.source = source
+        self.intervalle = intervalle
+        self.evenements = TamponCirculaire(capacite, SCHEMA_EVENEMENTS)
+        self.series = TamponCirculaire(capacite, SCHEMA_SERIES)
+        self.rejets = 0
+        self.debut = time.time()
+        # (instant, lignes acceptées) par lot, pour le débit sur une fenêtre glissante
+        self._lots = deque(maxlen=10_000)
+        self._arret = threading.Event()
+        self._fil = None
+
+    def demarrer(self):
+        if self._fil is None:
+            self._fil = threading.Thread(target=self._boucle, name='flux-evenements', daemon=True)
+            self._fil.start()
+        return self
+
+    def arreter(self):
+        self._arret.set()
+        if self._fil is not None:
+            self._fil.join()
+        self.source.fermer()
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            lignes = self.source.lire()
+            if lignes:
+                self.ingerer(lignes)
+            else:
+                self._arret.wait(self.intervalle)
+
+    def ingerer(self, lignes):
+        """Décode un lot de lignes et l'ajoute aux tampons ; retourne le nombre de lignes acceptées"""
+        evenements, series, rejets = decoder(lignes)
+        recu = time.time()
+        if evenements:
+            self.evenements.ajouter(_en_colonnes(evenements, SCHEMA_EVENEMENTS, recu))
+        if series:
+            self.series.ajouter(_en_colonnes(series, SCHEMA_SERIES, recu))
+        self.rejets += rejets
+        self._lots.append((recu, len(evenements) + len(series)))
+        return len(evenements) + len(series)
+
+    def debit(self, fenetre_s=10.0):
+        """Lignes acceptées par seconde sur la dernière fenêtre"""
+        maintenant = time.time()
+        lots = list(self._lots)
+        n = sum(nombre for instant, nombre in lots if instant >= maintenant - fenetre_s)
+        return n / min(fenetre_s, max(maintenant - self.debut, 1e-9))
+
+    def metriques(self, fenetre_s=10.0):
+        """Lignes reçues, rejets, débit et latence d'ingestion (émission -> tampon) des lignes en mémoire"""
+        colonnes = [t.colonnes() for t in (self.evenements, self.series)]
+        latences = np.concatenate([c['recu'] - c['horodatage'] for c in colonnes])
+        latences = latences[np.isfinite(latences)]
+        return {'recus': self.evenements.total + self.series.total, 'rejets': self.rejets,
+                'en_memoire': len(self.evenements) + len(self.series), 'debit_s': self.debit(fenetre_s),
+                **statistiques_latence(latences, 'latence_ingestion')}
+
+
+def statistiques_latence(latences, prefixe):
+    """Médiane, 95e et 99e centiles d'un tableau de latences (NaN s'il est vide)"""
+    return {f'{prefixe}_{nom}_s': v for nom, v in centiles(latences, vide=np.nan).items()}
+
+
+class VueChronologie:
+    """Figures de la chronologie d'une session, tenues à jour à partir des tampons du flux"""
+
+    def __init__(self, flux, figures, annees, membres, budget, influence, n_evenements, reduction=None):
+        import pandas as pd
+        self.flux = flux
+        self.figures = figures
+        self.series = pd.DataFrame({'membres': membres, 'budget_millions': budget, 'influence': influence},
+                                   index=pd.Index(annees, name='annee'), dtype=np.float64)
+        # Période, points par série et méthode (arguments de StoreSeries.requete) des traces affichées
+        self.reduction = dict(reduction or {})
+        self.n_fixes = n_evenements
+        self.n_flux = 0
+        self.sequences = {'evenements': 0, 'series': 0}
+        self.latences = deque(maxlen=10_000)
+
+    def actualiser(self):
+        """Applique les lignes arrivées depuis la dernière lecture ; retourne les traces modifiées
+        et les horodatages d'émission des lignes appliquées"""
+        from figures import etendre_timeline, mettre_a_jour_evolution
+        series, self.sequences['series'] = self.flux.series.depuis(self.sequences['series'])
+        evenements, self.sequences['evenements'] = self.flux.evenements.depuis(self.sequences['evenements'])
+        modifiees = []
+        if len(series['annee']):
+            colonnes = [c for c in COLONNES_SERIES if np.isfinite(series[c]).any()]
+            self._fusionner(series, colonnes)
+            mettre_a_jour_evolution(self.figures['evolution'], self._reduites(colonnes), colonnes)
+            modifiees += [f'evolution/{c}' for c in colonnes]
+        if len(evenements['annee']):
+            n = self.n_flux + len(evenements['annee'])
+            retires = max(0, n - self.flux.evenements.capacite)
+            etendre_timeline(self.figures['evenements'], evenements, self.n_fixes, retires)
+            self.n_flux = n - retires
+            modifiees.append('evenements')
+        return modifiees, np.concatenate([series['horodatage'], evenements['horodatage']])
+
+    def _fusionner(self, series, colonnes):
+        """Dernière valeur reçue par année et par colonne (les valeurs absentes ne remplacent rien)"""
+        for colonne in colonnes:
+            valeurs = series[colonne]
+            connues = np.isfinite(valeurs)
+            # À année égale, la ligne la plus récente l'emporte
+            annees, derniers = np.unique(series['annee'][connues][::-1], return_index=True)
+            self.series = self.series.reindex(self.series.index.union(annees))
+            self.series.loc[annees, colonne] = valeurs[connues][::-1][derniers]
+
+    def _reduites(self, colonnes):
+        """Séries complètes des colonnes touchées, réduites comme celles de la figure initiale"""
+        from series_temporelles import StoreSeries
+        store = StoreSeries.depuis_colonnes(self.series.index.to_numpy(),
+                                            {colonne: self.series[colonne].to_numpy() for colonne in colonnes})
+        return store.requete(noms=colonnes, **self.reduction)
+
+    def enregistrer_affichage(self, horodatages, instant=None):
+        """Latence de bout en bout (émission -> figure envoyée au navigateur) des lignes affichées"""
+        latences = (instant or time.time()) - horodatages
+        self.latences.extend(latences[np.isfinite(latences)])
+
+    def metriques(self):
+        return statistiques_latence(np.fromiter(self.latences, dtype=np.float64), 'latence_affichage')
+
+
+class CacheFlux:
+    """Flux démarrés une seule fois par processus, indexés par source et capacité"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._flux = {}
+
+    def obtenir(self, uri, capacite=CAPACITE_DEFAUT):
+        with self._verrou:
+            cle = (uri, capacite)
+            if cle not in self._flux:
+                self._flux[cle] = FluxEvenements(ouvrir_source_flux(uri), capacite).demarrer()
+            return self._flux[cle]
+
+
+_CACHE = CacheFlux()
+
+
+def flux_en_cache(uri=None, capacite=CAPACITE_DEFAUT):
+    """Flux partagé du processus pour la source demandée (ou DL_FLUX_EVENEMENTS), None si aucune source"""
+    uri = uri or os.environ.get(VARIABLE_FLUX)
+    return _CACHE.obtenir(uri, capacite) if uri else None
+
+
+def emettre(destination, debit=500, duree=10.0, graine=0, proportion_series=0.2):
+    """Écrit un flux synthétique horodaté vers un fichier JSONL ou une socket tcp://hote:port"""
+    from donnees_synthetiques import generer_flux
+    n = int(debit * duree)
+    lignes = generer_flux(n, graine, proportion_series)
+    if destination.startswith('tcp://'):
+        hote, _, port = destination[len('tcp://'):].rpartition(':')
+        connexion = socket.create_connection((hote or '127.0.0.1', int(port)))
+        ecrire, fermer = (lambda b: connexion.sendall(b)), connexion.close
+    else:
+        fichier = open(destination, 'ab', buffering=0)
+        ecrire, fermer = fichier.write, fichier.close
+    debut = time.perf_counter()
+    try:
+        # Lots de 10 ms pour tenir le débit demandé
+        taille_lot = max(1, int(debit / 100))
+        for i in range(0, n, taille_lot):
+            attente = debut + i / debit - time.perf_counter()
+            if attente > 0:
+                time.sleep(attente)
+            maintenant = time.time()
+            ecrire(b''.join(json.dumps({**ligne, 'horodatage': maintenant}, ensure_ascii=False).encode() + b'\n'
+                            for ligne in lignes[i:i + taille_lot]))
+    finally:
+        fermer()
+    return n
+
+
+def mesurer(uri, debit, duree, rafraichissement=1.0, capacite=CAPACITE_DEFAUT, graine=0):
+    """Émet un flux vers la source, l'ingère et actualise une vue comme le ferait le dashboard"""
+    from figures import figures_chronologie
+    from sources_donnees import obtenir_donnees
+    donnees = obtenir_donnees()
+    flux = FluxEvenements(ouvrir_source_flux(uri), capacite).demarrer()
+    destination = f'tcp://{flux.source.adresse[0]}:{flux.source.adresse[1]}' if uri.startswith('tcp://') else uri
+    vue = VueChronologie(flux, figures_chronologie.__wrapped__(
+        donnees.series_chronologiques.requete(), donnees.evenements_cles), donnees.annees_chrono, donnees.evolution_membres, donnees.evolution_budget,
+        donnees.influence_politique, len(donnees.evenements_cles))
+    emetteur = threading.Thread(target=emettre, args=(destination, debit, duree, graine))
+    emetteur.start()
+    durees = []
+    while emetteur.is_alive():
+        time.sleep(rafraichissement)
+        debut = time.perf_counter()
+        _, horodatages = vue.actualiser()
+        durees.append(time.perf_counter() - debut)
+        vue.enregistrer_affichage(horodatages)
+    time.sleep(2 * flux.intervalle + 0.1)
+    _, horodatages = vue.actualiser()
+    vue.enregistrer_affichage(horodatages)
+    flux.arreter()
+    return {**flux.metriques(fenetre_s=duree), **vue.metriques(),
+            'actualisation_moyenne_s': float(np.mean(durees)) if durees else np.nan}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Émission d'un flux d'événements de test et mesure de bout en bout")
+    parser.add_argument('destination', help="Fichier JSONL ou tcp://hote:port")
+    parser.add_argument('--debit', type=float, default=500, help="Événements émis par seconde")
+    parser.add_argument('--duree', type=float, default=10.0, help="Durée d'émission (s)")
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--mesurer', action='store_true',
+                        help="Ingère aussi le flux et mesure débit et latences (émission -> tampon -> figure)")
+    parser.add_argument('--rafraichissement', type=float, default=1.0, help="Intervalle d'actualisation (s)")
+    args = parser.parse_args()
+    if not args.mesurer:
+        n = emettre(args.destination, args.debit, args.duree, args.graine)
+        print(f"{n} événements émis vers {args.destination}")
+        return
+    resultats = mesurer(args.destination, args.debit, args.duree, args.rafraichissement, graine=args.graine)
+    print(f"{resultats['recus']} lignes reçues ({resultats['rejets']} rejets), {resultats['debit_s']:.0f} lignes/s")
+    for etape in ('latence_ingestion', 'latence_affichage'):
+        print(f"{etape:<18} p50 {1000 * resultats[f'{etape}_p50_s']:8.1f} ms   "
+              f"p95 {1000 * resultats[f'{etape}_p95_s']:8.1f} ms   p99 {1000 * resultats[f'{etape}_p99_s']:8.1f} ms")
+    print(f"Actualisation des figures : {1000 * resultats['actualisation_moyenne_s']:.1f} ms en moyenne")
+
+
+if __name__ == '__main__':
+    main()
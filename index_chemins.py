@@ -0,0 +1,431 @@
+# index_chemins.py
+"""Index des chemins et des communautés du réseau d'influence : « comment X est-il relié à Y ? ».
+
+Construit une fois par graphe et partagé par les sessions :
+- une partition en communautés (Louvain, networkx) du graphe non orienté ;
+- des tables de distances depuis et vers quelques acteurs repères, orientées et non orientées.
+Une requête de chemin est un A* guidé par les repères (ALT : bornes par inégalité triangulaire),
+qui n'explore qu'une petite partie du graphe ; les voisinages à k sauts sont des parcours en
+largeur vectorisés sur les tableaux CSR. Les poids des relations sont des longueurs pour les
+chemins, comme pour les centralités (les intermédiaires d'un plus court chemin sont ceux que
+mesure l'intermédiarité), et des intensités pour les communautés.
+
+Quand les relations changent, l'index du nouveau graphe est dérivé du précédent : seuls les repères
+dont une distance peut changer sont recalculés, et seuls les acteurs proches des relations ajoutées,
+retirées ou modifiées choisissent à nouveau leur communauté (les autres communautés restent groupées).
+"""
+import time
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from cache_calculs import CacheLRU
+
+REPERES_DEFAUT = 16
+SAUTS_MAX = 3
+VOISINS_MAX = 500
+# Au-delà de cette part d'acteurs à repartitionner ou de tables de repères à recalculer, l'index est
+# reconstruit plutôt que dérivé
+PART_MAX_INCREMENTALE = 0.2
+# Au-delà de ce degré, une extrémité de relation modifiée choisit à nouveau sa communauté sans ses voisins
+DEGRE_MAX_VOISINS_MOBILES = 100
+TOLERANCE = 1e-9
+
+
+@dataclass
+class Chemin:
+    """Plus court chemin entre deux acteurs, et coût de la requête"""
+    noeuds: list
+    longueur: float
+    explores: int
+    duree_s: float
+
+    @property
+    def sauts(self):
+        return len(self.noeuds) - 1
+
+    @property
+    def intermediaires(self):
+        return self.noeuds[1:-1]
+
+
+def _symetriser(graphe):
+    """Arêtes des deux sens de chaque relation ; la plus courte quand les deux sens existent"""
+    u = np.concatenate([graphe.sources, graphe.indices])
+    v = np.concatenate([graphe.indices, graphe.sources])
+    w = np.concatenate([graphe.poids, graphe.poids])
+    cles = u * graphe.n + v
+    ordre = np.lexsort((w, cles))
+    premiers = np.ones(len(ordre), dtype=bool)
+    premiers[1:] = cles[ordre][1:] != cles[ordre][:-1]
+    ordre = ordre[premiers]
+    return csr_matrix((w[ordre], (u[ordre], v[ordre])), shape=(graphe.n, graphe.n))
+
+
+def _paires(graphe):
+    """Paires non orientées (a <= b) avec l'intensité cumulée des deux sens"""
+    a = np.minimum(graphe.sources, graphe.indices)
+    b = np.maximum(graphe.sources, graphe.indices)
+    cles, inverse = np.unique(a * graphe.n + b, return_inverse=True)
+    return cles // graphe.n, cles % graphe.n, np.bincount(inverse.ravel(), weights=graphe.poids)
+
+
+def _aretes(indptr, noeuds):
+    """Positions CSR de toutes les relations sortant des noeuds donnés, sans boucle Python"""
+    debuts = indptr[noeuds]
+    longueurs = indptr[noeuds + 1] - debuts
+    decalages = np.repeat(debuts - np.concatenate([[0], np.cumsum(longueurs)[:-1]]), longueurs)
+    return decalages + np.arange(longueurs.sum())
+
+
+def louvain(n, a, b, w, noeuds, graine=42):
+    """Communautés (Louvain) des noeuds donnés, sur les paires dont les deux extrémités en font partie"""
+    import networkx as nx
+    G = nx.Graph()
+    G.add_nodes_from(noeuds.tolist())
+    G.add_weighted_edges_from(zip(a.tolist(), b.tolist(), w.tolist()))
+    etiquettes = np.full(n, -1, dtype=np.int64)
+    for i, communaute in enumerate(nx.community.louvain_communities(G, weight='weight', seed=graine)):
+        etiquettes[list(communaute)] = i
+    return etiquettes
+
+
+def modularite(n, a, b, w, etiquettes):
+    """Modularité de la partition (formule de networkx), en une passe vectorisée"""
+    total = w.sum()
+    if total == 0:
+        return 0.0
+    degres = np.bincount(a, weights=w, minlength=n) + np.bincount(b, weights=w, minlength=n)
+    interne = w[etiquettes[a] == etiquettes[b]].sum()
+    return float(interne / total - ((np.bincount(etiquettes, weights=degres) / (2 * total)) ** 2).sum())
+
+
+def _reperes_touches(distances, u, v, w, ajout, tol=TOLERANCE):
+    """Repères dont les distances peuvent changer avec ces relations (distances d'avant ; -1 : acteur nouveau)"""
+    if len(u) == 0:
+        return np.zeros(len(distances), dtype=bool)
+    du = np.where(u >= 0, distances[:, u], np.inf)
+    dv = np.where(v >= 0, distances[:, v], np.inf)
+    with np.errstate(invalid='ignore'):
+        if ajout:
+            # Nouveau chemin strictement plus court
+            change = np.isfinite(du) & (du + w < dv - tol)
+        else:
+            # Relation retirée située sur un plus court chemin
+            change = np.isfinite(du) & (np.abs(du + w - dv) <= tol)
+    return change.any(axis=1)
+
+
+def _completer(distances, u, v, w, nouveaux):
+    """Distances des acteurs nouveaux par relaxation des relations ajoutées qui y mènent (sur place)"""
+    vers_nouveau = nouveaux[v]
+    u, v, w = u[vers_nouveau], v[vers_nouveau], w[vers_nouveau]
+    for _ in range(int(nouveaux.sum())):
+        avant = distances[:, v].copy()
+        np.minimum.at(distances.T, v, (distances[:, u] + w).T)
+        if np.array_equal(avant, distances[:, v]):
+            break
+
+
+def differences(avant, apres):
+    """Relations retirées et ajoutées entre deux graphes (un changement de poids compte pour les deux),
+    avec les positions de leurs extrémités dans chaque graphe (-1 si l'acteur n'y figure pas)"""
+    def nommees(graphe):
+        return pd.Series(graphe.poids, index=pd.MultiIndex.from_arrays(
+            [graphe.noeuds[graphe.sources], graphe.noeuds[graphe.indices]]))
+
+    jointes = pd.concat({'avant': nommees(avant), 'apres': nommees(apres)}, axis=1)
+    modifiees = jointes['avant'].to_numpy() != jointes['apres'].to_numpy()
+    retraits = jointes[jointes['avant'].notna().to_numpy() & modifiees]
+    ajouts = jointes[jointes['apres'].notna().to_numpy() & modifiees]
+    index_avant, index_apres = pd.Index(avant.noeuds), pd.Index(apres.noeuds)
+
+    def positions(aretes, colonne):
+        sources = aretes.index.get_level_values(0)
+        cibles = aretes.index.get_level_values(1)
+        return {'u_avant': index_avant.get_indexer(sources), 'v_avant': index_avant.get_indexer(cibles),
+                'u_apres': index_apres.get_indexer(sources), 'v_apres': index_apres.get_indexer(cibles),
+                'poids': aretes[colonne].to_numpy(dtype=np.float64)}
+
+    return positions(retraits, 'avant'), positions(ajouts, 'apres')
+
+
+class IndexChemins:
+    """Communautés, tables de distances des repères et requêtes de chemins et de voisinages d'un graphe"""
+
+    def __init__(self, graphe, n_reperes=REPERES_DEFAUT, graine=42):
+        self.graphe = graphe
+        self.n = graphe.n
+        self.n_reperes = n_reperes
+        self.graine = graine
+        self._A = graphe.matrice()
+        self._AT = self._A.T.tocsr()
+        self._S = _symetriser(graphe)
+        self._paires = _paires(graphe)
+        self.n_composantes, self.composantes = connected_components(self._S, directed=False)
+        sortant, entrant = graphe.degres()
+        self.degres = sortant + entrant
+        self.positions = {noeud: i for i, noeud in enumerate(graphe.noeuds)}
+        self.reperes = np.empty(0, dtype=np.int64)
+        self.bilan = {}
+
+    @classmethod
+    def construire(cls, graphe, n_reperes=REPERES_DEFAUT, graine=42):
+        """Index complet : repères choisis par éloignement maximal, communautés sur tout le graphe"""
+        index = cls(graphe, n_reperes, graine)
+        index._indexer(time.perf_counter(), graphe.m)
+        return index
+
+    def _indexer(self, debut, relations_modifiees):
+        self._choisir_reperes()
+        self.communautes = louvain(self.n, *self._paires, np.arange(self.n), self.graine)
+        self.bilan = {'mode': 'complet', 'relations_modifiees': relations_modifiees,
+                      'reperes_recalcules': 3 * len(self.reperes), 'acteurs_regroupes': self.n,
+                      'duree_s': time.perf_counter() - debut}
+
+    def _choisir_reperes(self):
+        """Une composante sans repère passe avant tout, en commençant par ses acteurs de plus fort
+        degré ; ensuite, chaque repère est l'acteur le plus éloigné des précédents"""
+        k = min(self.n_reperes, self.n)
+        reperes = []
+        lignes = np.empty((k, self.n))
+        eloignement = np.full(self.n, np.inf)
+        for i in range(k):
+            non_couverts = np.isinf(eloignement)
+            non_couverts[reperes] = False
+            if non_couverts.any():
+                score = np.where(non_couverts, self.degres, -1)
+            else:
+                score = eloignement.copy()
+                score[reperes] = -1
+            reperes.append(int(np.argmax(score)))
+            lignes[i] = dijkstra(self._S, directed=True, indices=reperes[-1])
+            eloignement = np.minimum(eloignement, lignes[i])
+        self.reperes = np.asarray(reperes, dtype=np.int64)
+        self.non_oriente = lignes
+        self.depuis = dijkstra(self._A, directed=True, indices=self.reperes).reshape(k, self.n)
+        self.vers = dijkstra(self._AT, directed=True, indices=self.reperes).reshape(k, self.n)
+
+    def mettre_a_jour(self, graphe):
+        """Index d'un nouveau graphe (relations modifiées), dérivé de celui-ci. Au-delà de
+        PART_MAX_INCREMENTALE des acteurs à regrouper, l'index est reconstruit entièrement ; au-delà
+        de cette part des tables de repères à recalculer, seuls les repères sont choisis à nouveau"""
+        if graphe.empreinte == self.graphe.empreinte:
+            return self
+        debut = time.perf_counter()
+        retraits, ajouts = differences(self.graphe, graphe)
+        index = IndexChemins(graphe, self.n_reperes, self.graine)
+        correspondance = pd.Index(self.graphe.noeuds).get_indexer(graphe.noeuds)
+        modifiees = len(retraits['poids']) + len(ajouts['poids'])
+        mobiles = index._acteurs_mobiles(correspondance, retraits, ajouts)
+        if mobiles.sum() > PART_MAX_INCREMENTALE * index.n:
+            index._indexer(debut, modifiees)
+            return index
+        tables = index._reprendre_tables(self, correspondance, retraits, ajouts)
+        recalcules = sum(int(touches.sum()) for _, touches in tables.values())
+        if recalcules > PART_MAX_INCREMENTALE * 3 * len(index.reperes):
+            # Presque toutes les tables à reprendre : autant choisir à nouveau les repères
+            index._choisir_reperes()
+            recalcules = 3 * len(index.reperes)
+        else:
+            for nom, (table, touches) in tables.items():
+                if touches.any():
+                    matrice = {'depuis': index._A, 'vers': index._AT, 'non_oriente': index._S}[nom]
+                    table[touches] = dijkstra(matrice, directed=True,
+                                              indices=index.reperes[touches]).reshape(-1, index.n)
+                setattr(index, nom, table)
+        index._deriver_communautes(self, correspondance, mobiles)
+        index.bilan = {'mode': 'incremental', 'relations_modifiees': modifiees,
+                       'reperes_recalcules': recalcules, 'acteurs_regroupes': int(mobiles.sum()),
+                       'duree_s': time.perf_counter() - debut}
+        return index
+
+    def _acteurs_mobiles(self, correspondance, retraits, ajouts):
+        """Extrémités des relations modifiées, voisins de celles de degré modéré, et acteurs nouveaux"""
+        extremites = np.concatenate([retraits['u_apres'], retraits['v_apres'], ajouts['u_apres'], ajouts['v_apres']])
+        extremites = np.unique(extremites[extremites >= 0])
+        mobiles = correspondance < 0
+        mobiles[extremites] = True
+        moderees = extremites[np.diff(self._S.indptr)[extremites] <= DEGRE_MAX_VOISINS_MOBILES]
+        mobiles[self._S.indices[_aretes(self._S.indptr, moderees)]] = True
+        return mobiles
+
+    def _reprendre_tables(self, base, correspondance, retraits, ajouts):
+        """Tables de l'index précédent réordonnées selon les acteurs du nouveau graphe, avec les lignes
+        des repères dont une distance peut changer (à recalculer) : {nom: (table, touches)}"""
+        positions = pd.Index(self.graphe.noeuds).get_indexer(base.graphe.noeuds[base.reperes])
+        conserves = positions >= 0
+        reperes = list(positions[conserves])
+        # Repères disparus remplacés par les acteurs de plus fort degré
+        for candidat in np.argsort(-self.degres, kind='stable'):
+            if len(reperes) >= min(self.n_reperes, self.n):
+                break
+            if candidat not in reperes:
+                reperes.append(int(candidat))
+        self.reperes = np.asarray(reperes, dtype=np.int64)
+        colonnes = np.where(correspondance >= 0, correspondance, base.n)
+        nouveaux = correspondance < 0
+        tables = {}
+        for nom, sens in (('depuis', ((0, 1),)), ('vers', ((1, 0),)), ('non_oriente', ((0, 1), (1, 0)))):
+            anciennes = getattr(base, nom)[conserves]
+            table = np.empty((len(self.reperes), self.n))
+            # Acteurs nouveaux : distance infinie, puis complétée par les relations ajoutées
+            prolongees = np.concatenate([anciennes, np.full((len(anciennes), 1), np.inf)], axis=1)
+            table[:len(anciennes)] = prolongees[:, colonnes]
+            touches = np.ones(len(self.reperes), dtype=bool)
+            touches[:len(anciennes)] = False
+            for i, j in sens:
+                extremites = (ajouts['u_apres'], ajouts['v_apres'])
+                _completer(table[:len(anciennes)], extremites[i], extremites[j], ajouts['poids'], nouveaux)
+            for i, j in sens:
+                # Retraits testés sur les distances d'avant, ajouts sur les distances complétées
+                extremites = (retraits['u_avant'], retraits['v_avant'])
+                touches[:len(anciennes)] |= _reperes_touches(anciennes, extremites[i], extremites[j],
+                                                             retraits['poids'], ajout=False)
+                extremites = (ajouts['u_apres'], ajouts['v_apres'])
+                touches[:len(anciennes)] |= _reperes_touches(table[:len(anciennes)], extremites[i], extremites[j],
+                                                             ajouts['poids'], ajout=True)
+            tables[nom] = (table, touches)
+        return tables
+
+    def _deriver_communautes(self, base, correspondance, mobiles):
+        """Louvain sur un graphe contracté : chaque communauté précédente (sans ses acteurs mobiles) y
+        devient un super-noeud, les acteurs mobiles restent individuels et choisissent leur communauté"""
+        etiquettes = np.where(correspondance >= 0, base.communautes[np.maximum(correspondance, 0)], -1)
+        _, fixes = np.unique(etiquettes[~mobiles], return_inverse=True)
+        contractes = np.empty(self.n, dtype=np.int64)
+        contractes[~mobiles] = fixes.ravel()
+        contractes[mobiles] = fixes.max(initial=-1) + 1 + np.arange(mobiles.sum())
+        n_contractes = int(contractes.max()) + 1
+        a, b, w = self._paires
+        ca, cb = np.minimum(contractes[a], contractes[b]), np.maximum(contractes[a], contractes[b])
+        cles, inverse = np.unique(ca * n_contractes + cb, return_inverse=True)
+        partition = louvain(n_contractes, cles // n_contractes, cles % n_contractes,
+                            np.bincount(inverse.ravel(), weights=w), np.arange(n_contractes), self.graine)
+        self.communautes = np.unique(partition[contractes], return_inverse=True)[1].ravel()
+
+    @cached_property
+    def modularite(self):
+        return modularite(self.n, *self._paires, self.communautes)
+
+    def acteurs_proposes(self, n_max=1000):
+        """Acteurs des listes de sélection, par ordre alphabétique : tous si la liste reste courte,
+        sinon les n_max mieux connectés"""
+        retenus = self.graphe.noeuds
+        if self.n > n_max:
+            retenus = retenus[np.argsort(-self.degres, kind='stable')[:n_max]]
+        return sorted(retenus.tolist(), key=str)
+
+    @cached_property
+    def table_communautes(self):
+        """Une ligne par communauté : taille et principaux acteurs (plus forts degrés)"""
+        ordre = np.lexsort((-self.degres, self.communautes))
+        table = pd.DataFrame({'Communauté': self.communautes[ordre], 'Acteur': self.graphe.noeuds[ordre]})
+        principaux = table.groupby('Communauté').head(5).groupby('Communauté')['Acteur'].agg(
+            lambda acteurs: ', '.join(map(str, acteurs)))
+        return (pd.DataFrame({'Acteurs': np.bincount(self.communautes), 'Principaux acteurs': principaux})
+                .rename_axis('Communauté').reset_index().sort_values('Acteurs', ascending=False, ignore_index=True))
+
+    def position(self, acteur):
+        if acteur not in self.positions:
+            raise KeyError(f"acteur inconnu : {acteur}")
+        return self.positions[acteur]
+
+    def bornes(self, source, cible, oriente=False):
+        """Encadrement immédiat de la distance par les repères (inégalité triangulaire) ;
+        une borne inférieure infinie signifie qu'aucun chemin n'existe"""
+        s, t = self.position(source), self.position(cible)
+        with np.errstate(invalid='ignore'):
+            if oriente:
+                basses = np.fmax(self.depuis[:, t] - self.depuis[:, s], self.vers[:, s] - self.vers[:, t])
+                haute = np.min(self.vers[:, s] + self.depuis[:, t], initial=np.inf)
+            else:
+                basses = np.abs(self.non_oriente[:, s] - self.non_oriente[:, t])
+                haute = np.min(self.non_oriente[:, s] + self.non_oriente[:, t], initial=np.inf)
+        return float(np.where(np.isnan(basses), 0.0, basses).max(initial=0.0)), float(haute)
+
+    def chemin(self, source, cible, oriente=False):
+        """Plus court chemin de source à cible ; None s'il n'en existe pas.
+
+        Deux recherches de Dijkstra (scipy) partent de la source et de la cible, bornées chacune à la
+        moitié de la borne haute des repères ; le chemin passe par la relation qui relie les deux
+        boules au moindre coût. Seuls les acteurs à mi-distance des extrémités sont explorés.
+        """
+        debut = time.perf_counter()
+        s, t = self.position(source), self.position(cible)
+        if s == t:
+            return Chemin(noeuds=[source], longueur=0.0, explores=1, duree_s=time.perf_counter() - debut)
+        if not oriente and self.composantes[s] != self.composantes[t]:
+            return None
+        basse, haute = self.bornes(source, cible, oriente)
+        if np.isinf(basse):
+            return None
+        matrice, inverse = (self._A, self._AT) if oriente else (self._S, self._S)
+        if np.isinf(haute):
+            # Aucun repère ne relie les deux acteurs : recherche complète depuis la source
+            distances, precedents = dijkstra(matrice, directed=True, indices=s, return_predecessors=True)
+            if np.isinf(distances[t]):
+                return None
+            noeuds = [t]
+            while noeuds[-1] != s:
+                noeuds.append(precedents[noeuds[-1]])
+            return Chemin(noeuds=self.graphe.noeuds[noeuds[::-1]].tolist(), longueur=float(distances[t]),
+                          explores=int(np.isfinite(distances).sum()), duree_s=time.perf_counter() - debut)
+        limite = haute / 2 + TOLERANCE
+        depuis_s, precedents_s = dijkstra(matrice, directed=True, indices=s, limit=limite, return_predecessors=True)
+        vers_t, suivants_t = dijkstra(inverse, directed=True, indices=t, limit=limite, return_predecessors=True)
+        # Relations sortant de la boule de la source : u -> v, de coût distance(s, u) + w + distance(v, t)
+        atteints = np.flatnonzero(np.isfinite(depuis_s))
+        aretes = _aretes(matrice.indptr, atteints)
+        origines = np.repeat(atteints, np.diff(matrice.indptr)[atteints])
+        couts = depuis_s[origines] + matrice.data[aretes] + vers_t[matrice.indices[aretes]]
+        meilleure = int(np.argmin(couts))
+        if np.isinf(couts[meilleure]):
+            return None
+        u, v = origines[meilleure], matrice.indices[aretes[meilleure]]
+        noeuds = [u]
+        while noeuds[-1] != s:
+            noeuds.append(precedents_s[noeuds[-1]])
+        noeuds = noeuds[::-1] + [v]
+        while noeuds[-1] != t:
+            noeuds.append(suivants_t[noeuds[-1]])
+        return Chemin(noeuds=self.graphe.noeuds[noeuds].tolist(), longueur=float(couts[meilleure]),
+                      explores=len(atteints) + int(np.isfinite(vers_t).sum()), duree_s=time.perf_counter() - debut)
+
+    def voisinage(self, acteur, sauts=1, sens=None, n_max=VOISINS_MAX):
+        """Acteurs à au plus `sauts` relations (tous sens, ou 'sortant' / 'entrant'), les plus proches et
+        les mieux connectés d'abord, avec leur communauté"""
+        matrice = {None: self._S, 'sortant': self._A, 'entrant': self._AT}[sens]
+        niveaux = np.full(self.n, -1, dtype=np.int64)
+        frontiere = np.array([self.position(acteur)])
+        niveaux[frontiere] = 0
+        atteints = 1
+        for saut in range(1, sauts + 1):
+            voisins = matrice.indices[_aretes(matrice.indptr, frontiere)]
+            frontiere = np.unique(voisins[niveaux[voisins] < 0])
+            if len(frontiere) == 0:
+                break
+            niveaux[frontiere] = saut
+            atteints += len(frontiere)
+            if atteints >= n_max:
+                break
+        retenus = np.flatnonzero(niveaux >= 0)
+        retenus = retenus[np.lexsort((-self.degres[retenus], niveaux[retenus]))][:n_max]
+        return pd.DataFrame({'Acteur': self.graphe.noeuds[retenus], 'Sauts': niveaux[retenus],
+                             'Communauté': self.communautes[retenus], 'Degré': self.degres[retenus]})
+
+
+_CACHE = CacheLRU(capacite=4)
+
+
+def index_chemins_en_cache(graphe):
+    """Index des chemins du graphe, construit une seule fois par processus ; un graphe nouveau dérive
+    son index du dernier utilisé (relations modifiées d'une version à l'autre des données)"""
+    def calculer():
+        precedent = _CACHE.dernier()
+        return precedent.mettre_a_jour(graphe) if precedent is not None else IndexChemins.construire(graphe)
+    return _CACHE.obtenir(graphe.empreinte, calculer)
@@ -0,0 +1,143 @@
+# index_ideologique.py
+"""Index spatial de l'espace de positionnement idéologique : plus proches voisins, rayons et groupes.
+
+Un arbre k-d (scipy cKDTree) est construit une fois par contenu de la table de positionnement,
+sur tous ses axes numériques. Une requête de voisinage coûte O(log n) au lieu d'un calcul des
+distances à tous les partis ; le regroupement (k-moyennes) est mémorisé par nombre de groupes.
+"""
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cache_calculs import CacheLRU
+
+# Axes connus et leurs libellés ; toute autre colonne numérique est un axe supplémentaire
+AXES = {
+    'Economic': 'Libéralisme Économique',   # 10=libéral, 1=étatiste
+    'Societal': 'Progressisme Sociétal',    # 10=progressiste, 1=conservateur
+    'Europe': 'Fédéralisme Européen',       # 10=fédéraliste, 1=souverainiste
+}
+
+
+class Groupes:
+    """Partition des partis en groupes idéologiques (k-moyennes)"""
+
+    def __init__(self, etiquettes, centres):
+        self.etiquettes = etiquettes
+        self.centres = centres
+        self.effectifs = np.bincount(etiquettes, minlength=len(centres))
+
+
+def regrouper(points, n_groupes, graine=0):
+    """Partition des points en n groupes par k-moyennes (initialisation k-means++)"""
+    from scipy.cluster.vq import kmeans2
+    centres, etiquettes = kmeans2(points, n_groupes, seed=graine, minit='++')
+    return Groupes(etiquettes, centres)
+
+
+class IndexIdeologique:
+    """Arbre k-d des positions des partis, avec requêtes par nom de parti ou par point de l'espace"""
+
+    def __init__(self, positionnement, axes=None):
+        from scipy.spatial import cKDTree
+        if axes is None:
+            axes = [c for c in positionnement.columns if c != 'Parti'
+                    and pd.api.types.is_numeric_dtype(positionnement[c])]
+        self.axes = list(axes)
+        table = (positionnement.dropna(subset=self.axes).drop_duplicates('Parti')
+                 .reset_index(drop=True)[['Parti'] + self.axes])
+        self.table = table
+        self.noms = table['Parti'].astype(str).to_numpy(dtype=object)
+        self.points = np.ascontiguousarray(table[self.axes].to_numpy(dtype=np.float64))
+        self._indices = pd.Index(self.noms)
+        self.empreinte = empreinte_positionnement(table)
+        self.arbre = cKDTree(self.points)
+        self._verrou = threading.Lock()
+        self._groupes = {}
+
+    def __len__(self):
+        return len(self.noms)
+
+    def __contains__(self, parti):
+        return parti in self._indices
+
+    def libelle(self, axe):
+        return AXES.get(axe, axe)
+
+    def indice(self, parti):
+        """Position du parti dans l'index (KeyError s'il n'a pas de positionnement)"""
+        return self._indices.get_loc(parti)
+
+    def point(self, reference):
+        """Coordonnées d'un parti (par son nom) ou d'un point donné axe par axe"""
+        if isinstance(reference, str):
+            return self.points[self.indice(reference)]
+        return np.asarray(reference, dtype=np.float64)
+
+    def _resultat(self, indices, distances):
+        resultat = self.table.iloc[indices].reset_index(drop=True)
+        resultat['Distance'] = np.round(distances, 3)
+        return resultat
+
+    def plus_proches(self, reference, k=5):
+        """Les k partis les plus proches de la référence (le parti de référence lui-même exclu)"""
+        exclus = isinstance(reference, str)
+        k_requete = min(k + exclus, len(self))
+        distances, indices = self.arbre.query(self.point(reference), k=k_requete)
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+        if exclus:
+            garder = indices != self.indice(reference)
+            distances, indices = distances[garder][:k], indices[garder][:k]
+        return self._resultat(indices, distances)
+
+    def dans_rayon(self, reference, rayon, n_max=None):
+        """Partis à une distance au plus `rayon` de la référence, du plus proche au plus éloigné"""
+        point = self.point(reference)
+        indices = np.asarray(self.arbre.query_ball_point(point, rayon), dtype=np.int64)
+        if isinstance(reference, str):
+            indices = indices[indices != self.indice(reference)]
+        distances = np.linalg.norm(self.points[indices] - point, axis=1)
+        ordre = np.argsort(distances, kind='stable')[:n_max]
+        return self._resultat(indices[ordre], distances[ordre])
+
+    def effectif_rayon(self, reference, rayon):
+        """Nombre de partis dans le rayon, sans construire la liste (référence exclue)"""
+        n = int(self.arbre.query_ball_point(self.point(reference), rayon, return_length=True))
+        return n - isinstance(reference, str)
+
+    def groupes(self, n_groupes, graine=0):
+        """Groupes idéologiques par k-moyennes, calculés une fois par nombre de groupes et graine"""
+        cle = (min(n_groupes, len(self)), graine)
+        with self._verrou:
+            if cle in self._groupes:
+                return self._groupes[cle]
+        groupes = regrouper(self.points, *cle)
+        with self._verrou:
+            self._groupes[cle] = groupes
+        return groupes
+
+    def indices(self, partis):
+        """Positions des partis dans l'index (-1 pour un parti sans positionnement)"""
+        return self._indices.get_indexer(list(partis))
+
+    def lignes(self, partis):
+        """Positions des partis demandés (ceux sans positionnement sont ignorés)"""
+        indices = self.indices(partis)
+        return self.table.iloc[indices[indices >= 0]].reset_index(drop=True)
+
+
+def empreinte_positionnement(positionnement):
+    """Hash du contenu de la table de positionnement (noms, axes et valeurs)"""
+    h = hashlib.sha256(','.join(map(str, positionnement.columns)).encode())
+    h.update(pd.util.hash_pandas_object(positionnement, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+_CACHE = CacheLRU(capacite=4)
+
+
+def index_en_cache(positionnement):
+    """Index du positionnement, construit une seule fois par processus pour un contenu donné"""
+    return _CACHE.obtenir(empreinte_positionnement(positionnement), lambda: IndexIdeologique(positionnement))
@@ -0,0 +1,175 @@
+# instrumentation.py
+"""Mesure des exécutions du dashboard : temps par section et par étape, allocations et taille des figures.
+
+Désactivée par défaut : `etape` renvoie alors un contexte vide partagé et `section` laisse les
+fonctions inchangées. Activation :
+    DL_INSTRUMENTATION=1          temps mur et CPU par étape, taille des figures
+    DL_INSTRUMENTATION=memoire    idem, avec le pic d'allocation (tracemalloc, nettement plus lent)
+    DL_JOURNAL_INSTRUMENTATION=chemin.jsonl   une ligne JSON par exécution
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+VARIABLE_ACTIVATION = "DL_INSTRUMENTATION"
+VARIABLE_JOURNAL = "DL_JOURNAL_INSTRUMENTATION"
+TAILLE_HISTORIQUE = 200
+
+_activation = os.environ.get(VARIABLE_ACTIVATION, '').strip().lower()
+ACTIF = _activation not in ('', '0', 'non', 'false')
+MEMOIRE = ACTIF and _activation == 'memoire'
+JOURNAL = os.environ.get(VARIABLE_JOURNAL) if ACTIF else None
+
+_NUL = nullcontext()
+_COURANTE = ContextVar('execution_instrumentee', default=None)
+_VERROU = threading.Lock()
+_HISTORIQUE = deque(maxlen=TAILLE_HISTORIQUE)
+_fournisseur_session = None
+
+if MEMOIRE and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def definir_session(fournisseur):
+    """Fonction sans argument retournant l'identifiant de la session courante (ex. session Streamlit)"""
+    global _fournisseur_session
+    _fournisseur_session = fournisseur
+
+
+class Execution:
+    """Mesures d'une exécution du script (ou d'un fragment ré-exécuté seul)"""
+
+    def __init__(self, nom, session=None):
+        self.nom = nom
+        self.session = session
+        self.horodatage = time.time()
+        self.etapes = []
+        self.figures = []
+        self.marques = {}
+        self.duree_s = self.cpu_s = None
+        self._pile = []
+
+    def en_dict(self):
+        return {'nom': self.nom, 'session': self.session, 'horodatage': self.horodatage,
+                'duree_s': self.duree_s, 'cpu_s': self.cpu_s, 'etapes': self.etapes, 'figures': self.figures,
+                'marques': self.marques}
+
+    def __enter__(self):
+        self._jeton = _COURANTE.set(self)
+        self._debut_mur, self._debut_cpu = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.duree_s = time.perf_counter() - self._debut_mur
+        self.cpu_s = time.thread_time() - self._debut_cpu
+        _COURANTE.reset(self._jeton)
+        enregistrer(self)
+        return False
+
+
+class _Etape:
+    """Étape mesurée ; son chemin (« reseau/figure/layout ») reflète l'imbrication des étapes"""
+
+    def __init__(self, execution, nom):
+        self.execution = execution
+        self.nom = nom
+
+    def __enter__(self):
+        pile = self.execution._pile
+        self.chemin = f"{pile[-1].chemin}/{self.nom}" if pile else self.nom
+        self.pic_enfants = 0
+        pile.append(self)
+        if MEMOIRE:
+            # Le pic courant est remis à zéro : celui de l'étape parente est conservé via pic_enfants
+            self.memoire_debut = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.debut_mur, self.debut_cpu = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        mesure = {'etape': self.chemin, 'temps_s': time.perf_counter() - self.debut_mur,
+                  'cpu_s': time.thread_time() - self.debut_cpu}
+        pile = self.execution._pile
+        pile.pop()
+        if MEMOIRE:
+            pic = max(tracemalloc.get_traced_memory()[1], self.pic_enfants)
+            mesure['memoire_pic_mo'] = (pic - self.memoire_debut) / 1e6
+            if pile:
+                pile[-1].pic_enfants = max(pile[-1].pic_enfants, pic)
+        self.execution.etapes.append(mesure)
+        return False
+
+
+def execution(nom):
+    """Ouvre l'enregistrement d'une exécution ; sans effet si l'instrumentation est désactivée"""
+    if not ACTIF:
+        return _NUL
+    return Execution(nom, _fournisseur_session() if _fournisseur_session else None)
+
+
+def etape(nom):
+    """Mesure le bloc comme étape de l'exécution courante (contexte vide si rien n'est mesuré)"""
+    if not ACTIF:
+        return _NUL
+    courante = _COURANTE.get()
+    return _NUL if courante is None else _Etape(courante, nom)
+
+
+def section(nom):
+    """Décorateur de section : étape de premier niveau, ou exécution à part entière si la section
+    est ré-exécutée seule (fragment Streamlit). Renvoie la fonction inchangée si désactivé."""
+    def decorer(fonction):
+        if not ACTIF:
+            return fonction
+
+        @functools.wraps(fonction)
+        def mesuree(*args, **kwargs):
+            contexte = execution(f"fragment:{nom}") if _COURANTE.get() is None else nullcontext()
+            with contexte, etape(nom):
+                return fonction(*args, **kwargs)
+        return mesuree
+    return decorer
+
+
+def taille_figure(nom, figure):
+    """Enregistre la taille de la figure sérialisée en JSON (telle qu'envoyée au navigateur)"""
+    if not ACTIF:
+        return
+    courante = _COURANTE.get()
+    if courante is None:
+        return
+    import plotly.io as pio
+    chemin = f"{courante._pile[-1].chemin}/{nom}" if courante._pile else nom
+    courante.figures.append({'figure': chemin, 'octets': len(pio.to_json(figure, validate=False))})
+
+
+def marquer(nom, valeur):
+    """Ajoute une mesure ponctuelle (ex. délai du premier affichage) à l'exécution courante"""
+    if not ACTIF:
+        return
+    courante = _COURANTE.get()
+    if courante is not None:
+        courante.marques[nom] = valeur
+
+
+def enregistrer(execution):
+    """Ajoute une exécution terminée à l'historique et au journal JSON-lines"""
+    ligne = execution.en_dict()
+    with _VERROU:
+        _HISTORIQUE.append(ligne)
+        if JOURNAL:
+            with open(JOURNAL, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(ligne, ensure_ascii=False) + '\n')
+
+
+def dernieres_executions(n=10, session=None):
+    """Les n dernières exécutions (les plus récentes d'abord), éventuellement d'une seule session"""
+    with _VERROU:
+        executions = [e for e in reversed(_HISTORIQUE) if session is None or e['session'] == session]
+    return executions[:n]
@@ -0,0 +1,209 @@
+# metriques_partis.py
+"""Indicateurs dérivés des séries annuelles de tous les partis, calculés en opérations vectorisées.
+
+La table longue (Parti, annee, membres, budget_millions, ...) est triée une fois par parti puis
+par année ; chaque indicateur est ensuite une opération numpy sur la table entière, les débuts de
+groupes servant à couper les décalages et les fenêtres glissantes à la frontière entre deux partis.
+Les rangs percentiles et les notes qui en découlent sont calculés par groupby pandas (Cython).
+Aucune boucle Python ne dépend du nombre de partis ni du nombre d'années.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from cache_calculs import CacheLRU
+from moteur_comparatif import typer_partis
+
+FENETRE_DEFAUT = 3
+# Notes attribuées par quartile de rang percentile, de la moins bonne à la meilleure
+NOTES = ('Faible', 'Moyenne', 'Correcte', 'Élevée')
+SEUILS_NOTES = (0.25, 0.5, 0.75)
+NON_CLASSE = 'Non classée'
+
+# Indicateurs notés : colonne -> (libellé, unité, sens) ; sens -1 quand une valeur basse est meilleure
+INDICATEURS_ANNUELS = {
+    'budget_par_membre': ('Budget par membre', '€', -1),
+    'ministres_pour_1000': ('Ministres pour 1000 membres', 'ministres', 1),
+    'croissance_membres': ('Croissance des effectifs', '%/an', 1),
+}
+INDICATEURS_PARTIS = {
+    'membres_max': ('Croissance membres', 'membres', 1),
+    'ministres': ('Influence gouvernementale', 'ministres', 1),
+    'budget_max': ('Budget maximum', 'millions €', 1),
+    'duree_vie': ('Durée de vie', 'années', 1),
+    'budget_par_membre': ('Budget par membre au pic', '€', -1),
+    'ministres_pour_1000': ('Ministres pour 1000 membres au pic', 'ministres', 1),
+}
+
+
+def _debuts_groupes(codes):
+    """Position du premier élément du groupe de chaque ligne (codes triés) et masque des débuts"""
+    nouveaux = np.ones(len(codes), dtype=bool)
+    nouveaux[1:] = codes[1:] != codes[:-1]
+    debuts = np.flatnonzero(nouveaux)
+    return debuts[np.cumsum(nouveaux) - 1], nouveaux
+
+
+def _precedents(valeurs, nouveaux):
+    """Valeur de la ligne précédente du même groupe (NaN en début de groupe)"""
+    precedents = np.empty_like(valeurs, dtype=np.float64)
+    precedents[0:1] = np.nan
+    precedents[1:] = valeurs[:-1]
+    precedents[nouveaux] = np.nan
+    return precedents
+
+
+def croissance_annuelle(valeurs, annees, nouveaux):
+    """Taux de croissance annualisé depuis l'observation précédente du groupe (années manquantes comprises)"""
+    ecarts = annees - _precedents(annees, nouveaux)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taux = (valeurs / _precedents(valeurs, nouveaux)) ** (1 / ecarts) - 1
+    return np.where(np.isfinite(taux) & (ecarts > 0), taux, np.nan)
+
+
+def moyenne_glissante(valeurs, debuts, fenetre=FENETRE_DEFAUT):
+    """Moyenne des `fenetre` dernières observations du groupe, valeurs manquantes ignorées (sommes cumulées)"""
+    connues = np.isfinite(valeurs)
+    sommes = np.concatenate([[0.0], np.cumsum(np.where(connues, valeurs, 0.0))])
+    effectifs = np.concatenate([[0], np.cumsum(connues)])
+    fins = np.arange(1, len(valeurs) + 1)
+    origines = np.maximum(fins - fenetre, debuts)
+    n = effectifs[fins] - effectifs[origines]
+    with np.errstate(invalid='ignore'):
+        return np.where(n > 0, (sommes[fins] - sommes[origines]) / np.maximum(n, 1), np.nan)
+
+
+def rangs_percentiles(valeurs, groupes=None, sens=1):
+    """Rang percentile dans chaque groupe : 0 pour la moins bonne valeur, 1 pour la meilleure ;
+    NaN pour une valeur manquante ou seule de son groupe"""
+    serie = pd.Series(sens * np.asarray(valeurs, dtype=np.float64))
+    if groupes is None:
+        rangs, effectifs = serie.rank(), pd.Series(serie.count(), index=serie.index)
+    else:
+        groupes = serie.groupby(np.asarray(groupes))
+        rangs, effectifs = groupes.rank(), groupes.transform('count')
+    return ((rangs - 1) / (effectifs - 1)).where(effectifs > 1).to_numpy()
+
+
+def noter(rangs):
+    """Note par quartile de rang percentile (catégorie ordonnée, manquante si le rang l'est)"""
+    codes = np.where(np.isnan(rangs), -1, np.digitize(rangs, SEUILS_NOTES))
+    return pd.Categorical.from_codes(codes, categories=NOTES, ordered=True)
+
+
+def metriques_annuelles(series, ministres=None, fenetre=FENETRE_DEFAUT):
+    """Indicateurs par parti et par année, notés par rang percentile parmi les partis de la même année.
+
+    `ministres` (Série indexée par parti) complète la table quand elle n'a pas de colonne 'ministres'.
+    """
+    table = series.sort_values(['Parti', 'annee'], kind='stable', ignore_index=True)
+    codes = pd.factorize(table['Parti'])[0]
+    debuts, nouveaux = _debuts_groupes(codes)
+    annees = table['annee'].to_numpy(dtype=np.float64)
+    membres = table['membres'].to_numpy(dtype=np.float64, na_value=np.nan)
+    membres = np.where(membres > 0, membres, np.nan)
+    budget = table['budget_millions'].to_numpy(dtype=np.float64, na_value=np.nan)
+    if 'ministres' in table:
+        nombre_ministres = table['ministres'].to_numpy(dtype=np.float64, na_value=np.nan)
+    elif ministres is not None:
+        nombre_ministres = ministres.reindex(table['Parti']).to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        nombre_ministres = np.full(len(table), np.nan)
+
+    resultat = pd.DataFrame({
+        'Parti': table['Parti'],
+        'annee': table['annee'],
+        'membres': membres,
+        'budget_millions': budget,
+        'ministres': nombre_ministres,
+        'budget_par_membre': budget * 1_000_000 / membres,
+        'ministres_pour_1000': nombre_ministres / membres * 1000,
+        'croissance_membres': croissance_annuelle(membres, annees, nouveaux),
+        'croissance_budget': croissance_annuelle(budget, annees, nouveaux),
+        'membres_moyenne': moyenne_glissante(membres, debuts, fenetre),
+        'budget_moyenne': moyenne_glissante(budget, debuts, fenetre),
+    })
+    resultat['croissance_membres_moyenne'] = moyenne_glissante(resultat['croissance_membres'].to_numpy(), debuts,
+                                                               fenetre)
+    for colonne, (_, _, sens) in INDICATEURS_ANNUELS.items():
+        rangs = rangs_percentiles(resultat[colonne].to_numpy(), resultat['annee'].to_numpy(), sens)
+        resultat[f'rang_{colonne}'] = rangs
+        resultat[f'note_{colonne}'] = noter(rangs)
+    return resultat
+
+
+def synthese_partis(annuelles, comparaison_partis=None):
+    """Une ligne par parti : valeurs à l'année du pic d'effectifs, maxima, durée de vie, et notes
+    par rang percentile parmi tous les partis (ceux de la table comparative sans séries compris)"""
+    pics = (annuelles.sort_values(['Parti', 'membres'], ascending=[True, False], na_position='last', kind='stable')
+            .drop_duplicates('Parti'))
+    etendue = annuelles.groupby('Parti', sort=True).agg(budget_max=('budget_millions', 'max'),
+                                                         premiere=('annee', 'min'), derniere=('annee', 'max'),
+                                                         ministres_series=('ministres', 'max'))
+    synthese = pd.DataFrame({
+        'Parti': pics['Parti'].to_numpy(),
+        'annee_pic': pics['annee'].to_numpy(),
+        'membres_max': pics['membres'].to_numpy(),
+        'budget_par_membre': pics['budget_par_membre'].to_numpy(),
+        'ministres_pour_1000': pics['ministres_pour_1000'].to_numpy(),
+    }).merge(etendue, left_on='Parti', right_index=True, how='left')
+    synthese['duree_vie'] = (synthese['derniere'] - synthese['premiere']).astype(np.float64)
+    synthese['ministres'] = synthese['ministres_series']
+
+    if comparaison_partis is not None:
+        # Les colonnes de la table comparative priment ; les séries complètent les partis absents
+        typee = typer_partis(comparaison_partis)
+        comparaison = pd.DataFrame({
+            'Parti': typee['Parti'].astype(object).to_numpy(),
+            'membres_table': typee['Membres_max'].to_numpy(dtype=np.float64, na_value=np.nan),
+            'ministres_table': typee['Ministres_gouvernement'].to_numpy(dtype=np.float64, na_value=np.nan),
+            'duree_table': typee['Duree_vie_annees'].to_numpy(dtype=np.float64),
+        }).drop_duplicates('Parti')
+        synthese = synthese.merge(comparaison, on='Parti', how='outer')
+        synthese['membres_max'] = synthese['membres_table'].fillna(synthese['membres_max'])
+        synthese['ministres'] = synthese['ministres_table'].fillna(synthese['ministres'])
+        synthese['duree_vie'] = synthese['duree_table'].fillna(synthese['duree_vie'])
+
+    synthese = synthese[['Parti', 'annee_pic', *INDICATEURS_PARTIS]].sort_values('Parti', ignore_index=True)
+    for colonne, (_, _, sens) in INDICATEURS_PARTIS.items():
+        rangs = rangs_percentiles(synthese[colonne].to_numpy(), sens=sens)
+        synthese[f'rang_{colonne}'] = rangs
+        synthese[f'note_{colonne}'] = noter(rangs)
+    return synthese
+
+
+class MetriquesPartis:
+    """Indicateurs annuels et synthèse par parti d'un jeu de séries, calculés une fois"""
+
+    def __init__(self, series, comparaison_partis=None, fenetre=FENETRE_DEFAUT):
+        ministres = None
+        if comparaison_partis is not None:
+            ministres = (pd.to_numeric(comparaison_partis['Ministres_gouvernement'], errors='coerce')
+                         .set_axis(comparaison_partis['Parti']).groupby(level=0).max())
+        self.annuelles = metriques_annuelles(series, ministres, fenetre)
+        self.synthese = synthese_partis(self.annuelles, comparaison_partis)
+
+    def parti(self, nom):
+        """Ligne de synthèse et indicateurs annuels d'un parti"""
+        return (self.synthese[self.synthese['Parti'] == nom].reset_index(drop=True),
+                self.annuelles[self.annuelles['Parti'] == nom].reset_index(drop=True))
+
+
+def empreinte_metriques(series, comparaison_partis=None, fenetre=FENETRE_DEFAUT):
+    """Hash du contenu des tables d'entrée et de la fenêtre"""
+    h = hashlib.sha256(f'{fenetre}'.encode())
+    for table in (series, comparaison_partis):
+        if table is not None:
+            h.update(','.join(map(str, table.columns)).encode())
+            h.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+_CACHE = CacheLRU(capacite=4)
+
+
+def metriques_en_cache(series, comparaison_partis=None, fenetre=FENETRE_DEFAUT):
+    """Indicateurs des séries, calculés une seule fois par processus pour un contenu donné"""
+    return _CACHE.obtenir(empreinte_metriques(series, comparaison_partis, fenetre),
+                          lambda: MetriquesPartis(series, comparaison_partis, fenetre))
@@ -0,0 +1,215 @@
+# monte_carlo.py
+"""Moteur Monte Carlo vectorisé des scénarios contrefactuels, réparti sur un pool de processus."""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+
+from cache_calculs import CacheLRU
+
+TAILLE_LOT = 125_000
+BORNES_SCORE = np.linspace(0.0, 20.0, 81)
+BORNES_MEMBRES = np.logspace(2, 6, 81)
+
+
+@dataclass(frozen=True)
+class ModeleParti:
+    """Paramètres dynamiques estimés sur les séries annuelles du parti"""
+    membres_initial: float
+    score_initial: float
+    niveau_electoral: float       # score moyen vers lequel le résultat électoral revient (%)
+    rappel: float                 # vitesse de retour vers ce niveau (0-1 par an)
+    volatilite_score: float
+    derive_membres: float         # croissance logarithmique annuelle à score neutre
+    sensibilite_membres: float    # effet d'un point de score au-dessus du niveau sur la croissance
+    volatilite_membres: float
+    budget_par_membre: float      # M€ par membre
+    influence_base: float
+    influence_par_point: float
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Hypothèses d'un scénario contrefactuel, en écart par rapport au modèle estimé"""
+    horizon: int = 5
+    score_initial: float = None
+    decalage_electoral: float = 0.0
+    derive_membres: float = 0.0
+    seuil_membres: float = 10_000
+    seuil_electoral: float = 5.0
+
+
+# Hypothèses des scénarios contrefactuels du dashboard
+SCENARIOS = {
+    "Stratégie d'autonomie prolongée": Scenario(decalage_electoral=-1.0, derive_membres=-0.15),
+    "Alliance précoce avec l'UDF": Scenario(decalage_electoral=0.5, derive_membres=0.05),
+    "Leadership différent": Scenario(decalage_electoral=0.3, derive_membres=0.05),
+    "Contexte politique alternatif": Scenario(score_initial=3.91),
+}
+EFFETS_LEADER = {
+    "Jean-Pierre Raffarin": Scenario(decalage_electoral=0.3, derive_membres=0.05),
+    "Hervé Novelli": Scenario(decalage_electoral=0.1),
+    "Autre personnalité": Scenario(),
+}
+
+
+def estimer_modele(annees, membres, budget, influence, resultats, annee_depart=2002, fenetre_tendance=3):
+    """Estime le modèle par moindres carrés sur les séries annuelles (sans boucle Python)"""
+    annees = np.asarray(annees)
+    membres, budget = np.asarray(membres, dtype=float), np.asarray(budget, dtype=float)
+    influence, resultats = np.asarray(influence, dtype=float), np.asarray(resultats, dtype=float)
+    depart = int(np.searchsorted(annees, annee_depart)) if annee_depart in annees else len(annees) - 1
+
+    niveau = resultats.mean()
+    # Retour à la moyenne : r[t+1] - r[t] = rappel * (niveau - r[t]) + bruit
+    ecart, variation = niveau - resultats[:-1], np.diff(resultats)
+    rappel = float(np.clip(ecart @ variation / max(ecart @ ecart, 1e-9), 0.05, 1.0))
+    volatilite_score = float(np.std(variation - rappel * ecart, ddof=1))
+
+    # Croissance des membres : log(m[t+1] / m[t]) = derive + sensibilite * (r[t] - niveau) + bruit
+    # La dérive est la tendance des dernières années avant le départ ; un meilleur score
+    # ne peut pas faire perdre de membres (sensibilité contrainte positive)
+    croissance = np.diff(np.log(membres))
+    sensibilite = max(float(-ecart @ (croissance - croissance.mean()) / max(ecart @ ecart, 1e-9)), 0.0)
+    residus = croissance - sensibilite * -ecart
+    derive = float(residus[max(depart - fenetre_tendance, 0):depart].mean())
+    volatilite_membres = float(np.std(residus, ddof=1))
+
+    pente, origine = np.polyfit(resultats, influence, 1)
+    return ModeleParti(
+        membres_initial=float(membres[depart]), score_initial=float(resultats[depart]),
+        niveau_electoral=float(niveau), rappel=rappel, volatilite_score=volatilite_score,
+        derive_membres=derive, sensibilite_membres=sensibilite,
+        volatilite_membres=volatilite_membres, budget_par_membre=float(np.mean(budget / membres)),
+        influence_base=float(origine), influence_par_point=float(pente)
+    )
+
+
+def simuler_lot(modele, scenario, graine, n):
+    """Simule n trajectoires d'un coup (vectorisé sur les trajectoires, boucle sur les années)"""
+    rng = np.random.default_rng(graine)
+    score = np.full(n, modele.score_initial if scenario.score_initial is None else scenario.score_initial)
+    log_membres = np.full(n, math.log(modele.membres_initial))
+    niveau = modele.niveau_electoral + scenario.decalage_electoral
+    for _ in range(scenario.horizon):
+        bruit = rng.standard_normal((2, n))
+        log_membres += (modele.derive_membres + scenario.derive_membres
+                        + modele.sensibilite_membres * (score - modele.niveau_electoral)
+                        + modele.volatilite_membres * bruit[0])
+        score = np.maximum(score + modele.rappel * (niveau - score) + modele.volatilite_score * bruit[1], 0.0)
+
+    membres = np.exp(log_membres)
+    influence = np.clip(modele.influence_base + modele.influence_par_point * score, 0.0, 10.0)
+    succes = (membres >= scenario.seuil_membres) & (score >= scenario.seuil_electoral)
+    return {
+        'n': n,
+        'succes': int(succes.sum()),
+        'histogramme_score': np.histogram(score, BORNES_SCORE)[0],
+        'histogramme_membres': np.histogram(membres, BORNES_MEMBRES)[0],
+        'somme_influence': float(influence.sum()),
+    }
+
+
+class Agregat:
+    """Agrégats partiels d'une simulation, mis à jour à chaque lot terminé"""
+
+    def __init__(self, n_total):
+        self.n_total = n_total
+        self.n = 0
+        self.succes = 0
+        self.histogramme_score = np.zeros(len(BORNES_SCORE) - 1, dtype=np.int64)
+        self.histogramme_membres = np.zeros(len(BORNES_MEMBRES) - 1, dtype=np.int64)
+        self.somme_influence = 0.0
+
+    def ajouter(self, lot):
+        self.n += lot['n']
+        self.succes += lot['succes']
+        self.histogramme_score += lot['histogramme_score']
+        self.histogramme_membres += lot['histogramme_membres']
+        self.somme_influence += lot['somme_influence']
+
+    @property
+    def termine(self):
+        return self.n >= self.n_total
+
+    @property
+    def probabilite(self):
+        return self.succes / self.n if self.n else 0.0
+
+    def intervalle(self, z=1.96):
+        """Intervalle de confiance de Wilson sur la probabilité de succès"""
+        if not self.n:
+            return 0.0, 1.0
+        p, n = self.probabilite, self.n
+        centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+        demi = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, centre - demi), min(1.0, centre + demi)
+
+    def quantile_score(self, q):
+        """Quantile du score final, interpolé sur l'histogramme"""
+        cumul = np.cumsum(self.histogramme_score) / max(self.n, 1)
+        return float(np.interp(q, np.concatenate([[0.0], cumul]), BORNES_SCORE))
+
+    def quantile_membres(self, q):
+        """Quantile du nombre de membres final, interpolé sur l'histogramme logarithmique"""
+        cumul = np.cumsum(self.histogramme_membres) / max(self.n, 1)
+        return float(10 ** np.interp(q, np.concatenate([[0.0], cumul]), np.log10(BORNES_MEMBRES)))
+
+    @property
+    def influence_moyenne(self):
+        return self.somme_influence / self.n if self.n else 0.0
+
+
+_VERROU = threading.Lock()
+_EXECUTEUR = None
+# Simulations terminées ; les agrégats partiels sont diffusés au fil des lots, hors du cache
+_RESULTATS = CacheLRU(capacite=64)
+
+
+def executeur_partage():
+    """Pool de processus commun à toutes les sessions (démarrage 'spawn', sûr avec les threads du serveur)"""
+    global _EXECUTEUR
+    with _VERROU:
+        if _EXECUTEUR is None:
+            _EXECUTEUR = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return _EXECUTEUR
+
+
+def simuler(modele, scenario, n_trajectoires, graine=0, taille_lot=TAILLE_LOT):
+    """Générateur d'agrégats partiels ; le dernier contient la simulation complète.
+
+    Les graines des lots dérivent de la graine principale : le résultat final ne dépend ni
+    du nombre de processus ni de l'ordre d'arrivée des lots.
+    """
+    cle = (modele, scenario, n_trajectoires, graine, taille_lot)
+    termine = _RESULTATS.lire(cle)
+    if termine is not None:
+        yield termine
+        return
+
+    tailles = [min(taille_lot, n_trajectoires - i) for i in range(0, n_trajectoires, taille_lot)]
+    graines = np.random.SeedSequence(graine).spawn(len(tailles))
+    agregat = Agregat(n_trajectoires)
+    if len(tailles) == 1:
+        agregat.ajouter(simuler_lot(modele, scenario, graines[0], tailles[0]))
+    else:
+        futures = [executeur_partage().submit(simuler_lot, modele, scenario, g, n) for g, n in zip(graines, tailles)]
+        try:
+            for future in as_completed(futures):
+                agregat.ajouter(future.result())
+                if not agregat.termine:
+                    yield agregat
+        finally:
+            # Générateur abandonné (session fermée, nouveau scénario) ou lot en erreur : les lots
+            # encore en file ne doivent pas occuper le pool partagé
+            for future in futures:
+                future.cancel()
+
+    _RESULTATS.amorcer(cle, agregat)
+    yield agregat
+
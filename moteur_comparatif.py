@@ -0,0 +1,92 @@
+# moteur_comparatif.py
+"""Moteur comparatif multi-partis : colonnes typées, durées, rangs et agrégats par doctrine précalculés."""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Critères de classement proposés : colonne typée -> libellé
+CRITERES = {
+    'Membres_max': 'Effectifs maximum',
+    'Ministres_gouvernement': 'Ministres au gouvernement',
+    'Duree_vie_annees': 'Durée de vie (années)',
+}
+
+
+def typer_partis(comparaison_partis, date_reference=None):
+    """Convertit la table texte (période '1997-2002' ou '1969-', durée '53+') en colonnes typées"""
+    date_reference = pd.Timestamp(date_reference or datetime.date.today())
+    periode = comparaison_partis['Période_activité'].astype(str).str.extract(r'^\s*(\d{4})\s*-\s*(\d{4})?\s*$')
+    debut = pd.to_datetime(periode[0], format='%Y', errors='coerce')
+    fin = pd.to_datetime(periode[1], format='%Y', errors='coerce')
+    actif = fin.isna().to_numpy()
+    # Durée en années jusqu'à la dissolution, ou jusqu'à la date de référence pour les partis actifs
+    duree = (fin.fillna(date_reference) - debut).dt.days.to_numpy(dtype=np.float64) / 365.25
+    return pd.DataFrame({
+        'Parti': comparaison_partis['Parti'].astype('string'),
+        'Doctrine': comparaison_partis['Doctrine'].astype('category'),
+        'Debut': debut,
+        'Fin': fin,
+        'Actif': actif,
+        'Membres_max': pd.to_numeric(comparaison_partis['Membres_max'], errors='coerce').astype('Int64'),
+        'Ministres_gouvernement': pd.to_numeric(comparaison_partis['Ministres_gouvernement'],
+                                                errors='coerce').astype('Int32'),
+        'Duree_vie_annees': np.round(duree, 1),
+    })
+
+
+class MoteurComparatif:
+    """Table typée des partis, avec rangs et agrégats calculés une fois à la construction"""
+
+    def __init__(self, comparaison_partis, date_reference=None):
+        self.date_reference = pd.Timestamp(date_reference or datetime.date.today())
+        table = typer_partis(comparaison_partis, self.date_reference)
+        for critere in CRITERES:
+            table[f'Rang_{critere}'] = table[critere].rank(ascending=False, method='min').astype('Int32')
+        self.table = table
+        self.doctrines = table['Doctrine'].cat.categories.tolist()
+        # Table vide ou sans date de début lisible : période réduite à l'année de référence
+        premiere = table['Debut'].dt.year.min()
+        annee = self.date_reference.year
+        self.annees = (annee if pd.isna(premiere) else min(int(premiere), annee), annee)
+        self.agregats_doctrines = (
+            table.groupby('Doctrine', observed=True)
+            .agg(Partis=('Parti', 'size'), Actifs=('Actif', 'sum'), Membres_total=('Membres_max', 'sum'),
+                 Membres_median=('Membres_max', 'median'), Ministres_total=('Ministres_gouvernement', 'sum'),
+                 Duree_moyenne=('Duree_vie_annees', 'mean'))
+            .reset_index()
+            .sort_values('Membres_total', ascending=False, ignore_index=True)
+        )
+        # Tableaux numpy des colonnes filtrées, pour des masques sans passer par pandas
+        self._codes_doctrine = table['Doctrine'].cat.codes.to_numpy()
+        self._actif = table['Actif'].to_numpy()
+        self._annee_debut = table['Debut'].dt.year.to_numpy(dtype=np.float64, na_value=np.nan)
+        self._annee_fin = table['Fin'].dt.year.to_numpy(dtype=np.float64, na_value=np.inf)
+        self._valeurs = {c: table[c].to_numpy(dtype=np.float64, na_value=-np.inf) for c in CRITERES}
+
+    def masque(self, doctrines=None, statut=None, periode=None):
+        """Partis retenus : doctrines choisies, statut 'actif'/'dissous', actifs pendant la période (années)"""
+        masque = np.ones(len(self.table), dtype=bool)
+        if doctrines is not None:
+            codes = [self.doctrines.index(d) for d in doctrines if d in self.doctrines]
+            masque &= np.isin(self._codes_doctrine, codes)
+        if statut == 'actif':
+            masque &= self._actif
+        elif statut == 'dissous':
+            masque &= ~self._actif
+        if periode is not None:
+            masque &= (self._annee_debut <= periode[1]) & (self._annee_fin >= periode[0])
+        return masque
+
+    def top(self, critere='Membres_max', n=10, **filtres):
+        """Les n premiers partis filtrés selon le critère (sélection partielle, sans tri complet)"""
+        indices = np.flatnonzero(self.masque(**filtres))
+        valeurs = self._valeurs[critere][indices]
+        if len(indices) > n:
+            selection = np.argpartition(-valeurs, n - 1)[:n]
+            indices, valeurs = indices[selection], valeurs[selection]
+        return self.table.iloc[indices[np.argsort(-valeurs, kind='stable')]].reset_index(drop=True)
+
+    def effectif(self, **filtres):
+        return int(self.masque(**filtres).sum())
+
@@ -0,0 +1,215 @@
+# rapports.py
+"""Génération de rapports sans Streamlit : figures et analyses exportées en HTML/JSON/PNG/PDF, en parallèle.
+
+Exemple :
+    python rapports.py --sources integree donnees/rpr.db donnees/udf --formats html json png --workers 8
+"""
+import argparse
+import html
+import importlib.util
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs_version
+
+from analyse_graphe import GrapheCSR
+from figures import (figure_distribution_score, figures_chronologie, figures_comparatif, figures_performance,
+                     figures_reseau)
+from monte_carlo import SCENARIOS, estimer_modele, simuler
+from index_ideologique import index_en_cache
+from metriques_partis import metriques_en_cache
+from moteur_comparatif import MoteurComparatif
+from series_temporelles import POINTS_DEFAUT
+from sources_donnees import PARTI_REFERENCE, obtenir_donnees
+from textes import INSIGHTS
+
+SOURCE_INTEGREE = 'integree'
+FORMATS = ('html', 'json', 'png', 'pdf')
+FORMATS_IMAGE = ('png', 'pdf')
+TITRES_SECTIONS = {
+    'reseau': "🔗 Réseau d'Influence",
+    'performance': "📈 Performance",
+    'chronologie': "⏳ Chronologie Stratégique",
+    'comparatif': "🌍 Analyse Comparative",
+    'scenarios': "🎲 Scénarios Alternatifs",
+}
+
+
+def _section_reseau(donnees, options):
+    table, figures = figures_reseau(GrapheCSR.depuis_relations(donnees.relations_politiques),
+                                    budget_temps_s=options.get('budget_temps_s'))
+    return figures, table.to_html(index=False, float_format='{:.3f}'.format)
+
+
+def _section_performance(donnees, options):
+    synthese, annuelles = metriques_en_cache(donnees.series_partis, donnees.comparaison_partis).parti(PARTI_REFERENCE)
+    return figures_performance(synthese, annuelles), annuelles.to_html(index=False, float_format='{:.3f}'.format)
+
+
+def _section_chronologie(donnees, options):
+    series = donnees.series_chronologiques.requete(points=options.get('points_series', POINTS_DEFAUT))
+    return figures_chronologie(series, donnees.evenements_cles), ''
+
+
+def _section_comparatif(donnees, options):
+    moteur = MoteurComparatif(donnees.comparaison_partis)
+    vue = moteur.top('Membres_max', options.get('top_partis', 20))
+    positionnement = index_en_cache(donnees.positionnement).lignes(vue['Parti'])
+    return figures_comparatif(vue, positionnement), moteur.agregats_doctrines.to_html(index=False, float_format='{:.1f}'.format)
+
+
+def _section_scenarios(donnees, options):
+    modele = estimer_modele(donnees.annees_chrono, donnees.evolution_membres, donnees.evolution_budget,
+                            donnees.influence_politique, donnees.resultats_electoraux)
+    n = options.get('trajectoires', 100_000)
+    figures, lignes = {}, []
+    for i, (nom, hypotheses) in enumerate(SCENARIOS.items()):
+        # Un seul lot : la simulation reste dans le processus de travail (pas de pool imbriqué)
+        *_, agregat = simuler(modele, hypotheses, n, graine=options.get('graine', 42), taille_lot=n)
+        bas, haut = agregat.intervalle()
+        figures[f'scenario_{i + 1}'] = figure_distribution_score(
+            agregat, hypotheses.seuil_electoral, 2002 + hypotheses.horizon).update_layout(title=nom)
+        lignes.append(f"<li><strong>{html.escape(nom)}</strong> : probabilité de succès {agregat.probabilite:.1%} "
+                      f"(IC 95 % : {bas:.1%} - {haut:.1%})</li>")
+    return figures, f"<ul>{''.join(lignes)}</ul>"
+
+
+SECTIONS = {
+    'reseau': _section_reseau,
+    'performance': _section_performance,
+    'chronologie': _section_chronologie,
+    'comparatif': _section_comparatif,
+    'scenarios': _section_scenarios,
+}
+
+
+def construire_section(section, donnees, **options):
+    """Figures et contenu HTML complémentaire d'une section, sans runtime Streamlit"""
+    return SECTIONS[section](donnees, options)
+
+
+def nom_parti(source):
+    """Identifiant de dossier d'une source de données"""
+    if source == SOURCE_INTEGREE:
+        return SOURCE_INTEGREE
+    return os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+
+
+def traiter(source, section, formats, sortie, options):
+    """Tâche d'un processus de travail : construit une section et exporte ses figures"""
+    debut = time.perf_counter()
+    donnees = obtenir_donnees(None if source == SOURCE_INTEGREE else source)
+    figures, complement = construire_section(section, donnees, **options)
+    duree_construction = time.perf_counter() - debut
+
+    repertoire = os.path.join(sortie, nom_parti(source), section)
+    os.makedirs(repertoire, exist_ok=True)
+    mesures, fragments = [], []
+    for nom, fig in figures.items():
+        debut_export = time.perf_counter()
+        for fmt in formats:
+            chemin = os.path.join(repertoire, f'{nom}.{fmt}')
+            if fmt == 'html':
+                fig.write_html(chemin, include_plotlyjs='cdn')
+            elif fmt == 'json':
+                fig.write_json(chemin)
+            else:
+                fig.write_image(chemin)
+        fragments.append(pio.to_html(fig, full_html=False, include_plotlyjs=False))
+        mesures.append({
+            'source': source, 'section': section, 'figure': nom,
+            'construction_s': duree_construction / len(figures),
+            'export_s': time.perf_counter() - debut_export,
+        })
+    return {'source': source, 'section': section, 'fragments': fragments, 'complement': complement,
+            'mesures': mesures}
+
+
+def ecrire_rapport(sortie, source, resultats):
+    """Assemble le rapport HTML complet d'un parti à partir de ses sections"""
+    blocs = []
+    for section in SECTIONS:
+        if section not in resultats:
+            continue
+        resultat = resultats[section]
+        titre, texte = INSIGHTS.get(section, ('', ''))
+        blocs.append(f"<h2>{TITRES_SECTIONS[section]}</h2>{resultat['complement']}"
+                     + ''.join(resultat['fragments'])
+                     + (f"<div class='insight-box'><h4>{titre}</h4><p>{texte}</p></div>" if texte else ''))
+    titre, texte = INSIGHTS['synthese']
+    chemin = os.path.join(sortie, nom_parti(source), 'rapport.html')
+    with open(chemin, 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>Analyse stratégique - {html.escape(nom_parti(source))}</title>
+<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>
+<style>.insight-box {{ background-color: #e8f4fd; border-left: 5px solid #3498db; padding: 1rem; border-radius: 5px; margin: 1rem 0; }}
+.insight-box h4 {{ color: #2980b9; margin-top: 0; }} body {{ font-family: sans-serif; margin: 2rem; }}</style>
+</head><body><h1>🏛️ Analyse stratégique - {html.escape(nom_parti(source))}</h1>
+<div class='insight-box'><h4>{titre}</h4><p>{texte}</p></div>{''.join(blocs)}</body></html>""")
+    return chemin
+
+
+def generer(sources, sections, formats, sortie, workers=None, **options):
+    """Génère toutes les combinaisons parti x section et retourne les mesures de débit"""
+    if any(fmt in FORMATS_IMAGE for fmt in formats) and importlib.util.find_spec('kaleido') is None:
+        raise RuntimeError("Les exports PNG/PDF nécessitent le paquet 'kaleido' (pip install kaleido)")
+    debut = time.perf_counter()
+    par_source = defaultdict(dict)
+    mesures = []
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        taches = [executeur.submit(traiter, source, section, formats, sortie, options)
+                  for source in sources for section in sections]
+        for tache in as_completed(taches):
+            resultat = tache.result()
+            par_source[resultat['source']][resultat['section']] = resultat
+            mesures.extend(resultat['mesures'])
+    rapports = [ecrire_rapport(sortie, source, resultats) for source, resultats in par_source.items()]
+    duree = time.perf_counter() - debut
+    return {
+        'duree_s': duree,
+        'figures': len(mesures),
+        'figures_par_seconde': len(mesures) / duree if duree else 0.0,
+        'rapports': rapports,
+        'mesures': mesures,
+    }
+
+
+def resumer(bilan):
+    """Débit global et temps moyen par figure (construction + export)"""
+    par_figure = defaultdict(list)
+    for m in bilan['mesures']:
+        par_figure[(m['section'], m['figure'])].append(m['construction_s'] + m['export_s'])
+    lignes = [f"{len(bilan['rapports'])} rapports, {bilan['figures']} figures en {bilan['duree_s']:.2f} s "
+              f"({bilan['figures_par_seconde']:.1f} figures/s)"]
+    for (section, figure), durees in sorted(par_figure.items()):
+        lignes.append(f"  {section:<12} {figure:<12} {1000 * sum(durees) / len(durees):8.1f} ms/figure "
+                      f"({len(durees)} exemplaires)")
+    return '\n'.join(lignes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rapports par lot des sections du dashboard")
+    parser.add_argument('--sources', nargs='+', default=[SOURCE_INTEGREE],
+                        help="Sources de données (répertoire CSV/Parquet, base SQLite ou 'integree')")
+    parser.add_argument('--sections', nargs='+', choices=list(SECTIONS), default=list(SECTIONS))
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['html', 'json'])
+    parser.add_argument('--sortie', default='rapports')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--trajectoires', type=int, default=100_000)
+    parser.add_argument('--budget-temps', type=float, default=5.0,
+                        help="Budget de temps (s) du calcul des centralités par graphe")
+    args = parser.parse_args(argv)
+
+    bilan = generer(args.sources, args.sections, args.formats, args.sortie, workers=args.workers,
+                    trajectoires=args.trajectoires, budget_temps_s=args.budget_temps)
+    with open(os.path.join(args.sortie, 'metriques.json'), 'w', encoding='utf-8') as f:
+        json.dump(bilan, f, ensure_ascii=False, indent=2)
+    print(resumer(bilan))
+
+
+if __name__ == '__main__':
+    main()
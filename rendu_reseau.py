@@ -0,0 +1,213 @@
+# rendu_reseau.py
+"""Rendu Plotly du réseau d'influence : coordonnées vectorisées, WebGL et niveaux de détail."""
+from dataclasses import dataclass
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Au-delà de ces volumes, le mode 'auto' passe en WebGL et agrège les noeuds en super-noeuds
+SEUIL_WEBGL = 1000
+SEUIL_AGREGATION = 2000
+TAILLE_MAX_OCTETS = 5_000_000
+
+
+@dataclass
+class RenduReseau:
+    """Figure produite et statistiques de niveau de détail"""
+    figure: go.Figure
+    aretes_totales: int
+    aretes_affichees: int
+    noeuds_affiches: int
+    super_noeuds: int
+    taille_octets: int
+
+
+def positions_en_tableau(graphe, positions):
+    """Convertit un dict {noeud: (x, y)} en tableau (n, 2) aligné sur graphe.noeuds"""
+    return np.array([positions[noeud] for noeud in graphe.noeuds], dtype=np.float64).reshape(-1, 2)
+
+
+def coordonnees_aretes(xy, u, v):
+    """Coordonnées des segments avec séparateurs NaN, sans boucle Python"""
+    separateur = np.full(len(u), np.nan)
+    x = np.column_stack([xy[u, 0], xy[v, 0], separateur]).ravel()
+    y = np.column_stack([xy[u, 1], xy[v, 1], separateur]).ravel()
+    return x, y
+
+
+def agreger_en_super_noeuds(xy, u, v, poids, cellules_par_axe):
+    """Regroupe les noeuds par cellule d'une grille sur le layout et somme les arêtes inter-cellules"""
+    mini, maxi = xy.min(axis=0), xy.max(axis=0)
+    etendue = np.where(maxi - mini > 0, maxi - mini, 1.0)
+    grille = np.minimum(((xy - mini) / etendue * cellules_par_axe).astype(np.int64), cellules_par_axe - 1)
+    cellule = grille[:, 0] * cellules_par_axe + grille[:, 1]
+    cellules, groupe = np.unique(cellule, return_inverse=True)
+    effectifs = np.bincount(groupe)
+    centres = np.column_stack([np.bincount(groupe, weights=xy[:, 0]),
+                               np.bincount(groupe, weights=xy[:, 1])]) / effectifs[:, None]
+
+    gu, gv = groupe[u], groupe[v]
+    externe = gu != gv
+    paires, inverse = np.unique(np.column_stack([gu[externe], gv[externe]]), axis=0, return_inverse=True)
+    poids_paires = np.bincount(inverse.ravel(), weights=poids[externe], minlength=len(paires))
+    return centres, effectifs, paires[:, 0], paires[:, 1], poids_paires
+
+
+def _mise_en_page(titre):
+    return go.Layout(
+        title=dict(text=titre, font=dict(size=16)),
+        showlegend=False, hovermode='closest',
+        margin=dict(b=20, l=5, r=5, t=40), annotations=[dict(
+            text="La taille des nœuds indique la capacité de contrôle dans le réseau d'influence.",
+            showarrow=False, xref="paper", yref="paper", x=0.005, y=-0.002, xanchor='left', yanchor='bottom', font=dict(size=12)
+        )], xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False), height=500
+    )
+
+
+def _construire(graphe, xy, intermediarite, webgl, poids_min, top_k_labels, cellules_par_axe, titre):
+    Trace = go.Scattergl if webgl else go.Scatter
+    garde = graphe.poids >= poids_min
+    u, v, poids = graphe.sources[garde], graphe.indices[garde], graphe.poids[garde]
+    top = np.argsort(-intermediarite, kind='stable')[:top_k_labels]
+
+    traces = []
+    super_noeuds = 0
+    if cellules_par_axe:
+        centres, effectifs, su, sv, spoids = agreger_en_super_noeuds(xy, u, v, poids, cellules_par_axe)
+        super_noeuds = len(centres)
+        ex, ey = coordonnees_aretes(centres, su, sv)
+        traces.append(Trace(x=ex, y=ey, line=dict(width=1, color='#888'), hoverinfo='none', mode='lines'))
+        traces.append(Trace(
+            x=centres[:, 0], y=centres[:, 1], mode='markers', hoverinfo='text',
+            hovertext=[f"Groupe de {e} acteurs" for e in effectifs],
+            marker=dict(size=6 + 4 * np.log1p(effectifs), color='#95a5a6', opacity=0.6)
+        ))
+        noeuds = top
+        aretes_affichees = len(su)
+    else:
+        ex, ey = coordonnees_aretes(xy, u, v)
+        traces.append(Trace(x=ex, y=ey, line=dict(width=1.5, color='#888'), hoverinfo='none', mode='lines'))
+        noeuds = np.arange(graphe.n)
+        aretes_affichees = len(u)
+
+    # Étiquettes réservées aux noeuds les plus centraux, survol disponible pour tous
+    etiquettes = np.full(graphe.n, '', dtype=object)
+    etiquettes[top] = graphe.noeuds[top]
+    survol = [f"{nom}<br>Contrôle: {c:.2f}" for nom, c in zip(graphe.noeuds[noeuds], intermediarite[noeuds])]
+    taille = 20 + intermediarite[noeuds] * 60 if not webgl else 6 + intermediarite[noeuds] * 30
+    traces.append(Trace(
+        x=xy[noeuds, 0], y=xy[noeuds, 1], mode='markers+text', hoverinfo='text',
+        text=etiquettes[noeuds].tolist(), hovertext=survol, textposition="top center",
+        marker=dict(size=taille, color='#1f3a60', line=dict(width=2 if not webgl else 1, color='#e67e22'))
+    ))
+    figure = go.Figure(data=traces, layout=_mise_en_page(titre))
+    return figure, aretes_affichees, len(noeuds), super_noeuds
+
+
+def figure_reseau(graphe, xy, intermediarite, mode='auto', poids_min=None, top_k_labels=15,
+                  taille_max_octets=TAILLE_MAX_OCTETS, titre="Réseau d'Influence de Démocratie Libérale"):
+    """Figure du réseau avec niveaux de détail, ramenée sous taille_max_octets de JSON.
+
+    mode : 'svg', 'webgl' ou 'auto'. Si la figure dépasse le plafond, les arêtes les plus faibles
+    sont masquées (seuil par quantile) puis la grille d'agrégation est resserrée.
+    """
+    webgl = graphe.m > SEUIL_WEBGL if mode == 'auto' else mode == 'webgl'
+    if poids_min is None:
+        poids_min = graphe.poids.min() if graphe.m else 0.0
+    cellules = int(np.sqrt(SEUIL_AGREGATION)) if graphe.n > SEUIL_AGREGATION else 0
+    quantile = 0.0
+    while True:
+        seuil = max(poids_min, np.quantile(graphe.poids, quantile)) if graphe.m else poids_min
+        figure, aretes, noeuds, super_noeuds = _construire(
+            graphe, xy, intermediarite, webgl, seuil, top_k_labels, cellules, titre)
+        taille = len(pio.to_json(figure, validate=False))
+        if taille <= taille_max_octets or (quantile >= 0.99 and cellules == 4):
+            return RenduReseau(figure, graphe.m, aretes, noeuds, super_noeuds, taille)
+        # Réduction progressive du détail jusqu'à respecter le plafond
+        if quantile < 0.99:
+            quantile = min(0.99, quantile + 0.25)
+        else:
+            cellules = max(4, cellules // 2) if cellules else int(np.sqrt(SEUIL_AGREGATION))
+
+
+def figure_reseau_anime(graphe, serie, xy, mesure='Contrôle des Réseaux', noeuds_max=150, images_max=60,
+                        top_k_labels=10):
+    """Réseau temporel animé : une image par fenêtre (échantillonnées au-delà de images_max), relations
+    actives et taille des noeuds selon la mesure, restreint aux noeuds_max acteurs les plus centraux"""
+    import pandas as pd
+    table = serie.table
+    retenus = table.groupby('Acteur')[mesure].max().nlargest(noeuds_max).index
+    indices = pd.Index(graphe.noeuds).get_indexer(retenus)
+    dans = np.zeros(graphe.n, dtype=bool)
+    dans[indices] = True
+    valeurs = (table[table['Acteur'].isin(retenus)].pivot_table(index='Periode', columns='Acteur', values=mesure)
+               .reindex(columns=retenus))
+    maximum = float(np.nanmax(valeurs.to_numpy())) if valeurs.size else 0.0
+    fenetres = serie.fenetres
+    choix = np.unique(np.linspace(0, len(fenetres) - 1, min(images_max, len(fenetres))).round().astype(int))
+    images = []
+    for i in choix:
+        debut, fin = fenetres['Debut'].iloc[i], fenetres['Fin'].iloc[i]
+        actives = np.flatnonzero(graphe.actives(debut, fin) & dans[graphe.sources] & dans[graphe.cibles])
+        x, y = coordonnees_aretes(xy, graphe.sources[actives], graphe.cibles[actives])
+        ligne = valeurs.loc[debut].to_numpy() if debut in valeurs.index else np.full(len(retenus), np.nan)
+        presents = np.flatnonzero(~np.isnan(ligne))
+        etiquetes = presents[np.argsort(-ligne[presents], kind='stable')[:top_k_labels]]
+        texte = np.where(np.isin(presents, etiquetes), graphe.noeuds[indices[presents]].astype(str), '')
+        # Images en dictionnaires : la validation Plotly de dizaines d'images coûterait plus que leur calcul
+        images.append({'name': str(debut.date()), 'data': [
+            {'type': 'scatter', 'x': x, 'y': y, 'mode': 'lines', 'line': {'width': 1, 'color': '#888'},
+             'hoverinfo': 'none'},
+            {'type': 'scatter', 'x': xy[indices[presents], 0], 'y': xy[indices[presents], 1],
+             'mode': 'markers+text', 'text': texte, 'textposition': 'top center',
+             'hovertext': graphe.noeuds[indices[presents]].astype(str), 'hoverinfo': 'text',
+             'marker': {'size': 8 + 32 * ligne[presents] / (maximum or 1.0), 'color': '#1f3a60',
+                        'line': {'width': 2, 'color': 'white'}}},
+        ]})
+    mise_en_page = _mise_en_page("Réseau d'influence par fenêtre temporelle").to_plotly_json()
+    mise_en_page.update(
+        height=550, margin={'b': 80, 'l': 5, 'r': 5, 't': 40},
+        updatemenus=[{'type': 'buttons', 'showactive': False, 'x': 0, 'y': 0, 'xanchor': 'left', 'yanchor': 'top',
+                      'buttons': [
+                          {'label': '▶', 'method': 'animate',
+                           'args': [None, {'frame': {'duration': 400, 'redraw': True}, 'fromcurrent': True}]},
+                          {'label': '⏸', 'method': 'animate',
+                           'args': [[None], {'frame': {'duration': 0}, 'mode': 'immediate'}]}]}],
+        sliders=[{'x': 0.08, 'len': 0.92, 'y': 0, 'currentvalue': {'prefix': 'Fenêtre : '}, 'steps': [
+            {'label': image['name'], 'method': 'animate',
+             'args': [[image['name']], {'frame': {'duration': 0, 'redraw': True}, 'mode': 'immediate'}]}
+            for image in images]}])
+    fig = go.Figure({'data': images[0]['data'] if images else [], 'frames': images, 'layout': mise_en_page},
+                    _validate=False)
+    return fig
+
+
+def figure_ego(graphe, xy, noeuds, communautes, chemin=(), titre="Chemin et voisinage"):
+    """Réseau ego : relations entre les acteurs retenus, couleur par communauté, chemin mis en évidence"""
+    from plotly.colors import qualitative
+    noeuds = np.asarray(noeuds, dtype=np.int64)
+    chemin = np.asarray(chemin, dtype=np.int64)
+    dans = np.zeros(graphe.n, dtype=bool)
+    dans[noeuds] = True
+    garde = dans[graphe.sources] & dans[graphe.indices]
+    ex, ey = coordonnees_aretes(xy, graphe.sources[garde], graphe.indices[garde])
+    cx, cy = coordonnees_aretes(xy, chemin[:-1], chemin[1:])
+    palette = np.array(qualitative.Plotly, dtype=object)
+    etiquettes = np.where(np.isin(noeuds, chemin), graphe.noeuds[noeuds].astype(str), '')
+    traces = [
+        go.Scatter(x=ex, y=ey, line=dict(width=1, color='#bbb'), hoverinfo='none', mode='lines'),
+        go.Scatter(x=cx, y=cy, line=dict(width=4, color='#e67e22'), hoverinfo='none', mode='lines'),
+        go.Scatter(
+            x=xy[noeuds, 0], y=xy[noeuds, 1], mode='markers+text', hoverinfo='text', textposition='top center',
+            text=etiquettes.tolist(),
+            hovertext=[f"{nom}<br>Communauté {c}" for nom, c in zip(graphe.noeuds[noeuds], communautes[noeuds])],
+            marker=dict(size=np.where(np.isin(noeuds, chemin), 16, 9),
+                        color=palette[communautes[noeuds] % len(palette)], line=dict(width=1, color='#1f3a60'))),
+    ]
+    mise_en_page = _mise_en_page(titre)
+    mise_en_page.update(annotations=[dict(
+        text="Couleur : communauté ; en orange, le plus court chemin entre les deux acteurs.", showarrow=False,
+        xref="paper", yref="paper", x=0.005, y=-0.002, xanchor='left', yanchor='bottom', font=dict(size=12))])
+    return go.Figure(data=traces, layout=mise_en_page)
@@ -0,0 +1,400 @@
+# reseau_temporel.py
+"""Réseau d'influence temporel : relations datées, fenêtres glissantes et centralités incrémentales.
+
+Chaque relation porte un intervalle de validité (colonnes `debut` et `fin` : dates ISO ou années,
+une borne absente restant ouverte). D'une fenêtre à la suivante, seules les relations qui entrent
+ou sortent sont traitées : les degrés sont mis à jour par différence, et l'intermédiarité et la
+proximité ne sont recalculées que dans les composantes connexes touchées par ces relations.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra, shortest_path
+
+from analyse_graphe import (SEUIL_EXACT, TAILLE_LOT, GrapheCSR, accumuler_lot, calculer_centralites, dependances_source,
+                            sources_pour_epsilon)
+from cache_calculs import CacheLRU
+
+# Pas des fenêtres (fréquences pandas) et leurs libellés
+PAS = {'YS': 'Année', 'QS': 'Trimestre', 'MS': 'Mois'}
+# Bornes ouvertes, en jours depuis l'époque
+_DEBUT_OUVERT = np.iinfo(np.int64).min
+_FIN_OUVERTE = np.iinfo(np.int64).max
+# Au-delà de cette taille, une composante touchée est recalculée entièrement, sans état par source
+# conservé (trois matrices n x n)
+TAILLE_MAX_ETAT = 1000
+
+
+def _jours(valeurs, ouverte):
+    """Bornes (dates ISO, années ou valeurs absentes) en jours depuis l'époque ; absente -> `ouverte`"""
+    serie = pd.Series(valeurs)
+    serie = serie.astype('Int64') if pd.api.types.is_numeric_dtype(serie) else serie
+    dates = pd.to_datetime(serie.astype('string'), errors='coerce', format='ISO8601')
+    jours = dates.to_numpy('datetime64[D]').astype(np.int64)
+    return np.where(dates.isna().to_numpy(), ouverte, jours)
+
+
+class GrapheTemporel:
+    """Relations orientées pondérées, chacune valide sur [debut, fin] (bornes en jours)"""
+
+    def __init__(self, noeuds, sources, cibles, poids, debut, fin):
+        self.noeuds = np.asarray(noeuds, dtype=object)
+        self.n = len(self.noeuds)
+        self.sources = np.asarray(sources, dtype=np.int64)
+        self.cibles = np.asarray(cibles, dtype=np.int64)
+        self.poids = np.asarray(poids, dtype=np.float64)
+        self.debut = np.asarray(debut, dtype=np.int64)
+        self.fin = np.asarray(fin, dtype=np.int64)
+        self.m = len(self.sources)
+        # Relations triées par début et par fin : entrées et sorties d'une fenêtre par recherche binaire
+        self._ordre_debut = np.argsort(self.debut, kind='stable')
+        self._ordre_fin = np.argsort(self.fin, kind='stable')
+        self._empreinte = None
+
+    @classmethod
+    def depuis_relations(cls, relations):
+        """Graphe temporel des relations {source, target, poids, debut, fin} ; None si elles ne sont pas datées"""
+        df = relations if isinstance(relations, pd.DataFrame) else pd.DataFrame(list(relations))
+        if 'debut' not in df and 'fin' not in df:
+            return None
+        codes, noeuds = pd.factorize(np.column_stack([df['source'].to_numpy(), df['target'].to_numpy()]).ravel())
+        codes = codes.reshape(-1, 2)
+        debut = _jours(df['debut'], _DEBUT_OUVERT) if 'debut' in df else np.full(len(df), _DEBUT_OUVERT)
+        fin = _jours(df['fin'], _FIN_OUVERTE) if 'fin' in df else np.full(len(df), _FIN_OUVERTE)
+        return cls(noeuds, codes[:, 0], codes[:, 1], df['poids'].to_numpy(dtype=np.float64), debut, fin)
+
+    @property
+    def empreinte(self):
+        """Hash du contenu du graphe et des intervalles, utilisé comme clé de cache"""
+        if self._empreinte is None:
+            h = hashlib.sha256()
+            h.update('\x1f'.join(map(str, self.noeuds)).encode())
+            for tableau in (self.sources, self.cibles, self.poids, self.debut, self.fin):
+                h.update(np.ascontiguousarray(tableau).tobytes())
+            self._empreinte = h.hexdigest()
+        return self._empreinte
+
+    @property
+    def periode(self):
+        """Première et dernière date connues des intervalles (None si aucune borne n'est datée)"""
+        bornes = np.concatenate([self.debut[self.debut != _DEBUT_OUVERT], self.fin[self.fin != _FIN_OUVERTE]])
+        if len(bornes) == 0:
+            return None
+        return tuple(pd.Timestamp(np.datetime64(int(j), 'D')) for j in (bornes.min(), bornes.max()))
+
+    def fenetres(self, pas='YS', largeur=1):
+        """Fenêtres glissantes [départ, fin) : une par pas sur la période, chacune couvrant `largeur` pas"""
+        premiere, derniere = self.periode
+        departs = pd.date_range(premiere.to_period(pas[0]).start_time, derniere, freq=pas)
+        return pd.DataFrame({'Debut': departs, 'Fin': departs + pd.tseries.frequencies.to_offset(pas) * largeur})
+
+    def actives(self, debut, fin):
+        """Masque des relations valides pendant la fenêtre [debut, fin)"""
+        return (self.debut < _en_jours(fin)) & (self.fin >= _en_jours(debut))
+
+    def sous_graphe(self, aretes, noeuds=None):
+        """Graphe compact (CSR) des relations données, sur les noeuds donnés ou leurs extrémités"""
+        if noeuds is None:
+            noeuds = np.union1d(self.sources[aretes], self.cibles[aretes])
+        return GrapheCSR(self.noeuds[noeuds], np.searchsorted(noeuds, self.sources[aretes]),
+                         np.searchsorted(noeuds, self.cibles[aretes]), self.poids[aretes])
+
+
+def _en_jours(date):
+    return pd.Timestamp(date).to_datetime64().astype('datetime64[D]').astype(np.int64)
+
+
+@dataclass
+class SerieCentralites:
+    """Centralités par fenêtre (format long) et bilan du calcul de chaque fenêtre"""
+    table: pd.DataFrame
+    fenetres: pd.DataFrame
+    mode: str
+    duree_s: float
+
+
+def _positions(reference, noeuds):
+    """Position de chaque noeud dans le tableau trié `reference` (-1 s'il n'y figure pas)"""
+    positions = np.minimum(np.searchsorted(reference, noeuds), len(reference) - 1)
+    return np.where(reference[positions] == noeuds, positions, -1)
+
+
+class _EtatComposante:
+    """Distances (pondérées et en sauts) et dépendances de chaque source d'une composante, en matrices denses"""
+
+    def __init__(self, noeuds, distances, sauts, dependances):
+        self.noeuds = noeuds
+        self.distances = distances
+        self.sauts = sauts
+        self.dependances = dependances
+        # Valeurs brutes de la composante : sommes des contributions de toutes les sources
+        self.intermediarite, self.atteints, self.somme_dist = self._contributions(slice(None))
+
+    def _contributions(self, lignes):
+        sauts = self.sauts[lignes]
+        accessibles = np.isfinite(sauts) & (sauts > 0)
+        return (self.dependances[lignes].sum(axis=0), accessibles.sum(axis=0).astype(np.float64),
+                np.where(accessibles, sauts, 0).sum(axis=0))
+
+    def parcourir(self, sous, sources):
+        """Recalcule les plus courts chemins et dépendances des sources données, et les sommes par acteur"""
+        if len(sources) == 0:
+            return
+        for total, contribution in zip((self.intermediarite, self.atteints, self.somme_dist),
+                                       self._contributions(sources)):
+            total -= contribution
+        A = sous.matrice()
+        for lot in range(0, len(sources), TAILLE_LOT):
+            indices = sources[lot:lot + TAILLE_LOT]
+            self.distances[indices] = dijkstra(A, directed=True, indices=indices)
+            self.sauts[indices] = shortest_path(A, method='D', directed=True, unweighted=True, indices=indices)
+            for s in indices:
+                self.dependances[s] = dependances_source(sous, self.distances[s], s)
+        for total, contribution in zip((self.intermediarite, self.atteints, self.somme_dist),
+                                       self._contributions(sources)):
+            total += contribution
+
+    def sources_touchees(self, graphe, ajouts, retraits, tol=1e-9):
+        """Sources dont les plus courts chemins peuvent changer avec ces relations (distances d'avant)"""
+        touchees = np.zeros(len(self.noeuds), dtype=bool)
+        for aretes, ajout in ((ajouts, True), (retraits, False)):
+            u, v = _positions(self.noeuds, graphe.sources[aretes]), _positions(self.noeuds, graphe.cibles[aretes])
+            garder = (u >= 0) & ((v >= 0) | ajout)
+            if not garder.any():
+                continue
+            u, v, w = u[garder], v[garder], graphe.poids[aretes][garder]
+            du, hu = self.distances[:, u], self.sauts[:, u]
+            dv = np.where(v >= 0, self.distances[:, v], np.inf)
+            hv = np.where(v >= 0, self.sauts[:, v], np.inf)
+            with np.errstate(invalid='ignore'):
+                if ajout:
+                    # Nouveau chemin aussi court qu'un plus court chemin existant
+                    change = np.isfinite(du) & ((du + w <= dv + tol) | (hu + 1 < hv))
+                else:
+                    # Relation retirée située sur un plus court chemin
+                    change = np.isfinite(du) & ((np.abs(du + w - dv) <= tol) | (hu + 1 == hv))
+            touchees |= change.any(axis=1)
+        return touchees
+
+
+def _brut_composante(sous, epsilon, graine):
+    """Intermédiarité, accessibilité et distances brutes d'une composante (échantillonnées si trop grande),
+    et nombre de sources parcourues"""
+    n = sous.n
+    if n * sous.m <= SEUIL_EXACT:
+        sources = np.arange(n)
+    else:
+        sources = np.random.default_rng(graine).permutation(n)[:min(n, sources_pour_epsilon(n, epsilon))]
+    intermediarite, atteints, somme_dist = np.zeros(n), np.zeros(n), np.zeros(n)
+    A = sous.matrice()
+    for lot in range(0, len(sources), TAILLE_LOT):
+        accumuler_lot(sous, A, sources[lot:lot + TAILLE_LOT], intermediarite, atteints, somme_dist)
+    echelle = n / len(sources)
+    return intermediarite * echelle, atteints * echelle, somme_dist * echelle, len(sources)
+
+
+class _CentralitesIncrementales:
+    """Valeurs brutes des centralités, mises à jour composante par composante et source par source.
+
+    Une composante touchée par des relations entrées ou sorties est recalculée ; si elle compte au
+    plus TAILLE_MAX_ETAT acteurs, seules ses sources dont les plus courts chemins peuvent changer
+    sont reparcourues, les autres reprenant leurs distances et dépendances de la fenêtre précédente.
+    """
+
+    def __init__(self, graphe, epsilon, graine):
+        self.graphe = graphe
+        self.epsilon, self.graine = epsilon, graine
+        self.intermediarite = np.zeros(graphe.n)
+        self.atteints = np.zeros(graphe.n)
+        self.somme_dist = np.zeros(graphe.n)
+        self.n_composantes = 0
+        self._etats = {}
+        self._etat_de = np.full(graphe.n, -1)
+        self._prochain_etat = 0
+
+    def mettre_a_jour(self, actif, degre, ajouts, retraits):
+        """Met à jour les valeurs brutes ; renvoie le nombre de composantes et de sources recalculées"""
+        graphe = self.graphe
+        if len(ajouts) == 0 and len(retraits) == 0:
+            return 0, 0
+        aretes_actives = np.flatnonzero(actif)
+        n_composantes, etiquettes = connected_components(
+            coo_matrix((np.ones(len(aretes_actives)), (graphe.sources[aretes_actives], graphe.cibles[aretes_actives])),
+                       shape=(graphe.n, graphe.n)), directed=True, connection='weak')
+        self.n_composantes = n_composantes - int((degre == 0).sum())   # acteurs absents de la fenêtre
+        touches = np.unique(np.concatenate([graphe.sources[ajouts], graphe.cibles[ajouts],
+                                            graphe.sources[retraits], graphe.cibles[retraits]]))
+        # Les composantes sans relation entrée ou sortie gardent leurs valeurs brutes
+        self.intermediarite[touches] = self.atteints[touches] = self.somme_dist[touches] = 0.0
+        anciens = {e: self._etats.pop(e) for e in np.unique(self._etat_de[touches]) if e >= 0}
+        self._etat_de[touches] = -1
+        touches = touches[degre[touches] > 0]
+        if len(touches) == 0:
+            return 0, 0
+        composantes = np.unique(etiquettes[touches])
+        aretes = aretes_actives[np.isin(etiquettes[graphe.sources[aretes_actives]], composantes)]
+        aretes = aretes[np.argsort(etiquettes[graphe.sources[aretes]], kind='stable')]
+        bornes = np.searchsorted(etiquettes[graphe.sources[aretes]], composantes, side='right')
+        sources_recalculees = 0
+        for aretes_composante in np.split(aretes, bornes[:-1]):
+            noeuds = np.union1d(graphe.sources[aretes_composante], graphe.cibles[aretes_composante])
+            sources_recalculees += self._recalculer(noeuds, aretes_composante, anciens, ajouts, retraits)
+        return len(composantes), sources_recalculees
+
+    def _recalculer(self, noeuds, aretes, anciens, ajouts, retraits):
+        sous = self.graphe.sous_graphe(aretes, noeuds)
+        n = len(noeuds)
+        if n > TAILLE_MAX_ETAT:
+            *brut, parcourues = _brut_composante(sous, self.epsilon, self.graine)
+            self.intermediarite[noeuds], self.atteints[noeuds], self.somme_dist[noeuds] = brut
+            self._etat_de[noeuds] = -1
+            return parcourues
+        identique = [a for a in anciens.values() if np.array_equal(a.noeuds, noeuds)]
+        if identique:
+            # Mêmes acteurs qu'à la fenêtre précédente : matrices mises à jour sur place
+            etat = identique[0]
+            sources = np.flatnonzero(etat.sources_touchees(self.graphe, ajouts, retraits))
+        else:
+            distances, sauts = np.full((n, n), np.inf), np.full((n, n), np.inf)
+            dependances = np.zeros((n, n))
+            a_parcourir = np.ones(n, dtype=bool)
+            for ancien in anciens.values():
+                # Sources des composantes précédentes : lignes reprises si leurs plus courts chemins sont intacts
+                positions = _positions(ancien.noeuds, noeuds)
+                communs = np.flatnonzero(positions >= 0)
+                if len(communs) == 0:
+                    continue
+                intactes = ~ancien.sources_touchees(self.graphe, ajouts, retraits)[positions[communs]]
+                lignes, lignes_anciennes = communs[intactes], positions[communs][intactes]
+                grille, cible = np.ix_(lignes_anciennes, positions[communs]), np.ix_(lignes, communs)
+                distances[cible] = ancien.distances[grille]
+                sauts[cible] = ancien.sauts[grille]
+                dependances[cible] = ancien.dependances[grille]
+                a_parcourir[lignes] = False
+            etat = _EtatComposante(noeuds, distances, sauts, dependances)
+            sources = np.flatnonzero(a_parcourir)
+        etat.parcourir(sous, sources)
+        self.intermediarite[noeuds], self.atteints[noeuds], self.somme_dist[noeuds] = (
+            etat.intermediarite, etat.atteints, etat.somme_dist)
+        self._etats[self._prochain_etat] = etat
+        self._etat_de[noeuds] = self._prochain_etat
+        self._prochain_etat += 1
+        return len(sources)
+
+
+def _normaliser(n, degre, intermediarite, atteints, somme_dist):
+    """Normalisation de calculer_centralites, pour les n acteurs présents dans la fenêtre"""
+    if n > 2:
+        intermediarite = intermediarite / ((n - 1) * (n - 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proximite = np.where(somme_dist > 0, atteints ** 2 / (max(n - 1, 1) * somme_dist), 0.0)
+    return degre / max(n - 1, 1), intermediarite, proximite
+
+
+def centralites_temporelles(graphe, pas='YS', largeur=1, incremental=True, epsilon=0.05, graine=42):
+    """Centralités de chaque fenêtre glissante, mises à jour d'une fenêtre à l'autre.
+
+    incremental=False recalcule chaque fenêtre entièrement (calculer_centralites), pour comparaison.
+    """
+    debut_calcul = time.perf_counter()
+    fenetres = graphe.fenetres(pas, largeur)
+    departs = fenetres['Debut'].to_numpy('datetime64[D]').astype(np.int64)
+    fins = fenetres['Fin'].to_numpy('datetime64[D]').astype(np.int64)
+    debut_trie, fin_trie = graphe.debut[graphe._ordre_debut], graphe.fin[graphe._ordre_fin]
+
+    actif = np.zeros(graphe.m, dtype=bool)
+    # Relations retenues dans la fenêtre : pour une paire (source, cible) répétée, seule la dernière
+    # relation active compte, comme dans GrapheCSR.depuis_relations (un arc répété remplace le précédent)
+    retenue = np.zeros(graphe.m, dtype=bool)
+    _, paire, effectifs = np.unique(graphe.sources * graphe.n + graphe.cibles, return_inverse=True,
+                                    return_counts=True)
+    repetees = np.flatnonzero(effectifs[paire] > 1)
+    degre = np.zeros(graphe.n, dtype=np.int64)
+    incrementales = _CentralitesIncrementales(graphe, epsilon, graine)
+    colonnes = {'fenetre': [], 'acteur': [], 'degre': [], 'intermediarite': [], 'proximite': []}
+    bilans = []
+    depart_prec = fin_prec = _DEBUT_OUVERT
+    for i, (depart, fin) in enumerate(zip(departs, fins)):
+        debut_fenetre = time.perf_counter()
+        # Seules les relations dont le début ou la fin tombe entre les deux fenêtres changent d'état
+        candidates = np.union1d(
+            graphe._ordre_debut[np.searchsorted(debut_trie, fin_prec):np.searchsorted(debut_trie, fin)],
+            graphe._ordre_fin[np.searchsorted(fin_trie, depart_prec):np.searchsorted(fin_trie, depart)])
+        depart_prec, fin_prec = depart, fin
+        actif[candidates] = (graphe.debut[candidates] < fin) & (graphe.fin[candidates] >= depart)
+        examinees = np.union1d(candidates, repetees)
+        derniere = np.full(len(effectifs), -1)
+        np.maximum.at(derniere, paire[repetees[actif[repetees]]], repetees[actif[repetees]])
+        nouvel_etat = actif[examinees] & ((effectifs[paire[examinees]] == 1) | (derniere[paire[examinees]] == examinees))
+        ajouts = examinees[nouvel_etat & ~retenue[examinees]]
+        retraits = examinees[~nouvel_etat & retenue[examinees]]
+        retenue[examinees] = nouvel_etat
+        for aretes, signe in ((ajouts, 1), (retraits, -1)):
+            np.add.at(degre, graphe.sources[aretes], signe)
+            np.add.at(degre, graphe.cibles[aretes], signe)
+        presents = np.flatnonzero(degre > 0)
+        aretes_actives = np.flatnonzero(retenue)
+
+        if not incremental:
+            sous = graphe.sous_graphe(aretes_actives, presents)
+            resultat = calculer_centralites(sous, epsilon=epsilon, graine=graine).table.set_index('Acteur')
+            mesures = [resultat.loc[sous.noeuds, c].to_numpy() for c in
+                       ('Influence Directe', 'Contrôle des Réseaux', 'Accessibilité Stratégique')]
+            recalculees = n_composantes = 1
+            sources_recalculees = len(presents)
+        else:
+            n_composantes, sources_recalculees = incrementales.mettre_a_jour(retenue, degre, ajouts, retraits)
+            mesures = _normaliser(len(presents), degre[presents], incrementales.intermediarite[presents],
+                                  incrementales.atteints[presents], incrementales.somme_dist[presents])
+            recalculees, n_composantes = n_composantes, incrementales.n_composantes
+
+        colonnes['fenetre'].append(np.full(len(presents), i))
+        colonnes['acteur'].append(presents)
+        for nom, valeurs in zip(('degre', 'intermediarite', 'proximite'), mesures):
+            colonnes[nom].append(valeurs)
+        bilans.append({'Acteurs': len(presents), 'Relations': len(aretes_actives), 'Ajouts': len(ajouts),
+                       'Retraits': len(retraits), 'Composantes': n_composantes, 'Composantes_recalculees': recalculees,
+                       'Sources_recalculees': sources_recalculees,
+                       'duree_s': time.perf_counter() - debut_fenetre})
+
+    colonnes = {nom: np.concatenate(valeurs) if valeurs else np.zeros(0) for nom, valeurs in colonnes.items()}
+    fenetre = colonnes['fenetre'].astype(np.int64)
+    table = pd.DataFrame({
+        'Periode': fenetres['Debut'].to_numpy()[fenetre],
+        'Acteur': graphe.noeuds[colonnes['acteur'].astype(np.int64)],
+        'Influence Directe': colonnes['degre'],
+        'Contrôle des Réseaux': colonnes['intermediarite'],
+        'Accessibilité Stratégique': colonnes['proximite'],
+    })
+    return SerieCentralites(table=table, fenetres=pd.concat([fenetres, pd.DataFrame(bilans)], axis=1),
+                            mode='incremental' if incremental else 'complet',
+                            duree_s=time.perf_counter() - debut_calcul)
+
+
+def ecart_fenetre(graphe, serie, fenetre, epsilon=0.05, graine=42):
+    """Plus grand écart absolu, sur une fenêtre de la série, avec calculer_centralites appliqué au
+    graphe statique des relations actives (GrapheCSR.depuis_relations, dans l'ordre d'origine)"""
+    depart, fin = serie.fenetres.loc[fenetre, ['Debut', 'Fin']]
+    aretes = np.flatnonzero(graphe.actives(depart, fin))
+    statique = GrapheCSR.depuis_relations(pd.DataFrame({
+        'source': graphe.noeuds[graphe.sources[aretes]], 'target': graphe.noeuds[graphe.cibles[aretes]],
+        'poids': graphe.poids[aretes]}))
+    reference = calculer_centralites(statique, epsilon=epsilon, graine=graine).table.set_index('Acteur')
+    mesuree = serie.table[serie.table['Periode'] == depart].set_index('Acteur')
+    colonnes = ['Influence Directe', 'Contrôle des Réseaux', 'Accessibilité Stratégique']
+    if len(mesuree) != len(reference) or not mesuree.index.isin(reference.index).all():
+        return np.inf
+    return float(np.abs(mesuree[colonnes].to_numpy() - reference.loc[mesuree.index, colonnes].to_numpy()).max(initial=0.0))
+
+
+_CACHE = CacheLRU(capacite=8)
+
+
+def centralites_temporelles_en_cache(graphe, **parametres):
+    """Centralités par fenêtre, calculées une seule fois par processus pour un contenu et des paramètres"""
+    return _CACHE.obtenir((graphe.empreinte, tuple(sorted(parametres.items()))),
+                          lambda: centralites_temporelles(graphe, **parametres))
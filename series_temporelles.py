@@ -0,0 +1,154 @@
+# series_temporelles.py
+"""Store de séries temporelles : tranches par période et réduction à la résolution du graphique.
+
+Chaque série est gardée triée par temps (années entières ou dates numpy). Une requête découpe la
+période demandée par recherche dichotomique puis réduit chaque série à au plus `points` points,
+soit par LTTB (Largest-Triangle-Three-Buckets, qui conserve la forme visuelle), soit par min/max
+par intervalle (qui conserve les extrêmes). Le volume envoyé au navigateur dépend ainsi de la
+largeur du graphique et non de la longueur des séries ; un zoom sur une période plus courte
+relance la requête et affiche plus de détail pour le même nombre de points.
+"""
+import numpy as np
+import pandas as pd
+
+METHODES = {'lttb': 'LTTB (forme)', 'minmax': 'Min/Max (extrêmes)'}
+POINTS_DEFAUT = 1000
+
+
+def reduire_minmax(x, y, points):
+    """Positions des extrémités et du minimum et du maximum de chaque intervalle ((points - 2) / 2
+    intervalles de même effectif), soit au plus `points` positions"""
+    n = len(x)
+    if n <= points:
+        return np.arange(n)
+    if points < 4:
+        # Pas de place pour un intervalle en plus des extrémités
+        return np.array([0, n - 1])[:points]
+    n_seaux = (points - 2) // 2
+    largeur = -(-n // n_seaux)
+    n_seaux = -(-n // largeur)
+    # Complément du dernier intervalle neutre pour argmin (+inf) et argmax (-inf)
+    bas = np.full(n_seaux * largeur, np.inf)
+    haut = np.full(n_seaux * largeur, -np.inf)
+    bas[:n] = haut[:n] = y
+    decalages = np.arange(n_seaux) * largeur
+    minima = decalages + bas.reshape(n_seaux, largeur).argmin(axis=1)
+    maxima = decalages + haut.reshape(n_seaux, largeur).argmax(axis=1)
+    return np.unique(np.concatenate([[0, n - 1], minima, maxima]))
+
+
+def reduire_lttb(x, y, points):
+    """Positions retenues par LTTB : dans chaque intervalle, le point formant le plus grand triangle
+    avec le point retenu précédent et la moyenne de l'intervalle suivant"""
+    n = len(x)
+    if n <= points or points < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    bornes = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # Moyennes de tous les intervalles en une passe, plus le dernier point comme intervalle final
+    effectifs = np.diff(bornes)
+    moyenne_x = np.append(np.add.reduceat(x[1:n - 1], bornes[:-1] - 1) / effectifs, x[n - 1])
+    moyenne_y = np.append(np.add.reduceat(y[1:n - 1], bornes[:-1] - 1) / effectifs, y[n - 1])
+    retenus = np.empty(points, dtype=np.int64)
+    retenus[0], retenus[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        debut, fin = bornes[i], bornes[i + 1]
+        aires = np.abs((x[a] - moyenne_x[i + 1]) * (y[debut:fin] - y[a])
+                       - (x[a] - x[debut:fin]) * (moyenne_y[i + 1] - y[a]))
+        a = debut + int(aires.argmax())
+        retenus[i + 1] = a
+    return retenus
+
+
+REDUCTIONS = {'lttb': reduire_lttb, 'minmax': reduire_minmax}
+
+
+class SerieTemporelle:
+    """Série triée par temps, sans valeurs manquantes ; le temps est stocké en int64 (années ou dates)"""
+
+    def __init__(self, temps, valeurs):
+        temps, valeurs = np.asarray(temps), np.asarray(valeurs, dtype=np.float64)
+        connues = np.isfinite(valeurs)
+        ordre = np.argsort(temps[connues], kind='stable')
+        self.dtype = temps.dtype
+        self.temps = temps[connues][ordre].view(np.int64) if temps.dtype.kind == 'M' \
+            else temps[connues][ordre].astype(np.int64)
+        self.valeurs = valeurs[connues][ordre]
+
+    def __len__(self):
+        return len(self.temps)
+
+    def instant(self, position):
+        """Temps du point à cette position, dans le type d'origine"""
+        return self.temps[position:position + 1 or None].view(self.dtype)[0] if self.dtype.kind == 'M' \
+            else self.temps[position]
+
+    def _entier(self, borne):
+        if self.dtype.kind == 'M':
+            return np.datetime64(borne).astype(self.dtype).view(np.int64)
+        return int(borne)
+
+    def bornes(self, debut=None, fin=None):
+        """Positions [i, j) des points dont le temps est compris entre debut et fin (inclus)"""
+        i = 0 if debut is None else int(np.searchsorted(self.temps, self._entier(debut), side='left'))
+        j = len(self) if fin is None else int(np.searchsorted(self.temps, self._entier(fin), side='right'))
+        return i, j
+
+    def tranche(self, debut=None, fin=None, points=None, methode='lttb'):
+        """Temps (dans le type d'origine) et valeurs de la période, réduits à au plus `points` points"""
+        i, j = self.bornes(debut, fin)
+        temps, valeurs = self.temps[i:j], self.valeurs[i:j]
+        if points is not None:
+            retenus = REDUCTIONS[methode](temps, valeurs, points)
+            temps, valeurs = temps[retenus], valeurs[retenus]
+        return (temps.view(self.dtype) if self.dtype.kind == 'M' else temps), valeurs
+
+
+class StoreSeries:
+    """Séries nommées interrogées par période, chacune réduite à la résolution demandée"""
+
+    def __init__(self, series):
+        self.series = dict(series)
+
+    @classmethod
+    def depuis_colonnes(cls, temps, colonnes):
+        """Store de séries partageant un même axe de temps : {nom: valeurs}"""
+        return cls({nom: SerieTemporelle(temps, valeurs) for nom, valeurs in colonnes.items()})
+
+    @classmethod
+    def depuis_table(cls, table, temps, valeurs, groupe=None):
+        """Store construit depuis une table longue ; avec `groupe`, une série par (groupe, colonne),
+        nommée « colonne/groupe » (par exemple une série de membres par parti)"""
+        if groupe is None:
+            return cls.depuis_colonnes(table[temps].to_numpy(), {v: table[v].to_numpy() for v in valeurs})
+        return cls({f'{v}/{nom}': SerieTemporelle(lignes[temps].to_numpy(), lignes[v].to_numpy())
+                    for nom, lignes in table.groupby(groupe, sort=True) for v in valeurs})
+
+    def __len__(self):
+        return sum(len(s) for s in self.series.values())
+
+    def noms(self):
+        return list(self.series)
+
+    def periode(self):
+        """Premier et dernier instant couverts par l'ensemble des séries (type d'origine)"""
+        non_vides = [s for s in self.series.values() if len(s)]
+        debut = min(non_vides, key=lambda s: s.temps[0])
+        fin = max(non_vides, key=lambda s: s.temps[-1])
+        return debut.instant(0), fin.instant(-1)
+
+    def effectif(self, debut=None, fin=None, noms=None):
+        """Nombre de points de la période avant réduction"""
+        return sum(j - i for i, j in (self.series[nom].bornes(debut, fin) for nom in noms or self.series))
+
+    def requete(self, debut=None, fin=None, points=POINTS_DEFAUT, methode='lttb', noms=None):
+        """Table longue (Serie, Temps, Valeur) de la période, au plus `points` points par série"""
+        morceaux = []
+        for nom in noms or self.series:
+            temps, valeurs = self.series[nom].tranche(debut, fin, points, methode)
+            morceaux.append(pd.DataFrame({'Serie': nom, 'Temps': temps, 'Valeur': valeurs}))
+        if not morceaux:
+            return pd.DataFrame({'Serie': pd.Series(dtype=object), 'Temps': pd.Series(dtype=np.int64),
+                                 'Valeur': pd.Series(dtype=np.float64)})
+        return pd.concat(morceaux, ignore_index=True)
@@ -0,0 +1,266 @@
+# snapshot.py
+"""Snapshot compilé des données : un seul fichier projeté en mémoire, chargé en quelques millisecondes.
+
+Le fichier contient un en-tête JSON (parti_data, descripteurs de colonnes, paramètres des
+précalculs) suivi de blocs binaires alignés. Les séries sont décodées sans numpy ni pandas ;
+les tableaux du graphe et du layout sont lus sans copie (np.frombuffer sur le mmap).
+
+Exemple :
+    python snapshot.py --source donnees/dl.db --sortie donnees.dlsnap
+    DL_SOURCE_DONNEES=donnees.dlsnap streamlit run Dashboard.py
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from sources_donnees import POSITIONNEMENT_REFERENCE, DonneesParti, TABLES, obtenir_donnees, ouvrir_source
+
+MAGIQUE = b'DLSNAP01'
+ALIGNEMENT = 64
+# Valeurs par défaut des réglages du dashboard : les résultats précalculés avec ces
+# paramètres sont servis sans calcul à la première ouverture de l'onglet réseau
+PARAMETRES_CENTRALITES = {'mode': 'auto', 'epsilon': 0.05, 'budget_temps_s': 0.8}
+PARAMETRES_LAYOUT = {'k': 1, 'iterations': 50, 'graine': 42}
+# Types binaires du format et leurs codes struct (lecture par memoryview.cast, ordre little-endian)
+_CODES_STRUCT = {'<i8': 'q', '<i4': 'i', '<f8': 'd', '|b1': '?'}
+
+
+class _Ecrivain:
+    """Accumule les blocs binaires et produit leurs descripteurs pour l'en-tête"""
+
+    def __init__(self):
+        self.blocs = []
+        self.taille = 0
+
+    def tableau(self, valeurs):
+        import numpy as np
+        valeurs = np.asarray(valeurs)
+        if valeurs.dtype == object or valeurs.dtype.kind in 'US':
+            # Colonnes de texte (ou mixtes) : modalités dans l'en-tête, codes entiers en binaire
+            import pandas as pd
+            # Valeurs absentes conservées comme modalité (pas de code -1)
+            codes, modalites = pd.factorize(valeurs.astype(object), use_na_sentinel=False)
+            return {'modalites': modalites.tolist(), 'codes': self.tableau(codes.astype(np.int32))}
+        if valeurs.dtype.str not in _CODES_STRUCT:
+            # Entiers et flottants ramenés aux types décodables sans numpy à la lecture
+            valeurs = valeurs.astype(np.float64 if valeurs.dtype.kind == 'f' else np.int64)
+        valeurs = np.ascontiguousarray(valeurs)
+        decalage = self.taille
+        octets = valeurs.tobytes()
+        self.blocs.append(octets + b'\0' * (-len(octets) % ALIGNEMENT))
+        self.taille += len(self.blocs[-1])
+        return {'dtype': valeurs.dtype.str, 'forme': list(valeurs.shape), 'decalage': decalage}
+
+    def table(self, df):
+        return {colonne: self.tableau(df[colonne].to_numpy()) for colonne in df.columns}
+
+
+def compiler(donnees, chemin, precalculs=True):
+    """Écrit le snapshot d'un jeu de données, avec graphe, centralités, layout et modèle précalculés"""
+    import dataclasses
+
+    import pandas as pd
+    ecrivain = _Ecrivain()
+    series = pd.DataFrame({
+        'annee': donnees.annees_chrono,
+        'membres': donnees.evolution_membres,
+        'budget_millions': donnees.evolution_budget,
+        'influence': donnees.influence_politique,
+        'resultats_pct': donnees.resultats_electoraux,
+    })
+    entete = {
+        'empreinte': donnees.empreinte,
+        'compile_le': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parti_data': donnees.parti_data,
+        'tables': {
+            'relations_politiques': ecrivain.table(pd.DataFrame(list(donnees.relations_politiques))),
+            'series_annuelles': ecrivain.table(series),
+            'evenements_cles': ecrivain.table(pd.DataFrame(list(donnees.evenements_cles))),
+            'comparaison_partis': ecrivain.table(donnees.comparaison_partis),
+            'positionnement_ideologique': ecrivain.table(donnees.positionnement),
+        },
+        'precalculs': None,
+    }
+    if donnees.table_series_partis is not None:
+        entete['tables']['series_partis'] = ecrivain.table(pd.DataFrame(dict(donnees.table_series_partis)))
+    if precalculs:
+        from analyse_graphe import GrapheCSR, calculer_centralites
+        from monte_carlo import estimer_modele
+        from store_layout import obtenir_layout
+        graphe = GrapheCSR.depuis_relations(donnees.relations_politiques)
+        resultat = calculer_centralites(graphe, **PARAMETRES_CENTRALITES)
+        positions = obtenir_layout(graphe, **PARAMETRES_LAYOUT)
+        modele = estimer_modele(donnees.annees_chrono, donnees.evolution_membres, donnees.evolution_budget,
+                                donnees.influence_politique, donnees.resultats_electoraux)
+        entete['precalculs'] = {
+            'graphe': {
+                'noeuds': ecrivain.tableau(graphe.noeuds),
+                'sources': ecrivain.tableau(graphe.sources),
+                'cibles': ecrivain.tableau(graphe.indices),
+                'poids': ecrivain.tableau(graphe.poids),
+                'types': None if graphe.types is None else ecrivain.tableau(graphe.types),
+                'empreinte': graphe.empreinte,
+            },
+            'centralites': {
+                'parametres': PARAMETRES_CENTRALITES,
+                'table': ecrivain.table(resultat.table),
+                **{champ: getattr(resultat, champ) for champ in ('mode', 'sources_utilisees', 'n', 'm',
+                                                                 'epsilon', 'duree_s')},
+            },
+            'layout': {
+                'parametres': PARAMETRES_LAYOUT,
+                'xy': ecrivain.tableau([positions[n] for n in graphe.noeuds]),
+            },
+            'modele': dataclasses.asdict(modele),
+        }
+
+    contenu_entete = json.dumps(entete, ensure_ascii=False, default=_json_defaut).encode()
+    debut_blocs = len(MAGIQUE) + 8 + len(contenu_entete)
+    remplissage = -debut_blocs % ALIGNEMENT
+    repertoire = os.path.dirname(os.path.abspath(chemin))
+    # Écriture atomique : un serveur peut relire le snapshot pendant sa recompilation
+    with tempfile.NamedTemporaryFile(dir=repertoire, suffix='.dlsnap', delete=False) as tmp:
+        tmp.write(MAGIQUE + struct.pack('<Q', len(contenu_entete)) + contenu_entete + b'\0' * remplissage)
+        for bloc in ecrivain.blocs:
+            tmp.write(bloc)
+    os.replace(tmp.name, chemin)
+    return chemin
+
+
+def _json_defaut(valeur):
+    # Scalaires numpy (np.int64, np.float64...) des tables
+    if hasattr(valeur, 'item'):
+        return valeur.item()
+    raise TypeError(f"Valeur non sérialisable : {valeur!r}")
+
+
+class Snapshot:
+    """Lecture d'un snapshot compilé ; les blocs binaires restent dans le fichier projeté"""
+
+    def __init__(self, chemin):
+        with open(chemin, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIQUE)] != MAGIQUE:
+            raise ValueError(f"{chemin} n'est pas un snapshot de données compilé")
+        (longueur,) = struct.unpack_from('<Q', self._mmap, len(MAGIQUE))
+        debut = len(MAGIQUE) + 8
+        self.entete = json.loads(self._mmap[debut:debut + longueur])
+        self._debut_blocs = debut + longueur + (-(debut + longueur) % ALIGNEMENT)
+
+    @property
+    def empreinte(self):
+        return self.entete['empreinte']
+
+    def liste(self, descripteur):
+        """Valeurs d'une colonne en liste Python (décodage sans numpy)"""
+        if 'modalites' in descripteur:
+            modalites = descripteur['modalites']
+            return [modalites[i] for i in self.liste(descripteur['codes'])]
+        code = _CODES_STRUCT[descripteur['dtype']]
+        taille = struct.calcsize(code)
+        debut = self._debut_blocs + descripteur['decalage']
+        n = 1
+        for dimension in descripteur['forme']:
+            n *= dimension
+        with memoryview(self._mmap)[debut:debut + n * taille] as vue, vue.cast(code) as valeurs:
+            return valeurs.tolist()
+
+    def tableau(self, descripteur):
+        """Tableau numpy d'une colonne, sans copie pour les colonnes numériques"""
+        import numpy as np
+        if 'modalites' in descripteur:
+            return np.asarray(descripteur['modalites'], dtype=object)[self.tableau(descripteur['codes'])]
+        dtype = np.dtype(descripteur['dtype'])
+        n = int(np.prod(descripteur['forme']))
+        return np.frombuffer(self._mmap, dtype=dtype, count=n,
+                             offset=self._debut_blocs + descripteur['decalage']).reshape(descripteur['forme'])
+
+    def colonnes(self, table):
+        return {colonne: self.liste(d) for colonne, d in self.entete['tables'][table].items()}
+
+    def enregistrements(self, table):
+        colonnes = self.colonnes(table)
+        return tuple(dict(zip(colonnes, ligne)) for ligne in zip(*colonnes.values()))
+
+    def donnees(self):
+        """DonneesParti du snapshot, sans pandas (la table comparative devient un DataFrame à l'usage)"""
+        series = self.colonnes('series_annuelles')
+        # Snapshots compilés avant l'ajout du positionnement : positions de référence
+        positionnement = (self.colonnes('positionnement_ideologique')
+                          if 'positionnement_ideologique' in self.entete['tables'] else POSITIONNEMENT_REFERENCE)
+        return DonneesParti(
+            parti_data=self.entete['parti_data'],
+            relations_politiques=self.enregistrements('relations_politiques'),
+            annees_chrono=tuple(series['annee']),
+            evolution_membres=tuple(series['membres']),
+            evolution_budget=tuple(series['budget_millions']),
+            influence_politique=tuple(series['influence']),
+            resultats_electoraux=tuple(series['resultats_pct']),
+            evenements_cles=self.enregistrements('evenements_cles'),
+            table_comparaison={c: tuple(v) for c, v in self.colonnes('comparaison_partis').items()},
+            table_positionnement={c: tuple(v) for c, v in positionnement.items()},
+            empreinte=self.empreinte,
+            precalculs=Precalculs(self) if self.entete['precalculs'] else None,
+            table_series_partis=({c: tuple(v) for c, v in self.colonnes('series_partis').items()}
+                                 if 'series_partis' in self.entete['tables'] else None),
+        )
+
+
+class Precalculs:
+    """Graphe, centralités, layout et modèle calculés à la compilation"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.entete = snapshot.entete['precalculs']
+
+    def graphe(self):
+        """Graphe compact du snapshot ; amorce les caches de centralités et de layout du processus"""
+        from analyse_graphe import GrapheCSR, ResultatCentralite, amorcer_centralites
+        from store_layout import amorcer_layout
+        import pandas as pd
+        d = self.entete['graphe']
+        graphe = GrapheCSR(self.snapshot.tableau(d['noeuds']), self.snapshot.tableau(d['sources']),
+                           self.snapshot.tableau(d['cibles']), self.snapshot.tableau(d['poids']),
+                           None if d['types'] is None else self.snapshot.tableau(d['types']))
+        if graphe.empreinte != d['empreinte']:
+            # Format de graphe modifié depuis la compilation : les précalculs ne correspondent plus
+            return graphe
+        c = self.entete['centralites']
+        table = pd.DataFrame({colonne: self.snapshot.tableau(desc) for colonne, desc in c['table'].items()})
+        resultat = ResultatCentralite(table, c['mode'], c['sources_utilisees'], c['n'], c['m'],
+                                      c['epsilon'], c['duree_s'])
+        amorcer_centralites(graphe, resultat, **c['parametres'])
+        xy = self.snapshot.tableau(self.entete['layout']['xy'])
+        amorcer_layout(graphe, dict(zip(graphe.noeuds, xy)), **self.entete['layout']['parametres'])
+        return graphe
+
+    def modele(self):
+        from monte_carlo import ModeleParti
+        return ModeleParti(**self.entete['modele'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile une source de données en snapshot projetable en mémoire")
+    parser.add_argument('--source', help="Répertoire CSV/Parquet ou base SQLite (données intégrées par défaut)")
+    parser.add_argument('--sortie', default='donnees.dlsnap')
+    parser.add_argument('--sans-precalculs', action='store_true',
+                        help="Ne pas précalculer graphe, centralités, layout et modèle")
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    donnees = obtenir_donnees(args.source)
+    compiler(donnees, args.sortie, precalculs=not args.sans_precalculs)
+    print(f"{ouvrir_source(args.source).description} -> {args.sortie} "
+          f"({os.path.getsize(args.sortie) / 1e6:.2f} Mo, tables {', '.join(('parti_data',) + TABLES)}) "
+          f"en {time.perf_counter() - debut:.2f} s")
+    debut = time.perf_counter()
+    Snapshot(args.sortie).donnees()
+    print(f"Chargement du snapshot : {1000 * (time.perf_counter() - debut):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+# sources_donnees.py
+"""Sources de données du dashboard, chargées une fois par processus et partagées entre sessions."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+
+# pandas n'est importé qu'à la construction des tables : le chargement d'un snapshot
+# compilé et l'affichage de l'en-tête du dashboard n'en ont pas besoin
+
+# Variable d'environnement désignant la source (répertoire CSV/Parquet ou base SQLite)
+VARIABLE_SOURCE = "DL_SOURCE_DONNEES"
+
+TABLES = ('relations_politiques', 'series_annuelles', 'evenements_cles', 'comparaison_partis',
+          'positionnement_ideologique', 'series_partis')
+EXTENSIONS_SQLITE = ('.db', '.sqlite', '.sqlite3')
+EXTENSION_SNAPSHOT = '.dlsnap'
+# Parti dont les séries annuelles (series_annuelles) sont le sujet du dashboard
+PARTI_REFERENCE = 'Démocratie Libérale'
+
+# Positions de référence sur les axes idéologiques (une colonne numérique par axe)
+POSITIONNEMENT_REFERENCE = {
+    'Parti': ['Démocratie Libérale', 'RPR', 'UDF', 'PS', 'PCF', 'FN'],
+    'Economic': [9, 6, 5, 2, 1, 4],  # 10=libéral, 1=étatiste
+    'Societal': [6, 7, 5, 8, 9, 2],   # 10=progressiste, 1=conservateur
+    'Europe': [8, 6, 8, 7, 3, 1]      # 10=fédéraliste, 1=souverainiste
+}
+
+
+@dataclass(frozen=True)
+class DonneesParti:
+    """Jeu de données complet d'un parti, partagé en lecture seule entre les sessions"""
+    parti_data: dict
+    relations_politiques: tuple
+    annees_chrono: tuple
+    evolution_membres: tuple
+    evolution_budget: tuple
+    influence_politique: tuple
+    resultats_electoraux: tuple
+    evenements_cles: tuple
+    table_comparaison: dict       # colonne -> tuple des valeurs
+    table_positionnement: dict    # colonne -> tuple des valeurs (Parti et un axe par colonne)
+    empreinte: str
+    precalculs: object = None     # Precalculs d'un snapshot compilé (graphe, centralités, layout, modèle)
+    table_series_partis: dict = None  # colonne -> tuple des valeurs (Parti, annee, ...) ; None : parti de référence seul
+
+    @cached_property
+    def comparaison_partis(self):
+        """Table comparative en DataFrame, construite au premier accès"""
+        import pandas as pd
+        return pd.DataFrame({colonne: list(valeurs) for colonne, valeurs in self.table_comparaison.items()})
+
+    @cached_property
+    def positionnement(self):
+        """Positions des partis sur les axes idéologiques, en DataFrame construit au premier accès"""
+        import pandas as pd
+        return pd.DataFrame({colonne: list(valeurs) for colonne, valeurs in self.table_positionnement.items()})
+
+    @cached_property
+    def series_chronologiques(self):
+        """Store des séries annuelles (membres, budget, influence), interrogé par période et résolution"""
+        from series_temporelles import StoreSeries
+        return StoreSeries.depuis_colonnes(self.annees_chrono, {'membres': self.evolution_membres,
+                                                                'budget_millions': self.evolution_budget,
+                                                                'influence': self.influence_politique})
+
+    @cached_property
+    def series_partis(self):
+        """Séries annuelles de tous les partis (table longue), complétées par celles du parti de référence"""
+        import pandas as pd
+        reference = pd.DataFrame({'Parti': PARTI_REFERENCE, 'annee': self.annees_chrono,
+                                  'membres': self.evolution_membres, 'budget_millions': self.evolution_budget,
+                                  'influence': self.influence_politique, 'resultats_pct': self.resultats_electoraux})
+        if self.table_series_partis is None:
+            return reference
+        series = pd.DataFrame({colonne: list(valeurs) for colonne, valeurs in self.table_series_partis.items()})
+        if (series['Parti'] == PARTI_REFERENCE).any():
+            return series
+        return pd.concat([reference, series], ignore_index=True)
+
+
+def donnees_integrees():
+    """Retourne les tables de référence embarquées dans l'application"""
+    import pandas as pd
+    parti_data = {
+        'FONDATION': {
+            'date_creation': '1997-06-24',
+            'fondateur_principal': 'Alain Madelin',
+            'membres_fondateurs': 15,
+            'budget_initial_millions': 2.5,
+            'origine': 'Fusion du Parti républicain et du Parti populaire pour la démocratie française'
+        },
+        'CROISSANCE': {
+            'membres_max': 30000,
+            'elus_nationaux': 42,
+            'ministres_gouvernement': 8,
+            'budget_peak_millions': 15.2,
+            'influence_mediatique': 7
+        },
+        'INFLUENCE': {
+            'doctrine': 'Libéralisme classique',
+            'positionnement': 'Droite libérale',
+            'alliances_strategiques': ['UMP', 'UDF'],
+            'think_tanks_affilies': 3,
+            'courants_internes': ['Libéraux-conservateurs', 'Centristes libéraux']
+        },
+        'HERITAGE': {
+            'dissolution': '2002-11-17',
+            'integration': 'Union pour un mouvement populaire (UMP)',
+            'heritage_ideologique': 'Renouveau de la pensée libérale en France',
+            'personnalites_issues': ['Alain Madelin', 'Jean-Pierre Raffarin', 'Hervé Novelli']
+        }
+    }
+
+    # Relations politiques stratégiques, valides du début à la fin indiqués (fin absente : toujours en cours)
+    relations_politiques = pd.DataFrame([
+        {'source': 'Alain Madelin', 'target': 'Jacques Chirac', 'poids': 8, 'type': 'Alliance tactique',
+         'debut': '1997-06-24', 'fin': '2002-11-17'},
+        {'source': 'Démocratie Libérale', 'target': 'UMP', 'poids': 9, 'type': 'Fusion-absorption',
+         'debut': '2002-04-23', 'fin': '2002-11-17'},
+        {'source': 'Jean-Pierre Raffarin', 'target': 'Démocratie Libérale', 'poids': 7, 'type': 'Leadership',
+         'debut': '1997-06-24', 'fin': '2002-05-06'},
+        {'source': 'Libéraux', 'target': 'Centristes UDF', 'poids': 6, 'type': 'Convergence idéologique',
+         'debut': '1999-06-13', 'fin': '2002-11-17'},
+        {'source': 'Démocratie Libérale', 'target': 'Medias libéraux', 'poids': 5, 'type': 'Influence',
+         'debut': '1997-06-24', 'fin': '2002-11-17'},
+        {'source': 'Alain Madelin', 'target': 'Think tanks', 'poids': 7, 'type': 'Expertise',
+         'debut': '1997-06-24', 'fin': None},
+        {'source': 'DL Jeunes', 'target': 'Démocratie Libérale', 'poids': 4, 'type': 'Militantisme',
+         'debut': '1998-01-01', 'fin': '2002-11-17'}
+    ])
+
+    # Données simulées mais réalistes basées sur l'histoire du parti
+    series_annuelles = pd.DataFrame({
+        'annee': list(range(1997, 2004)),
+        'membres': [5000, 15000, 28000, 30000, 25000, 18000, 12000],
+        'budget_millions': [2.5, 8.2, 12.5, 15.2, 11.8, 8.5, 4.2],
+        'influence': [3, 6, 8, 9, 8, 6, 4],
+        'resultats_pct': [4.2, 5.8, 7.2, 6.8, 5.5, 4.1, 3.2]
+    })
+
+    # Événements clés
+    evenements_cles = pd.DataFrame([
+        {'annee': 1997, 'evenement': 'Fondation officielle', 'impact': 9},
+        {'annee': 1998, 'evenement': 'Premières élections régionales', 'impact': 6},
+        {'annee': 1999, 'evenement': 'Élections européennes - liste commune', 'impact': 7},
+        {'annee': 2000, 'evenement': 'Participation au gouvernement', 'impact': 8},
+        {'annee': 2001, 'evenement': 'Élections municipales - succès local', 'impact': 6},
+        {'annee': 2002, 'evenement': 'Présidentielle + création UMP', 'impact': 10},
+        {'annee': 2003, 'evenement': 'Dissolution officielle', 'impact': 8}
+    ])
+
+    comparaison_partis = pd.DataFrame({
+        'Parti': ['Démocratie Libérale', 'RPR', 'UDF', 'PS', 'PCF', 'FN'],
+        'Période_activité': ['1997-2002', '1976-2002', '1978-2007', '1969-', '1920-', '1972-'],
+        'Membres_max': [30000, 170000, 60000, 120000, 200000, 50000],
+        'Doctrine': ['Libéralisme', 'Gaullisme', 'Centrisme', 'Socialisme', 'Communisme', 'Nationalisme'],
+        'Ministres_gouvernement': [8, 45, 32, 38, 15, 0],
+        'Durée_vie_annees': [5, 26, 29, '53+', '103+', '51+']
+    })
+
+    # Carte politique simplifiée
+    positionnement_ideologique = pd.DataFrame(POSITIONNEMENT_REFERENCE)
+
+    return {
+        'parti_data': parti_data,
+        'relations_politiques': relations_politiques,
+        'series_annuelles': series_annuelles,
+        'evenements_cles': evenements_cles,
+        'comparaison_partis': comparaison_partis,
+        'positionnement_ideologique': positionnement_ideologique,
+    }
+
+
+def _hash_fichiers(chemins):
+    """Calcule le hash SHA-256 du contenu d'une liste de fichiers"""
+    h = hashlib.sha256()
+    for chemin in sorted(chemins):
+        h.update(os.path.basename(chemin).encode())
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloc)
+    return h.hexdigest()
+
+
+def _signature_stat(chemins):
+    """Signature bon marché (mtime, taille) utilisée avant tout calcul de hash"""
+    return tuple(sorted((c, os.stat(c).st_mtime_ns, os.stat(c).st_size) for c in chemins))
+
+
+class SourceIntegree:
+    """Source par défaut : données de référence embarquées dans le code"""
+    description = 'données intégrées'
+
+    def signature(self):
+        return ('integree',)
+
+    def hash_contenu(self):
+        return 'integree'
+
+    def lire_tables(self):
+        return donnees_integrees()
+
+
+class SourceFichiers:
+    """Répertoire de fichiers CSV ou Parquet (un fichier par table + parti_data.json)"""
+
+    def __init__(self, repertoire):
+        self.repertoire = repertoire
+        self.description = f'fichiers {repertoire}'
+
+    def _fichiers(self):
+        return [os.path.join(self.repertoire, nom) for nom in sorted(os.listdir(self.repertoire))
+                if nom == 'parti_data.json' or nom.endswith(('.csv', '.parquet'))]
+
+    def signature(self):
+        return _signature_stat(self._fichiers())
+
+    def hash_contenu(self):
+        return _hash_fichiers(self._fichiers())
+
+    def lire_tables(self):
+        import pandas as pd
+        tables = {}
+        chemin_json = os.path.join(self.repertoire, 'parti_data.json')
+        if os.path.exists(chemin_json):
+            with open(chemin_json, encoding='utf-8') as f:
+                tables['parti_data'] = json.load(f)
+        for table in TABLES:
+            chemin_parquet = os.path.join(self.repertoire, f'{table}.parquet')
+            chemin_csv = os.path.join(self.repertoire, f'{table}.csv')
+            if os.path.exists(chemin_parquet):
+                tables[table] = pd.read_parquet(chemin_parquet)
+            elif os.path.exists(chemin_csv):
+                tables[table] = pd.read_csv(chemin_csv)
+        return tables
+
+
+class SourceSQLite:
+    """Base SQLite contenant une table par jeu de données et une table parti_data(section, contenu)"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.description = f'sqlite {chemin}'
+
+    def signature(self):
+        return _signature_stat([self.chemin])
+
+    def hash_contenu(self):
+        return _hash_fichiers([self.chemin])
+
+    def lire_tables(self):
+        import pandas as pd
+        tables = {}
+        # Ouverture en lecture seule pour ne jamais modifier le mtime de la base
+        with sqlite3.connect(f'file:{self.chemin}?mode=ro', uri=True) as conn:
+            existantes = {ligne[0] for ligne in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if 'parti_data' in existantes:
+                tables['parti_data'] = {section: json.loads(contenu) for section, contenu
+                                        in conn.execute('SELECT section, contenu FROM parti_data')}
+            for table in TABLES:
+                if table in existantes:
+                    tables[table] = pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+        return tables
+
+
+class SourceSnapshot:
+    """Snapshot compilé (voir snapshot.py) : tables et métriques précalculées lues par mmap"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.description = f'snapshot {chemin}'
+
+    def signature(self):
+        return _signature_stat([self.chemin])
+
+    def hash_contenu(self):
+        # Le snapshot porte l'empreinte du contenu de la source compilée : pas de relecture du fichier
+        from snapshot import Snapshot
+        return Snapshot(self.chemin).empreinte
+
+    def lire_donnees(self):
+        from snapshot import Snapshot
+        return Snapshot(self.chemin).donnees()
+
+
+def ouvrir_source(chemin=None):
+    """Construit la source adaptée au chemin (répertoire, base SQLite, snapshot ou données intégrées)"""
+    if not chemin:
+        return SourceIntegree()
+    if os.path.isdir(chemin):
+        return SourceFichiers(chemin)
+    if chemin.endswith(EXTENSIONS_SQLITE):
+        return SourceSQLite(chemin)
+    if chemin.endswith(EXTENSION_SNAPSHOT):
+        return SourceSnapshot(chemin)
+    raise ValueError(f"Source de données non reconnue : {chemin}")
+
+
+def construire_donnees(tables, empreinte):
+    """Assemble un DonneesParti, en complétant les tables absentes par les données intégrées"""
+    reference = donnees_integrees()
+    tables = {**reference, **tables}
+    series = tables['series_annuelles'].sort_values('annee')
+    relations = tables['relations_politiques']
+    evenements = tables['evenements_cles']
+    return DonneesParti(
+        parti_data=tables['parti_data'],
+        relations_politiques=tuple(relations.to_dict('records')),
+        annees_chrono=tuple(int(a) for a in series['annee']),
+        evolution_membres=tuple(series['membres'].tolist()),
+        evolution_budget=tuple(series['budget_millions'].tolist()),
+        influence_politique=tuple(series['influence'].tolist()),
+        resultats_electoraux=tuple(series['resultats_pct'].tolist()),
+        evenements_cles=tuple(evenements.to_dict('records')),
+        table_comparaison={c: tuple(v) for c, v in tables['comparaison_partis'].to_dict('list').items()},
+        table_positionnement={c: tuple(v) for c, v in tables['positionnement_ideologique'].to_dict('list').items()},
+        empreinte=empreinte,
+        table_series_partis=({c: tuple(v) for c, v in tables['series_partis'].to_dict('list').items()}
+                             if 'series_partis' in tables else None),
+    )
+
+
+def exporter_donnees(donnees, destination):
+    """Écrit un jeu de données vers un répertoire CSV ou une base SQLite (amorçage d'une source)"""
+    import pandas as pd
+    tables = {
+        'relations_politiques': pd.DataFrame(list(donnees.relations_politiques)),
+        'series_annuelles': pd.DataFrame({
+            'annee': donnees.annees_chrono,
+            'membres': donnees.evolution_membres,
+            'budget_millions': donnees.evolution_budget,
+            'influence': donnees.influence_politique,
+            'resultats_pct': donnees.resultats_electoraux,
+        }),
+        'evenements_cles': pd.DataFrame(list(donnees.evenements_cles)),
+        'comparaison_partis': donnees.comparaison_partis.astype({'Durée_vie_annees': str}),
+        'positionnement_ideologique': donnees.positionnement,
+    }
+    if donnees.table_series_partis is not None:
+        tables['series_partis'] = pd.DataFrame(dict(donnees.table_series_partis))
+    if destination.endswith(EXTENSIONS_SQLITE):
+        with sqlite3.connect(destination) as conn:
+            conn.execute('DROP TABLE IF EXISTS parti_data')
+            conn.execute('CREATE TABLE parti_data (section TEXT PRIMARY KEY, contenu TEXT)')
+            conn.executemany('INSERT INTO parti_data VALUES (?, ?)',
+                             [(s, json.dumps(c, ensure_ascii=False)) for s, c in donnees.parti_data.items()])
+            for nom, table in tables.items():
+                table.to_sql(nom, conn, if_exists='replace', index=False)
+        return
+    os.makedirs(destination, exist_ok=True)
+    with open(os.path.join(destination, 'parti_data.json'), 'w', encoding='utf-8') as f:
+        json.dump(donnees.parti_data, f, ensure_ascii=False, indent=2)
+    for nom, table in tables.items():
+        table.to_csv(os.path.join(destination, f'{nom}.csv'), index=False)
+
+
+class RegistreDonnees:
+    """Cache process-wide : une entrée par source, rechargée seulement si son contenu change"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._entrees = {}
+
+    def obtenir(self, chemin=None):
+        source = ouvrir_source(chemin)
+        with self._verrou:
+            entree = self._entrees.get(chemin)
+            signature = source.signature()
+            if entree is not None and entree['signature'] == signature:
+                return entree['donnees']
+            # mtime modifié : on ne recharge que si le contenu a réellement changé
+            hash_contenu = source.hash_contenu()
+            if entree is not None and entree['hash'] == hash_contenu:
+                entree['signature'] = signature
+                return entree['donnees']
+            if isinstance(source, SourceSnapshot):
+                donnees = source.lire_donnees()
+            else:
+                donnees = construire_donnees(source.lire_tables(), hash_contenu)
+            self._entrees[chemin] = {'signature': signature, 'hash': hash_contenu, 'donnees': donnees}
+            return donnees
+
+
+_REGISTRE = RegistreDonnees()
+
+
+def obtenir_donnees(chemin=None):
+    """Retourne les données partagées du processus pour la source demandée (ou DL_SOURCE_DONNEES)"""
+    return _REGISTRE.obtenir(chemin or os.environ.get(VARIABLE_SOURCE))
@@ -0,0 +1,42 @@
+# statistiques_mesures.py
+"""Centiles de latence et détection de régressions, communs aux bancs d'essai et tests de charge.
+
+Les centiles sont interpolés linéairement entre les valeurs observées (numpy.percentile, identique
+à statistics.quantiles(method='inclusive')). Une mesure est une régression si elle dépasse la
+référence de même clé à la fois d'une part relative (tolérance) et d'un écart absolu (bruit).
+"""
+import numpy as np
+
+TOLERANCE_DEFAUT = 0.25
+
+
+def centiles(durees, vide=None):
+    """Médiane, 95e et 99e centiles ; `vide` pour chacun s'il n'y a aucune valeur"""
+    if not len(durees):
+        return {'p50': vide, 'p95': vide, 'p99': vide}
+    valeurs = np.percentile(np.asarray(durees, dtype=np.float64), [50, 95, 99])
+    return {nom: float(v) for nom, v in zip(('p50', 'p95', 'p99'), valeurs)}
+
+
+def format_ms(secondes, largeur=8, decimales=2):
+    """Durée en millisecondes alignée à droite, « — » si elle est absente (aucune mesure réussie)"""
+    return f"{1000 * secondes:>{largeur}.{decimales}f}" if secondes is not None else f"{'—':>{largeur}}"
+
+
+def regressions(mesures, reference, cle, bruits, tolerance=TOLERANCE_DEFAUT):
+    """[(mesure, critère, valeur de référence)] des critères en régression ; `cle(mesure)` associe
+    une mesure à celle de la référence, `bruits` donne l'écart absolu ignoré par critère. Un
+    critère sans valeur (étape ignorée) d'un côté ou de l'autre n'est pas comparé"""
+    index = {cle(m): m for m in reference['mesures']}
+    trouvees = []
+    for m in mesures:
+        ref = index.get(cle(m))
+        if ref is None:
+            continue
+        for critere, bruit in bruits.items():
+            valeur, valeur_ref = m.get(critere), ref.get(critere)
+            if valeur is None or valeur_ref is None:
+                continue
+            if valeur > valeur_ref * (1 + tolerance) and valeur - valeur_ref > bruit:
+                trouvees.append((m, critere, valeur_ref))
+    return trouvees
@@ -0,0 +1,265 @@
+# store_layout.py
+"""Cache persistant des positions du réseau, indexé par le contenu du graphe et les paramètres de layout.
+
+Au-delà de SEUIL_MULTINIVEAU noeuds, le layout est multiniveau : le graphe est contracté en super-noeuds,
+seul le plus petit niveau passe par le layout de force de networkx, puis chaque niveau est déployé et
+affiné en opérations vectorisées.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import networkx as nx
+import numpy as np
+
+from cache_calculs import CacheLRU
+
+VARIABLE_REPERTOIRE = "DL_REPERTOIRE_LAYOUTS"
+REPERTOIRE_DEFAUT = os.path.join(os.path.expanduser('~'), '.cache', 'dashboard_dl', 'layouts')
+
+# Au-delà de cette proportion de noeuds modifiés, un layout complet est recalculé
+PROPORTION_MAX_INCREMENTALE = 0.5
+# Au-delà de ce nombre de noeuds, le layout de force (quadratique) ne porte que sur des super-noeuds
+SEUIL_MULTINIVEAU = 500
+NOMBRE_OR = np.pi * (3 - np.sqrt(5))
+# Affinage à chaque niveau : itérations, et noeuds tirés au sort pour estimer la répulsion
+ITERATIONS_AFFINAGE = 15
+ECHANTILLON_REPULSION = 16
+
+
+def _aretes(noeuds, sources, cibles, poids):
+    return set(zip(map(str, noeuds[sources]), map(str, noeuds[cibles]), poids.tolist()))
+
+
+def _relacher(xy, mobiles, A, k, iterations, taille_lot=64):
+    """Fruchterman-Reingold restreint aux noeuds mobiles, les autres servant d'ancrage"""
+    xy = xy.copy()
+    temperature = 0.1 * k
+    pas = temperature / (iterations + 1)
+    for _ in range(iterations):
+        for debut in range(0, len(mobiles), taille_lot):
+            lot = mobiles[debut:debut + taille_lot]
+            delta = xy[lot, None, :] - xy[None, :, :]
+            distance = np.maximum(np.linalg.norm(delta, axis=-1), 0.01)
+            poids = A[lot].toarray()
+            force = k * k / distance ** 2 - poids * distance / k
+            deplacement = np.einsum('ijk,ij->ik', delta, force)
+            longueur = np.maximum(np.linalg.norm(deplacement, axis=-1), 0.01)
+            xy[lot] += deplacement * (np.minimum(longueur, temperature) / longueur)[:, None]
+        temperature -= pas
+    return xy
+
+
+def _regrouper(A):
+    """Groupes en étoile : un noeud de degré localement maximal réunit ceux de ses voisins qui n'en
+    ont pas de plus fort, chacun rejoignant le centre auquel il est le plus fortement relié"""
+    n = A.shape[0]
+    degres = np.diff(A.indptr)
+    u = np.repeat(np.arange(n), degres)
+    # Clé unique (degré puis position) : un seul maximum par voisinage
+    cles = degres * n + np.arange(n)
+    voisine_max = np.zeros(n, dtype=np.int64) - 1
+    np.maximum.at(voisine_max, u, cles[A.indices])
+    centres = cles > voisine_max
+    vers_centre = ~centres[u] & centres[A.indices]
+    cu, cv, cw = u[vers_centre], A.indices[vers_centre], A.data[vers_centre]
+    ordre = np.lexsort((-cw, cu))
+    premiers = np.ones(len(ordre), dtype=bool)
+    premiers[1:] = cu[ordre][1:] != cu[ordre][:-1]
+    groupes = np.arange(n)
+    groupes[cu[ordre][premiers]] = cv[ordre][premiers]
+    # Noeud sans centre voisin : groupe de son voisin le plus fort (à deux pas d'un centre au plus)
+    isoles = ~centres & (groupes == np.arange(n)) & (voisine_max >= 0)
+    groupes[isoles] = groupes[voisine_max[isoles] % n]
+    return np.unique(groupes, return_inverse=True)[1].ravel()
+
+
+def _deployer(xy, groupes, degres, rng):
+    """Membres disposés en spirale autour de la position de leur groupe, les plus reliés au centre"""
+    tailles = np.bincount(groupes)
+    ordre = np.lexsort((-degres, groupes))
+    rang = np.empty(len(groupes), dtype=np.int64)
+    rang[ordre] = np.arange(len(groupes)) - np.repeat(np.cumsum(tailles) - tailles, tailles)
+    espacement = np.sqrt(max(np.prod(np.ptp(xy, axis=0)), 1e-9) / len(groupes))
+    angle = rang * NOMBRE_OR + rng.uniform(0, 2 * np.pi, len(tailles))[groupes]
+    return xy[groupes] + (espacement * np.sqrt(rang + 0.5))[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+
+
+def _affiner(xy, A, rng, iterations=ITERATIONS_AFFINAGE, echantillon=ECHANTILLON_REPULSION, taille_lot=32_768,
+             mobiles=None):
+    """Fruchterman-Reingold vectorisé : attraction exacte le long des arêtes, répulsion estimée sur un
+    échantillon de noeuds (linéaire en nombre de noeuds et d'arêtes) ; avec `mobiles`, seuls ces
+    noeuds se déplacent, les autres servant d'ancrage"""
+    n = len(xy)
+    mobiles = np.arange(n) if mobiles is None else np.asarray(mobiles)
+    xy = xy.copy()
+    distance = np.sqrt(max(np.prod(np.ptp(xy, axis=0)), 1e-9) / n)
+    u = np.repeat(np.arange(n), np.diff(A.indptr))
+    w = A.data / A.data.mean() if A.nnz else A.data
+    temperature = 2 * distance
+    for i in range(iterations):
+        delta = xy[A.indices] - xy[u]
+        attraction = (w * np.linalg.norm(delta, axis=1) / distance)[:, None] * delta
+        deplacement = np.column_stack([np.bincount(u, attraction[:, 0], n), np.bincount(u, attraction[:, 1], n)])
+        for debut in range(0, len(mobiles), taille_lot):
+            lot = mobiles[debut:debut + taille_lot]
+            ecarts = xy[lot, None, :] - xy[rng.integers(0, n, (len(lot), echantillon))]
+            carres = np.maximum((ecarts ** 2).sum(axis=-1), 1e-12)
+            deplacement[lot] += n / echantillon * distance ** 2 * (ecarts / carres[..., None]).sum(axis=1)
+        deplacement = deplacement[mobiles]
+        longueur = np.maximum(np.linalg.norm(deplacement, axis=1), 1e-12)
+        xy[mobiles] += deplacement * (np.minimum(longueur, temperature * (1 - i / iterations)) / longueur)[:, None]
+    return xy
+
+
+def layout_multiniveau(graphe, k=1, iterations=50, graine=42, seuil=SEUIL_MULTINIVEAU):
+    """Layout de force sur le graphe contracté en au plus `seuil` super-noeuds ; à chaque niveau, les
+    membres sont placés autour de leur super-noeud puis affinés (positions alignées sur graphe.noeuds)"""
+    from scipy.sparse import csr_matrix
+    A = graphe.matrice()
+    A = (A + A.T).tocsr()
+    A.setdiag(0)
+    A.eliminate_zeros()
+    niveaux = []
+    while A.shape[0] > seuil:
+        groupes = _regrouper(A)
+        # Contraction bloquée, ou qui ne laisserait qu'un super-noeud
+        if not 1 < groupes.max() + 1 < A.shape[0]:
+            break
+        niveaux.append((groupes, np.diff(A.indptr), A))
+        P = csr_matrix((np.ones(A.shape[0]), (np.arange(A.shape[0]), groupes)))
+        A = (P.T @ A @ P).tocsr()
+        A.setdiag(0)
+        A.eliminate_zeros()
+    rng = np.random.default_rng(graine)
+    if A.shape[0] > seuil:
+        # Contraction bloquée (noeuds sans relations) : positions aléatoires reproductibles, affinées
+        xy = _affiner(rng.random((A.shape[0], 2)), A, rng)
+    else:
+        positions = nx.spring_layout(nx.from_scipy_sparse_array(A), k=k, iterations=iterations, seed=graine,
+                                     scale=None)
+        xy = np.array([positions[i] for i in range(A.shape[0])], dtype=np.float64).reshape(-1, 2)
+    for groupes, degres, A in reversed(niveaux):
+        xy = _affiner(_deployer(xy, groupes, degres, rng), A, rng)
+    return xy
+
+
+class StoreLayout:
+    """Positions calculées une fois par graphe, conservées en mémoire et sur disque (.npz)"""
+
+    def __init__(self, repertoire=None, capacite_memoire=8):
+        self.repertoire = repertoire or os.environ.get(VARIABLE_REPERTOIRE, REPERTOIRE_DEFAUT)
+        self._memoire = CacheLRU(capacite_memoire)
+
+    @staticmethod
+    def _hash_parametres(parametres):
+        return hashlib.sha256(json.dumps(parametres, sort_keys=True).encode()).hexdigest()[:16]
+
+    def _chemin(self, nom):
+        return os.path.join(self.repertoire, nom)
+
+    def _lire(self, cle):
+        chemin = self._chemin(f'{cle}.npz')
+        if not os.path.exists(chemin):
+            return None
+        with np.load(chemin) as f:
+            return {nom: f[nom] for nom in f.files}
+
+    def _ecrire(self, cle, contenu, hash_parametres):
+        os.makedirs(self.repertoire, exist_ok=True)
+        # Écriture atomique : plusieurs processus peuvent partager le même répertoire
+        with tempfile.NamedTemporaryFile(dir=self.repertoire, suffix='.npz', delete=False) as tmp:
+            np.savez(tmp, **contenu)
+        os.replace(tmp.name, self._chemin(f'{cle}.npz'))
+        with tempfile.NamedTemporaryFile('w', dir=self.repertoire, delete=False) as tmp:
+            tmp.write(cle)
+        os.replace(tmp.name, self._chemin(f'dernier-{hash_parametres}.txt'))
+
+    def _precedent(self, hash_parametres):
+        """Dernier layout calculé avec les mêmes paramètres, point de départ du layout incrémental"""
+        chemin = self._chemin(f'dernier-{hash_parametres}.txt')
+        if not os.path.exists(chemin):
+            return None
+        with open(chemin) as f:
+            return self._lire(f.read().strip())
+
+    @staticmethod
+    def _complet(graphe, k, iterations, graine):
+        if graphe.n > SEUIL_MULTINIVEAU:
+            return dict(zip(graphe.noeuds, layout_multiniveau(graphe, k, iterations, graine)))
+        # Positions conservées sans remise à l'échelle, pour que le layout incrémental
+        # travaille dans le même repère que le layout complet (les axes Plotly s'adaptent)
+        return nx.spring_layout(graphe.vers_networkx(), k=k, iterations=iterations, seed=graine, scale=None)
+
+    def _calculer(self, graphe, precedent, k, iterations, graine):
+        if precedent is None or graphe.n == 0:
+            return self._complet(graphe, k, iterations, graine)
+        anciennes_positions = dict(zip(precedent['noeuds'].tolist(), precedent['xy']))
+        anciennes_aretes = _aretes(precedent['noeuds'], precedent['sources'], precedent['cibles'], precedent['poids'])
+        aretes = _aretes(graphe.noeuds, graphe.sources, graphe.indices, graphe.poids)
+        modifies = {str(n) for n in graphe.noeuds if str(n) not in anciennes_positions}
+        for u, v, _ in anciennes_aretes ^ aretes:
+            modifies.update((u, v))
+        if len(modifies) > PROPORTION_MAX_INCREMENTALE * graphe.n:
+            return self._complet(graphe, k, iterations, graine)
+
+        # Les noeuds inchangés restent fixes ; les autres partent de leur position précédente
+        # (ou du barycentre de leurs voisins déjà placés s'ils sont nouveaux) puis sont relâchés
+        rng = np.random.default_rng(graine)
+        xy = np.empty((graphe.n, 2))
+        connus = np.array([str(n) in anciennes_positions for n in graphe.noeuds], dtype=bool)
+        xy[connus] = [anciennes_positions[str(n)] for n in graphe.noeuds[connus]]
+        A = graphe.matrice()
+        A = (A + A.T).tocsr()
+        for i in np.flatnonzero(~connus):
+            voisins = A.indices[A.indptr[i]:A.indptr[i + 1]]
+            voisins = voisins[connus[voisins]]
+            centre = xy[voisins].mean(axis=0) if len(voisins) else xy[connus].mean(axis=0)
+            # Léger décalage pour ne pas superposer le noeud à ses voisins
+            xy[i] = centre + rng.normal(scale=0.05 * k, size=2)
+        mobiles = np.flatnonzero([str(n) in modifies for n in graphe.noeuds])
+        if graphe.n > SEUIL_MULTINIVEAU:
+            # Relâchement exact quadratique en nombre de noeuds : répulsion échantillonnée
+            xy = _affiner(xy, A, rng, mobiles=mobiles)
+        else:
+            xy = _relacher(xy, mobiles, A, k, iterations)
+        return dict(zip(graphe.noeuds, xy))
+
+    def obtenir(self, graphe, k=1, iterations=50, graine=42):
+        """Positions {noeud: (x, y)} du graphe, calculées au plus une fois pour un contenu donné"""
+        parametres = {'algorithme': 'spring', 'k': k, 'iterations': iterations, 'graine': graine}
+        hash_parametres = self._hash_parametres(parametres)
+        cle = f'{graphe.empreinte[:32]}-{hash_parametres}'
+
+        def charger():
+            stocke = self._lire(cle)
+            if stocke is not None:
+                return dict(zip(graphe.noeuds, stocke['xy']))
+            positions = self._calculer(graphe, self._precedent(hash_parametres), k, iterations, graine)
+            self._ecrire(cle, {
+                'noeuds': graphe.noeuds.astype(str),
+                'xy': np.array([positions[n] for n in graphe.noeuds], dtype=np.float64).reshape(-1, 2),
+                'sources': graphe.sources, 'cibles': graphe.indices, 'poids': graphe.poids,
+            }, hash_parametres)
+            return positions
+
+        return self._memoire.obtenir(cle, charger)
+
+    def amorcer(self, graphe, positions, k=1, iterations=50, graine=42):
+        """Enregistre en mémoire des positions précalculées (snapshot compilé)"""
+        parametres = {'algorithme': 'spring', 'k': k, 'iterations': iterations, 'graine': graine}
+        self._memoire.amorcer(f'{graphe.empreinte[:32]}-{self._hash_parametres(parametres)}', positions)
+
+
+_STORE = StoreLayout()
+
+
+def obtenir_layout(graphe, k=1, iterations=50, graine=42):
+    """Positions du réseau depuis le store partagé du processus"""
+    return _STORE.obtenir(graphe, k=k, iterations=iterations, graine=graine)
+
+
+def amorcer_layout(graphe, positions, k=1, iterations=50, graine=42):
+    """Place des positions précalculées dans le store partagé du processus"""
+    _STORE.amorcer(graphe, positions, k=k, iterations=iterations, graine=graine)
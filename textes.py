@@ -0,0 +1,22 @@
+# textes.py
+"""Textes d'analyse des sections, sans dépendance lourde (affichés dès l'en-tête du dashboard)."""
+
+# Textes d'analyse affichés sous chaque section : (titre, paragraphe HTML)
+INSIGHTS = {
+    'synthese': ("🧠 Analyse Stratégique Principale", "Démocratie Libérale a représenté une tentative unique de structurer une <strong>droite libérale pure</strong> dans le paysage politique français. Malgré sa courte existence (1997-2002), le parti a réussi à influencer durablement le débat économique et à former des cadres qui joueront un rôle important dans les gouvernements suivants. Sa fusion dans l'UMP marque à la fois un échec de pérennisation autonome et une réussite d'intégration dans le jeu politique majoritaire."),
+    'reseau': ("🧠 Analyse du Réseau d'Influence", "<strong>Alain Madelin</strong> apparaît comme le nœud central incontournable, ce qui correspond à son rôle de fondateur et figure médiatique du libéralisme français. La connexion forte avec <strong>l'UMP</strong> montre la stratégie d'intégration au sein de la droite gouvernementale. Les relations avec les <strong>think tanks</strong> et <strong>médias libéraux</strong> illustrent l'ancrage intellectuel du mouvement, caractéristique des partis doctrinaux."),
+    'performance': ("🧠 Analyse de Performance", "Démocratie Libérale démontre une <strong>croissance rapide</strong> mais une <strong>pérennité limitée</strong>. La performance en termes d'influence gouvernementale est remarquable pour un parti jeune, avec 8 ministres issus de ses rangs. Cependant, la courte durée de vie révèle les limites d'une structure trop dépendante de son leader et de son positionnement doctrinal strict dans le paysage politique français peu favorable aux partis monothématiques."),
+    'chronologie': ("🧠 Analyse Chronologique", "La courbe de croissance montre un <strong>pic en 2000</strong> correspondant à la participation au gouvernement Jospin, suivie d'un déclin rapide après l'échec de la stratégie autonome lors de la présidentielle 2002. L'année 2002 représente un point d'inflexion stratégique : l'échec de Madelin à la présidentielle (3,91%) pousse à la fusion dans l'UMP, validant la thèse de l'impossibilité d'une voie purement libérale autonome dans le système politique français."),
+    'comparatif': ("🧠 Analyse Comparative", "Démocratie Libérale occupe une position <strong>unique dans l'espace politique français</strong> : ultra-libérale en économie mais modérément progressiste sur les questions sociétales. Ce positionnement le distingue nettement du RPR (gaulliste, plus étatiste) et de l'UDF (centriste, libéral modéré). Sa taille modeste mais son influence disproportionnée s'expliquent par la rareté de l'offre libérale pure et la qualité de ses cadres. La comparaison avec les partis de gouvernement établis montre les limites structurelles des micro-partis doctrinaux dans le système politique français."),
+}
+
+
+def html_insight(section):
+    """Bloc d'analyse au format HTML du dashboard"""
+    titre, texte = INSIGHTS[section]
+    return f"""
+        <div class="insight-box">
+            <h4>{titre}</h4>
+            <p>{texte}</p>
+        </div>
+        """